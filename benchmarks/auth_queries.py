@@ -0,0 +1,135 @@
+"""
+Queries per board refresh benchmark for the session and user lookups.
+
+Logs a user in and refreshes a board `--requests` times the way the board
+page does (`GET /api/boards/<id>/columns`), unfiltered and filtered to the
+user's tasks, in a throwaway in-memory database. Runs with each session
+engine and with Django's stock `AuthenticationMiddleware` or the cached
+one, and prints the queries per refresh, how many of them read
+`django_session` and `auth_user`, and the time per refresh. The unfiltered
+board comes from the fragment cache without looking at the user.
+
+    python benchmarks/auth_queries.py --requests 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings_test")
+
+STOCK = "django.contrib.auth.middleware.AuthenticationMiddleware"
+CACHED = "kanban_app.user_cache.CachedAuthenticationMiddleware"
+
+# Query strings of the refreshes
+REFRESHES = {"all tasks": "", "my tasks": "?assignee=me"}
+
+# (session engine, authentication middleware)
+SETUPS = [
+    ("db", STOCK),
+    ("cached_db", STOCK),
+    ("db", CACHED),
+    ("cached_db", CACHED),
+    ("signed_cookies", CACHED),
+]
+
+
+def build_board():
+    from django.contrib.auth.models import User
+    from kanban_app.models import Board, Column, Project, Task
+
+    project = Project.objects.create(name="Benchmark")
+    board = Board.objects.create(project=project, name="Benchmark")
+    user = User.objects.create(username="benchmark")
+    for order in range(3):
+        column = Column.objects.create(board=board, name=f"Column {order}", order=order)
+        Task.objects.bulk_create(
+            Task(column=column, title=f"Task {i}", order=i, assigned_to=user)
+            for i in range(10)
+        )
+    return board, user
+
+
+def measure(
+    board, user, engine: str, middleware: str, refresh: str, requests: int
+) -> dict:
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext
+
+    stack = [STOCK if name == CACHED else name for name in settings.MIDDLEWARE]
+    stack[stack.index(STOCK)] = middleware
+    with override_settings(
+        SESSION_ENGINE=f"django.contrib.sessions.backends.{engine}", MIDDLEWARE=stack
+    ):
+        for cache in caches.all():
+            cache.clear()
+        client = Client()
+        client.force_login(user)
+        url = f"/api/boards/{board.id}/columns{REFRESHES[refresh]}"
+        # Warms the fragment cache, the refreshes only differ in the lookups
+        client.get(url)
+
+        began = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(requests):
+                client.get(url)
+        elapsed = time.perf_counter() - began
+
+    statements = [query["sql"] for query in queries.captured_queries]
+    return {
+        "refresh": refresh,
+        "sessions": engine,
+        "middleware": middleware.rsplit(".", 1)[1],
+        "queries": len(statements) / requests,
+        "session": sum('"django_session"' in sql for sql in statements) / requests,
+        "user": sum('"auth_user"' in sql for sql in statements) / requests,
+        "ms": elapsed / requests * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    options = parser.parse_args()
+
+    import django
+
+    django.setup()
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    board, user = build_board()
+
+    results = [
+        measure(board, user, engine, middleware, refresh, options.requests)
+        for refresh in REFRESHES
+        for engine, middleware in SETUPS
+    ]
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Per board refresh, averaged over {options.requests} refreshes")
+    print(
+        f"{'refresh':<9}  {'sessions':<15}  {'middleware':<31}  {'queries':>7}  {'session':>7}  {'user':>5}  {'ms':>6}"
+    )
+    for result in results:
+        print(
+            f"{result['refresh']:<9}  {result['sessions']:<15}  {result['middleware']:<31}  "
+            f"{result['queries']:>7.2f}  {result['session']:>7.2f}  "
+            f"{result['user']:>5.2f}  {result['ms']:>6.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Board consistency check benchmark.
+
+Fills a throwaway in-memory database with `--projects` projects of three
+columns and `--tasks` tasks each, breaks the order and task IDs of one
+project in a hundred, and prints the time `check_boards` and
+`repair_boards` take over the whole database.
+
+    python benchmarks/board_checks.py --projects 1000 --tasks 1000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings_test")
+
+COLUMNS = 3
+
+
+def build(projects: int, tasks: int) -> None:
+    """Inserts the rows directly, the ORM would take longer than the checks"""
+    from django.db import connection
+    from django.utils import timezone
+    from kanban_app.models import Board, Column, Project, Task
+
+    now = timezone.now()
+    Project.objects.bulk_create(
+        Project(id=id, name=f"Project {id}", next_task_id=tasks + 1)
+        for id in range(1, projects + 1)
+    )
+    Board.objects.bulk_create(
+        Board(id=id, project_id=id, name=f"Board {id}") for id in range(1, projects + 1)
+    )
+    Column.objects.bulk_create(
+        Column(id=(board - 1) * COLUMNS + order + 1, board_id=board, order=order)
+        for board in range(1, projects + 1)
+        for order in range(COLUMNS)
+    )
+    table = connection.ops.quote_name(Task._meta.db_table)
+    columns = connection.ops.quote_name(Column._meta.db_table)
+    project_table = connection.ops.quote_name(Project._meta.db_table)
+    order = connection.ops.quote_name("order")
+    insert = (
+        f"INSERT INTO {table} (column_id, title, description, {order}, "
+        "project_task_id, version, created_at, updated_at) "
+        "VALUES (%s, '', '', %s, %s, 0, %s, %s)"
+    )
+    with connection.cursor() as cursor:
+        for project in range(1, projects + 1):
+            first_column = (project - 1) * COLUMNS + 1
+            cursor.executemany(
+                insert,
+                [
+                    (
+                        first_column + number % COLUMNS,
+                        number // COLUMNS,
+                        number + 1,
+                        now,
+                        now,
+                    )
+                    for number in range(tasks)
+                ],
+            )
+        # One project in a hundred: a gap, a repeated ID and a stale counter
+        broken = list(range(1, projects + 1, 100))
+        placeholders = ", ".join(["%s"] * len(broken))
+        cursor.execute(
+            f"UPDATE {table} SET {order} = {order} + 1, project_task_id = 1 "
+            f"WHERE project_task_id = 2 AND column_id IN ("
+            f"SELECT id FROM {columns} WHERE board_id IN ({placeholders}))",
+            broken,
+        )
+        cursor.execute(
+            f"UPDATE {project_table} SET next_task_id = 1 WHERE id IN ({placeholders})",
+            broken,
+        )
+        cursor.execute("ANALYZE")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    options = parser.parse_args()
+
+    import django
+
+    django.setup()
+    from django.db import connection
+    from kanban_app.consistency import check_boards, repair_boards
+
+    connection.creation.create_test_db(verbosity=0)
+    build(options.projects, options.tasks)
+
+    began = time.perf_counter()
+    violations = check_boards("default")
+    checked = time.perf_counter() - began
+    began = time.perf_counter()
+    repaired = repair_boards("default")
+    repair_seconds = time.perf_counter() - began
+
+    result = {
+        "tasks": options.projects * options.tasks,
+        "violations": len(violations),
+        "check_s": checked,
+        "repaired_rows": sum(repaired.values()),
+        "repair_s": repair_seconds,
+    }
+    if options.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(
+        f"{result['tasks']} tasks, {result['violations']} violations found in "
+        f"{checked:.2f} s, {result['repaired_rows']} rows repaired in "
+        f"{repair_seconds:.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Payload size benchmark for a board render.
+
+Builds a board with `--cards` tasks (tagged and assigned like a busy board)
+in a throwaway in-memory database, renders it the way the board page loads
+it and prints the size of the HTML as sent, gzipped and brotli-compressed,
+plus the sizes of the static assets.
+
+    python benchmarks/payload.py --cards 1000
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings_test")
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+def build_board(cards: int, columns: int = 5):
+    from django.contrib.auth.models import User
+    from kanban_app.models import Board, Column, Project, Tag, Task
+
+    project = Project.objects.create(name="Benchmark")
+    board = Board.objects.create(project=project, name="Benchmark")
+    users = User.objects.bulk_create(User(username=f"user{i}") for i in range(10))
+    tags = Tag.objects.bulk_create(
+        Tag(project=project, name=name, color=color)
+        for name, color in [
+            ("Bug", "#ef4444"),
+            ("Feature", "#3b82f6"),
+            ("UI", "#22c55e"),
+        ]
+    )
+    board_columns = Column.objects.bulk_create(
+        Column(board=board, name=f"Column {i}", order=i) for i in range(columns)
+    )
+    tasks = Task.objects.bulk_create(
+        Task(
+            column=board_columns[i % columns],
+            order=i,
+            project_task_id=i + 1,
+            title=f"Task number {i}",
+            description="Some details about the work" if i % 2 else "",
+            assigned_to=users[i % len(users)] if i % 3 else None,
+        )
+        for i in range(cards)
+    )
+    Task.tags.through.objects.bulk_create(
+        Task.tags.through(task_id=task.id, tag_id=tags[i % len(tags)].id)
+        for i, task in enumerate(tasks)
+    )
+    return board
+
+
+def sizes(content: bytes) -> dict[str, int]:
+    result = {"raw": len(content), "gzip": len(gzip.compress(content))}
+    if brotli is not None:
+        result["brotli"] = len(brotli.compress(content))
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--cards", type=int, default=1000)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    options = parser.parse_args()
+
+    import django
+
+    django.setup()
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    board = build_board(options.cards)
+
+    html = Client().get(f"/api/boards/{board.id}/columns").content
+    results = {f"board ({options.cards} cards)": sizes(html)}
+    for asset in ("css/style.css", "js/main.js", "img/icons.svg"):
+        path = ROOT / "static" / asset
+        if path.exists():
+            results[asset] = sizes(path.read_bytes())
+
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+    width = max(len(name) for name in results)
+    print(f"{'payload':<{width}}  {'raw':>9}  {'gzip':>9}  {'brotli':>9}")
+    for name, result in results.items():
+        brotli_size = f"{result['brotli']:,}" if "brotli" in result else "-"
+        print(
+            f"{name:<{width}}  {result['raw']:>9,}  {result['gzip']:>9,}  {brotli_size:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
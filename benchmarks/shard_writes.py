@@ -0,0 +1,149 @@
+"""
+Write throughput benchmark for per-project sharding.
+
+Starts one writer process per project. Each creates tasks the way the API
+does, one transaction per task through the task event recorder, and the
+benchmark prints the tasks written per second with all projects in one
+SQLite file (`--shards 1`) and spread over more shards. Every run uses
+fresh database files in a temporary directory.
+
+    python benchmarks/shard_writes.py --projects 8 --tasks 200 --shards 1 2 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def setup_django(directory: Path, shards: int) -> None:
+    """Points the catalog and the shards at `directory` and sets Django up"""
+    os.environ["DJANGO_SETTINGS_MODULE"] = "config.settings"
+    os.environ["KANBAN_SHARDS"] = str(shards)
+    os.environ["KANBAN_SHARD_DIR"] = str(directory)
+    import django
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = directory / "catalog.sqlite3"
+    django.setup()
+
+    import kanban_app.history_logger
+
+    kanban_app.history_logger.HISTORY_DIR = str(directory / "task_history")
+
+
+def create_projects(count: int) -> list[int]:
+    from django.core.management import call_command
+    from kanban_app.models import Board, Column, Project
+    from kanban_app.sharding import use_project
+
+    call_command("migrate", verbosity=0)
+    # Migrates the shards, there is nothing to copy yet
+    with contextlib.redirect_stdout(io.StringIO()):
+        call_command("split_shards")
+    project_ids = []
+    for number in range(count):
+        project = Project.objects.create(name=f"Project {number}")
+        with use_project(project.id):
+            board = Board.objects.create(project=project, name=project.name)
+            Column.objects.create(board=board, name="To Do", order=0)
+        project_ids.append(project.id)
+    return project_ids
+
+
+def write_tasks(directory, shards, project_id, tasks, start, results) -> None:
+    """A writer process: creates `tasks` tasks in one project"""
+    setup_django(directory, shards)
+    from django.db import connections
+    from kanban_app.models import Column, Task
+    from kanban_app.sharding import use_project
+    from kanban_app.task_events import record_task_events
+    from kanban_app.task_ids import allocate_task_ids
+
+    with use_project(project_id):
+        column = Column.objects.get(board__project_id=project_id)
+        # Starts writing along with every other writer
+        start.wait()
+        for order in range(tasks):
+            with record_task_events("Benchmark") as events:
+                (task_id,) = allocate_task_ids(project_id)
+                task = Task.objects.create(
+                    column=column,
+                    title=f"Task {order}",
+                    order=order,
+                    project_task_id=task_id,
+                )
+                events.created(project_id, task, column)
+    connections.close_all()
+    results.put(tasks)
+
+
+def run(shards: int, projects: int, tasks: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        context = multiprocessing.get_context("spawn")
+        # Set up in a child too, this process may already have Django set up
+        with context.Pool(1) as pool:
+            project_ids = pool.apply(_create_projects, (directory, shards, projects))
+
+        start = context.Barrier(len(project_ids) + 1)
+        results = context.Queue()
+        writers = [
+            context.Process(
+                target=write_tasks,
+                args=(directory, shards, project_id, tasks, start, results),
+            )
+            for project_id in project_ids
+        ]
+        for writer in writers:
+            writer.start()
+        # Released once every writer has set Django up
+        start.wait()
+        began = time.perf_counter()
+        written = sum(results.get() for _ in writers)
+        elapsed = time.perf_counter() - began
+        for writer in writers:
+            writer.join()
+    return {"shards": shards, "tasks": written, "seconds": elapsed}
+
+
+def _create_projects(directory: Path, shards: int, count: int) -> list[int]:
+    setup_django(directory, shards)
+    return create_projects(count)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--projects", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=200, help="Tasks per project.")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    options = parser.parse_args()
+
+    results = [
+        run(shards, options.projects, options.tasks) for shards in options.shards
+    ]
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+    baseline = results[0]["tasks"] / results[0]["seconds"]
+    print(f"{options.projects} writer processes, {options.tasks} tasks each")
+    print(f"{'shards':>6}  {'seconds':>8}  {'tasks/s':>8}  {'speedup':>7}")
+    for result in results:
+        rate = result["tasks"] / result["seconds"]
+        print(
+            f"{result['shards']:>6}  {result['seconds']:>8.2f}  {rate:>8,.0f}  {rate / baseline:>6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Cold-start benchmark for the kanban management command.
+
+Every run is a fresh interpreter, the way scripts and cron jobs call
+`manage.py`. Prints the best and median wall time per scenario, and with
+`--importtime` the slowest imports of one scenario as reported by
+`python -X importtime`.
+
+    python benchmarks/startup.py --runs 10
+    python benchmarks/startup.py --importtime "kanban --help (CLI settings)"
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    "django.setup() (full settings)": (
+        ["-c", "import django; django.setup()"],
+        "config.settings",
+    ),
+    "django.setup() (CLI settings)": (
+        ["-c", "import django; django.setup()"],
+        "config.settings_cli",
+    ),
+    "kanban --help (full settings)": (
+        ["manage.py", "kanban", "--help"],
+        "config.settings",
+    ),
+    "kanban --help (CLI settings)": (
+        ["manage.py", "kanban", "--help"],
+        "config.settings_cli",
+    ),
+}
+
+
+def run(
+    args: list[str], settings_module: str, *extra: str
+) -> subprocess.CompletedProcess:
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    return subprocess.run(
+        [sys.executable, *extra, *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def time_scenario(args: list[str], settings_module: str, runs: int) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run(args, settings_module)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def slowest_imports(
+    args: list[str], settings_module: str, top: int
+) -> list[tuple[int, str]]:
+    """Returns (cumulative microseconds, module) for the slowest top-level imports"""
+    stderr = run(args, settings_module, "-X", "importtime").stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Only count imports made directly by the program, not their children
+        if not name.startswith("  "):
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    parser.add_argument(
+        "--importtime",
+        metavar="SCENARIO",
+        choices=SCENARIOS,
+        help="Show the slowest imports of this scenario instead.",
+    )
+    parser.add_argument("--top", type=int, default=15)
+    options = parser.parse_args()
+
+    if options.importtime:
+        for cumulative, name in slowest_imports(
+            *SCENARIOS[options.importtime], options.top
+        ):
+            print(f"{cumulative / 1000:8.1f} ms  {name}")
+        return
+
+    results = {}
+    for name, (args, settings_module) in SCENARIOS.items():
+        timings = time_scenario(args, settings_module, options.runs)
+        results[name] = {"best": min(timings), "median": statistics.median(timings)}
+
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+    width = max(len(name) for name in results)
+    print(f"{'scenario':<{width}}  {'best':>8}  {'median':>8}")
+    for name, result in results.items():
+        print(
+            f"{name:<{width}}  {result['best'] * 1000:6.0f}ms  {result['median'] * 1000:6.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,13 +42,21 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so it compresses what the rest of the stack produced
+    "django.middleware.gzip.GZipMiddleware",
+    # Times everything but the compression, see kanban_app/metrics.py
+    "kanban_app.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Reads the user through the `users` cache, see kanban_app/user_cache.py
+    "kanban_app.user_cache.CachedAuthenticationMiddleware",
+    # Needs the user, see kanban_app/profiling.py
+    "kanban_app.profiling.RequestProfilerMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "kanban_app.sharding.ProjectShardMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -73,14 +82,82 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+SQLITE_OPTIONS = {
+    # Writers take the lock up front and queue for it, instead of failing
+    # when a read transaction cannot be upgraded, as creating a task's read
+    # of the column then write of the task ID counter would
+    "transaction_mode": "IMMEDIATE",
+    "timeout": 20,
+    "init_command": "PRAGMA journal_mode=WAL;",
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": SQLITE_OPTIONS,
+    }
+}
+
+# Per-project sharding, off unless KANBAN_SHARDS is set. The default database
+# then only holds the catalog (projects, users, sessions, jobs) and each
+# project's boards and tasks go to shard_<project ID % KANBAN_SHARDS>. Split
+# an existing database with `manage.py split_shards`, see kanban_app/sharding.py.
+KANBAN_SHARDS = int(os.environ.get("KANBAN_SHARDS", "0"))
+KANBAN_SHARD_DIR = Path(os.environ.get("KANBAN_SHARD_DIR", str(BASE_DIR / "shards")))
+
+for index in range(KANBAN_SHARDS):
+    DATABASES[f"shard_{index}"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": KANBAN_SHARD_DIR / f"shard_{index}.sqlite3",
+        "OPTIONS": SQLITE_OPTIONS,
     }
+
+if KANBAN_SHARDS:
+    # SQLite creates the files, but not their directory
+    KANBAN_SHARD_DIR.mkdir(parents=True, exist_ok=True)
+    DATABASE_ROUTERS = ["kanban_app.sharding.ProjectShardRouter"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+# The local memory caches count their hits and misses for /metrics
+CACHES = {
+    "default": {
+        "BACKEND": "kanban_app.fragment_cache.CountingLocMemCache",
+        "LOCATION": "default",
+    },
+    # Rendered board fragments, keyed by what they show so they never need to
+    # be deleted. Old versions age out once the cache is full.
+    "fragments": {
+        "BACKEND": "kanban_app.fragment_cache.CountingLocMemCache",
+        "LOCATION": "fragments",
+        "TIMEOUT": 24 * 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 5000, "CULL_FREQUENCY": 3},
+    },
+    # The users behind sessions, per process. Other processes only see a
+    # user's changes once their copy times out.
+    "users": {
+        "BACKEND": "kanban_app.fragment_cache.CountingLocMemCache",
+        "LOCATION": "users",
+        "TIMEOUT": 30,
+    },
 }
 
 
+# Sessions
+# https://docs.djangoproject.com/en/6.0/topics/http/sessions/
+
+# `cached_db` reads sessions from the default cache and only goes to the
+# database on a miss. KANBAN_SESSION_ENGINE picks another engine: `db`,
+# `cache` (sessions are lost with the cache) or `signed_cookies` (no storage,
+# the session is in the cookie).
+SESSION_ENGINE = "django.contrib.sessions.backends." + os.environ.get(
+    "KANBAN_SESSION_ENGINE", "cached_db"
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -117,6 +194,34 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    # `collectstatic` writes hashed names with gzip and brotli copies
+    "staticfiles": {
+        "BACKEND": "kanban_app.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
+# Request profiles, see kanban_app/profiling.py. Profiles one in N page and
+# API requests, 0 only profiles the requests staff users ask for.
+KANBAN_PROFILE_SAMPLE_RATE = int(os.environ.get("KANBAN_PROFILE_SAMPLE_RATE", "0"))
+# Seconds between two stack samples of a profiled request. Each sample walks
+# the stack holding the GIL, shorter intervals slow profiled requests down.
+KANBAN_PROFILE_INTERVAL = 0.005
+
+# Metrics, see kanban_app/metrics.py. With a directory, the metrics of every
+# worker process are added up there, empty it when the server restarts.
+# /metrics is open to staff users and to requests with the token in an
+# `Authorization: Bearer <token>` header.
+KANBAN_METRICS_DIR = os.environ.get("KANBAN_METRICS_DIR") or None
+KANBAN_METRICS_TOKEN = os.environ.get("KANBAN_METRICS_TOKEN", "")
+
+# Raise instead of logging a warning when a view exceeds its `@query_budget`
+QUERY_BUDGET_STRICT = False
 
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/accounts/login/"
@@ -0,0 +1,21 @@
+"""
+Lean settings for the `kanban` management command.
+
+The CLI only talks to the ORM, so the admin, sessions, messages, static files,
+middleware and templates are left out and never imported at startup.
+`manage.py` picks this module automatically for `manage.py kanban` unless
+DJANGO_SETTINGS_MODULE is set. Use the full settings for everything else,
+including migrations.
+"""
+
+from .settings import *
+
+INSTALLED_APPS = [
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "kanban_app.apps.KanbanAppConfig",
+]
+
+MIDDLEWARE = []
+
+TEMPLATES = []
@@ -0,0 +1,41 @@
+"""
+Settings for the test suite.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from .settings import *
+
+# The default PBKDF2 hasher is deliberately slow, every created user paid for it
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# Hashed static names need `collectstatic` to have run
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Sharding is off, the sharding tests turn it on. Their two shards are only
+# created for tests that ask for them.
+KANBAN_SHARDS = 0
+DATABASE_ROUTERS = []
+DATABASES = {
+    **DATABASES,
+    # A file, not SQLite's shared in-memory database: threads sharing it get
+    # "table is locked" errors at once instead of waiting for the lock, so
+    # concurrency tests would not see what the server sees. One per run, so
+    # two runs on a machine do not share it.
+    "default": {
+        **DATABASES["default"],
+        "TEST": {
+            "NAME": Path(tempfile.gettempdir()) / f"kanban_test_{os.getpid()}.sqlite3"
+        },
+    },
+    "shard_0": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+    "shard_1": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+}
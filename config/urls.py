@@ -17,7 +17,7 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
-from kanban_app.views import index, project_board
+from kanban_app.views import index, metrics, my_work, project_board
 from kanban_app.api import api
 
 urlpatterns = [
@@ -25,5 +25,7 @@ urlpatterns = [
     path("accounts/", include("django.contrib.auth.urls")),
     path("api/", api.urls),
     path("", index, name="index"),
+    path("my-work/", my_work, name="my_work"),
     path("project/<int:project_id>/", project_board, name="project_board"),
+    path("metrics", metrics, name="metrics"),
 ]
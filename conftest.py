@@ -0,0 +1,73 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client
+from model_bakery import baker
+from kanban_app.models import Board, Column, Project, ProjectMembership
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def history_dir(tmp_path, monkeypatch):
+    """Keeps task history files written during tests out of the repository"""
+    path = tmp_path / "task_history"
+    monkeypatch.setattr("kanban_app.history_logger.HISTORY_DIR", str(path))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    """Makes views fail the test when they exceed their query budget"""
+    settings.QUERY_BUDGET_STRICT = True
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Cached renders are keyed by IDs, which each test's database reuses"""
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture
+def user():
+    return baker.make(User, username="alice")
+
+
+@pytest.fixture
+def board():
+    """A board with "To Do", "Doing" and a terminal "Done" column, no tasks.
+
+    Test modules needing tasks override it, asking for this one.
+    """
+    board = baker.make(Board, project=baker.make(Project, name="Apollo"))
+    for order, name in enumerate(["To Do", "Doing", "Done"]):
+        baker.make(
+            Column, board=board, name=name, order=order, is_terminal=name == "Done"
+        )
+    return board
+
+
+@pytest.fixture
+def member_client(board):
+    """Logs a user in with a role in the board's project and returns the client.
+
+    Makes a user unless one is given, `role=None` gives them no role.
+    """
+
+    def login(role=ProjectMembership.Role.MEMBER, user=None, **fields) -> Client:
+        if user is None:
+            user = baker.make(User, **fields)
+        if role is not None:
+            baker.make(ProjectMembership, project=board.project, user=user, role=role)
+        client = Client()
+        client.force_login(user)
+        return client
+
+    return login
+
+
+@pytest.fixture
+def client(member_client, user):
+    """Logged in as `user`, a member of the board's project"""
+    return member_client(user=user)
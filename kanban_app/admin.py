@@ -1,33 +1,92 @@
+from django.apps import apps
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.db.models import F
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path
+from django.utils import timezone
+from .admin_pagination import EstimatedCountPaginator, LargeTableAdmin
 from .models import (
     Board,
     Column,
+    Job,
     Task,
     Project,
+    ProjectMembership,
+    RequestProfile,
     Tag,
     TaskStatusHistory,
     TaskAssignmentHistory,
 )
+from .profiling import flame_graph, folded_stacks, speedscope
+from .sharding import is_sharded, sharding_enabled
+from .task_events import record_task_events
+
+
+class ProjectMembershipInline(admin.TabularInline):
+    model = ProjectMembership
+    fields = ("user", "role", "created_at")
+    readonly_fields = ("created_at",)
+    autocomplete_fields = ("user",)
+    extra = 0
+
+
+class BoardFragmentAdmin(admin.ModelAdmin):
+    """Bumps the boards showing what is edited, so their cached fragments
+    are rendered again. `project_lookup` leads from a row to its project."""
+
+    project_lookup = "project_id"
+
+    def _project_ids(self, queryset) -> set[int]:
+        return set(queryset.values_list(self.project_lookup, flat=True))
+
+    def save_model(self, request, obj, form, change):
+        rows = self.model._base_manager
+        # The old project too when the row moves to another one
+        project_ids = self._project_ids(rows.filter(pk=obj.pk)) if change else set()
+        with record_task_events(request.user.username) as events:
+            super().save_model(request, obj, form, change)
+            project_ids |= self._project_ids(rows.filter(pk=obj.pk))
+            for project_id in project_ids:
+                events.touch(project_id)
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, self.model._base_manager.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        project_ids = self._project_ids(queryset)
+        with record_task_events(request.user.username) as events:
+            super().delete_queryset(request, queryset)
+            for project_id in project_ids:
+                events.touch(project_id)
 
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "created_at", "updated_at")
     search_fields = ("name",)
+    inlines = [ProjectMembershipInline]
 
 
 @admin.register(Board)
 class BoardAdmin(admin.ModelAdmin):
     list_display = ("id", "project", "name", "created_at", "updated_at")
+    list_select_related = ("project",)
     search_fields = ("name",)
     list_filter = ("project",)
+    autocomplete_fields = ("project",)
 
 
 @admin.register(Column)
-class ColumnAdmin(admin.ModelAdmin):
+class ColumnAdmin(BoardFragmentAdmin):
     list_display = ("id", "name", "board", "order", "created_at", "updated_at")
-    list_filter = ("board",)
+    list_select_related = ("board__project",)
+    # Filtering by board would render every board with its project name
+    list_filter = ("board__project",)
     search_fields = ("name",)
+    autocomplete_fields = ("board",)
+    project_lookup = "board__project_id"
 
 
 @admin.register(Task)
@@ -42,33 +101,212 @@ class TaskAdmin(admin.ModelAdmin):
         "created_at",
         "updated_at",
     )
-    list_filter = ("column__board__project", "column__board", "column")
+    list_select_related = ("assigned_to", "column__board")
+    # A filter lists all its choices on every page, there are too many columns
+    list_filter = ("column__board__project",)
     search_fields = ("title", "description")
+    autocomplete_fields = ("column", "assigned_to", "tags")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def get_queryset(self, request):
         return super().get_queryset(request).prefetch_related("tags")
 
+    def save_model(self, request, obj, form, change):
+        project_id = obj.column.board.project_id
+        if change and {"title", "description", "column"} & set(form.changed_data):
+            # Refuses edits made on the board from a copy loaded before this one
+            obj.version = F("version") + 1
+        with record_task_events(request.user.username) as events:
+            super().save_model(request, obj, form, change)
+
+            if not change:
+                events.created(project_id, obj, obj.column)
+                if obj.assigned_to_id is not None:
+                    events.assigned(project_id, obj, None, obj.assigned_to)
+                return
+
+            if "column" in form.changed_data:
+                old_column = Column.objects.get(id=form.initial["column"])
+                events.moved(project_id, obj, old_column, obj.column)
+                events.touch_columns(old_column.id, obj.column_id)
+            if "assigned_to" in form.changed_data:
+                events.assigned(
+                    project_id, obj, form.initial.get("assigned_to"), obj.assigned_to
+                )
+
     @admin.display(description="Tags")
     def get_tags(self, obj):
         return ", ".join([tag.name for tag in obj.tags.all()])
 
 
 @admin.register(Tag)
-class TagAdmin(admin.ModelAdmin):
+class TagAdmin(BoardFragmentAdmin):
     list_display = ("id", "name", "color", "project")
+    list_select_related = ("project",)
     list_filter = ("project",)
     search_fields = ("name",)
+    autocomplete_fields = ("project",)
 
 
 @admin.register(TaskStatusHistory)
-class TaskStatusHistoryAdmin(admin.ModelAdmin):
+class TaskStatusHistoryAdmin(LargeTableAdmin):
     list_display = ("id", "task", "old_column", "new_column", "changed_at")
-    list_filter = ("new_column", "old_column")
+    list_select_related = ("task", "old_column__board", "new_column__board")
+    keyset_field = "changed_at"
+    date_hierarchy = "changed_at"
     search_fields = ("task__title",)
+    raw_id_fields = ("task", "old_column", "new_column")
 
 
 @admin.register(TaskAssignmentHistory)
-class TaskAssignmentHistoryAdmin(admin.ModelAdmin):
+class TaskAssignmentHistoryAdmin(LargeTableAdmin):
     list_display = ("id", "task", "old_assignee", "new_assignee", "changed_at")
-    list_filter = ("changed_at",)
+    list_select_related = ("task", "old_assignee", "new_assignee")
+    keyset_field = "changed_at"
+    date_hierarchy = "changed_at"
     search_fields = ("task__title", "old_assignee__username", "new_assignee__username")
+    raw_id_fields = ("task", "old_assignee", "new_assignee")
+
+
+@admin.register(Job)
+class JobAdmin(LargeTableAdmin):
+    list_display = (
+        "id",
+        "name",
+        "status",
+        "get_progress",
+        "attempts",
+        "run_at",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status", "name")
+    search_fields = ("name", "error")
+    readonly_fields = (
+        "name",
+        "params",
+        "status",
+        "attempts",
+        "progress",
+        "total",
+        "error",
+        "locked_by",
+        "locked_at",
+        "created_at",
+        "finished_at",
+    )
+    actions = ("retry_jobs",)
+
+    @admin.display(description="Progress")
+    def get_progress(self, obj):
+        if obj.total:
+            return f"{obj.progress}/{obj.total}"
+        return obj.progress or "-"
+
+    @admin.action(description="Retry selected failed jobs now")
+    def retry_jobs(self, request, queryset):
+        count = queryset.filter(status=Job.Status.FAILED).update(
+            status=Job.Status.QUEUED,
+            attempts=0,
+            run_at=timezone.now(),
+            finished_at=None,
+        )
+        self.message_user(request, f"Queued {count} job(s) again.")
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(LargeTableAdmin):
+    list_display = (
+        "id",
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "sql_count",
+        "sql_ms",
+        "template_ms",
+        "trigger",
+        "user",
+        "created_at",
+    )
+    list_select_related = ("user",)
+    list_filter = ("trigger", "method", "view")
+    search_fields = ("path",)
+    fields = (
+        "method",
+        "path",
+        "view",
+        "status_code",
+        "user",
+        "trigger",
+        "duration_ms",
+        "sql_count",
+        "sql_ms",
+        "template_ms",
+        "created_at",
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        view = self.admin_site.admin_view
+        return [
+            path(
+                "<int:profile_id>/speedscope/",
+                view(self.speedscope_view),
+                name="kanban_app_requestprofile_speedscope",
+            ),
+            path(
+                "<int:profile_id>/folded/",
+                view(self.folded_view),
+                name="kanban_app_requestprofile_folded",
+            ),
+            *super().get_urls(),
+        ]
+
+    def change_view(self, request, object_id, form_url="", extra_context=None):
+        profile = self.get_object(request, object_id)
+        if profile is not None:
+            boxes = flame_graph(profile)
+            depth = max((box["depth"] for box in boxes), default=0) + 1
+            extra_context = {
+                **(extra_context or {}),
+                "flame_graph": boxes,
+                "flame_graph_height": depth * 18,
+                "profile": profile,
+            }
+        return super().change_view(request, object_id, form_url, extra_context)
+
+    def _download(self, request, profile_id: int) -> RequestProfile:
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        return get_object_or_404(RequestProfile, pk=profile_id)
+
+    def speedscope_view(self, request, profile_id: int):
+        profile = self._download(request, profile_id)
+        response = JsonResponse(speedscope(profile))
+        response["Content-Disposition"] = (
+            f'attachment; filename="profile-{profile.pk}.speedscope.json"'
+        )
+        return response
+
+    def folded_view(self, request, profile_id: int):
+        profile = self._download(request, profile_id)
+        response = HttpResponse(folded_stacks(profile), content_type="text/plain")
+        response["Content-Disposition"] = (
+            f'attachment; filename="profile-{profile.pk}.folded.txt"'
+        )
+        return response
+
+
+if sharding_enabled():
+    # Their rows are spread over the shards, the admin only sees the catalog
+    for model in apps.get_app_config("kanban_app").get_models():
+        if is_sharded(model) and admin.site.is_registered(model):
+            admin.site.unregister(model)
@@ -0,0 +1,138 @@
+import datetime
+from functools import cached_property
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+
+# Filtered changelists count at most this many rows, a bigger result shows
+# as this number
+COUNT_LIMIT = 10_000
+# Cursor of the keyset-paginated changelists
+AFTER_VAR = "after"
+
+
+class EstimatedCountPaginator(Paginator):
+    """A paginator that does not COUNT(*) large tables.
+
+    An unfiltered changelist uses the table size the database keeps anyway
+    (planner statistics on PostgreSQL, the highest rowid on SQLite), other
+    queries are counted up to `COUNT_LIMIT` rows.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self._estimate_table_size(queryset)
+            if estimate is not None and estimate > COUNT_LIMIT:
+                return estimate
+        return queryset.order_by()[:COUNT_LIMIT].count()
+
+    @staticmethod
+    def _estimate_table_size(queryset) -> int | None:
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table]
+                )
+            elif connection.vendor == "sqlite":
+                # Found through the rowid b-tree, without a scan. Deleted rows
+                # make it an overestimate.
+                cursor.execute(
+                    f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}"
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+        return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class KeysetChangeList(ChangeList):
+    """Pages through the default ordering by position instead of OFFSET.
+
+    The next page is the rows after the last one shown, found through the
+    `(keyset_field, pk)` index, so page 10,000 is as cheap as page 1, and
+    the rows are not counted. A changelist sorted by another column falls
+    back to numbered pages.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.after = request.GET.get(AFTER_VAR) or None
+        self.keyset = ORDER_VAR not in request.GET
+        self.next_after = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(AFTER_VAR, None)
+        return lookup_params
+
+    def get_ordering(self, request, queryset):
+        if self.keyset:
+            field = self.model_admin.keyset_field
+            return [f"-{field}", "-pk"]
+        return super().get_ordering(request, queryset)
+
+    def get_results(self, request):
+        if not self.keyset or self.show_all:
+            super().get_results(request)
+            return
+
+        # One query for the page and the row after it, no OFFSET and no count
+        field = self.model_admin.keyset_field
+        queryset = self.queryset
+        if self.after:
+            value, pk = self._parse_cursor(self.after)
+            queryset = queryset.filter(
+                Q(**{f"{field}__lt": value}) | Q(**{field: value, "pk__lt": pk})
+            )
+        rows = list(queryset[: self.list_per_page + 1])
+        self.result_list = rows[: self.list_per_page]
+        if len(rows) > self.list_per_page:
+            last = self.result_list[-1]
+            self.next_after = f"{getattr(last, field).isoformat()}|{last.pk}"
+        # Only this page is known, "select all" selects it
+        self.result_count = len(self.result_list)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        # The numbered page links need a count, `pagination.html` links to
+        # the next page instead
+        self.multi_page = False
+
+    def _parse_cursor(self, cursor: str) -> tuple[datetime.datetime, int]:
+        value, _, pk = cursor.rpartition("|")
+        try:
+            return datetime.datetime.fromisoformat(value), int(pk)
+        except ValueError as exc:
+            # The admin redirects to the first page
+            raise IncorrectLookupParameters(exc) from exc
+
+    def next_page_url(self) -> str | None:
+        if self.next_after is None:
+            return None
+        return self.get_query_string({AFTER_VAR: self.next_after})
+
+    def first_page_url(self) -> str:
+        return self.get_query_string(remove=[AFTER_VAR])
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that grow without bound.
+
+    Rows are paged by `keyset_field` (an indexed timestamp) and pk, counts
+    are estimated and the unfiltered total is never counted.
+    """
+
+    keyset_field = "created_at"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
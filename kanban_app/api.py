@@ -1,28 +1,104 @@
-from ninja import NinjaAPI, Form, Schema
+from ninja import NinjaAPI, Field, Form, Query, Schema
+from ninja.errors import HttpError
+from ninja.security import SessionAuth
+from django.core.cache import cache
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponse
-from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+import datetime
+import json
 import os
-from django.contrib.auth import get_user_model
+from operator import attrgetter
 from .models import (
     Board,
     Column,
+    Job,
     Task,
     Project,
+    ProjectMembership,
+    SavedFilter,
     Tag,
-    TaskStatusHistory,
-    TaskAssignmentHistory,
 )
-from .history_logger import log_task_change, get_history_file_path
+from .history_logger import get_history_file_path
+from .archive import archive_task, restore_task, search_archived_tasks
+from .columns import archive_column_tasks, move_column_tasks
+from .dashboard import my_tasks, my_work_cache_key
+from .fragment_cache import fragment_cache_stats
+from .jobs import enqueue
+from .permissions import (
+    Role,
+    has_role,
+    member_project_ids,
+    project_from_url,
+    project_members,
+    user_role,
+)
+from .reorder import ReorderError, reorder_board
+from .sharding import select_shards
+from .dependencies import DependencyError, add_dependency, remove_dependency
+from .task_ids import allocate_task_ids
+from .task_events import record_task_events
+from .query_budget import query_budget
+from .versions import VersionConflict, bump_version
+from .boards import (
+    ASSIGNEE_PATTERN,
+    board_columns,
+    board_tasks,
+    clean_filters,
+    filtered_columns_cache_key,
+)
+
+# Requests with these methods only need to see the project
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class ProjectAuth(SessionAuth):
+    """Session authentication that also checks the user's role in the project.
 
-User = get_user_model()
+    Without a `role`, reading needs `VIEWER` and changing needs `MEMBER`.
+    Endpoints that are not about one project only need a login.
+    """
+
+    def __init__(self, role: int | None = None, csrf: bool = True):
+        super().__init__(csrf=csrf)
+        self.role = role
+
+    def authenticate(self, request, key):
+        user = super().authenticate(request, key)
+        if user is None:
+            return None
+        project_id = project_from_url(request.resolver_match.kwargs)
+        if project_id is None:
+            return user
+        role = self.role
+        if role is None:
+            role = Role.VIEWER if request.method in READ_METHODS else Role.MEMBER
+        if not has_role(request, project_id, role):
+            raise HttpError(403, "You do not have access to this project.")
+        return user
+
+
+api = NinjaAPI(
+    title="Kanban API", description="API for HTMX Operations", auth=ProjectAuth()
+)
+
+# Every endpoint declares its query budget with `@query_budget(n)`. Budgets
+# cover the endpoint, not the session, user and permission lookups made
+# before it runs, and must not grow with the size of the board. Endpoints
+# that change task counts include the recount of a project that has no
+# `ProjectStats` row yet.
+
+
+def get_username(request) -> str:
+    """Returns the name recorded in the task history for this request"""
+    return request.user.username if request.user.is_authenticated else "System"
 
-api = NinjaAPI(title="Kanban API", description="API for HTMX Operations")
 
 # --- Project Endpoints ---
 
 
 @api.get("/projects/form")
+@query_budget(0)
 def get_project_form(request):
     """Returns the form modal for creating a new project"""
     return render(request, "kanban_app/partials/project_form.html")
@@ -33,22 +109,37 @@ class ProjectFormSchema(Schema):
 
 
 @api.post("/projects")
+@query_budget(2)
 def create_project(request, data: Form[ProjectFormSchema]):
-    """Creates a new project"""
-    Project.objects.create(name=data.name)
+    """Creates a new project, owned by the user creating it"""
+    project = Project.objects.create(name=data.name)
+    ProjectMembership.objects.create(
+        project=project, user=request.user, role=Role.OWNER
+    )
     response = HttpResponse()
     response["HX-Trigger"] = "projectListUpdated, closeModal"
     return response
 
 
 @api.get("/projects/list")
+@query_budget(1, per_shard=1)
 def get_projects_list(request):
-    """Returns the updated list of projects"""
-    projects = Project.objects.all()
+    """Returns the updated list of the user's projects with their task counts"""
+    # Memberships are in the catalog, which sharded projects cannot join
+    project_ids = member_project_ids(request.user)
+    projects = []
+    for database in select_shards():
+        # With sharding, each shard's copy of its projects, next to their stats
+        rows = Project.objects.using(database).select_related("stats", "board")
+        if project_ids is not None:
+            rows = rows.filter(id__in=project_ids)
+        projects += rows
+    projects.sort(key=attrgetter("id"))
     return render(request, "kanban_app/partials/projects.html", {"projects": projects})
 
 
-@api.delete("/projects/{project_id}")
+@api.delete("/projects/{project_id}", auth=ProjectAuth(Role.OWNER))
+@query_budget(2)
 def delete_project(request, project_id: int):
     """Deletes a project"""
     project = get_object_or_404(Project, id=project_id)
@@ -64,6 +155,7 @@ def delete_project(request, project_id: int):
 
 
 @api.get("/projects/{project_id}/tags")
+@query_budget(2)
 def get_project_tags(request, project_id: int):
     """Returns the tags partial for a project"""
     project = get_object_or_404(Project, id=project_id)
@@ -79,6 +171,7 @@ class TagFormSchema(Schema):
 
 
 @api.post("/projects/{project_id}/tags")
+@query_budget(2)
 def create_tag(request, project_id: int, data: Form[TagFormSchema]):
     """Creates a new tag for the project"""
     project = get_object_or_404(Project, id=project_id)
@@ -90,10 +183,14 @@ def create_tag(request, project_id: int, data: Form[TagFormSchema]):
 
 
 @api.delete("/tags/{tag_id}")
+@query_budget(8)
 def delete_tag(request, tag_id: int):
     """Deletes a tag"""
-    tag = get_object_or_404(Tag, id=tag_id)
-    tag.delete()
+    tag = get_object_or_404(Tag.objects.live(), id=tag_id)
+
+    with record_task_events(get_username(request)) as events:
+        tag.delete()
+        events.touch(tag.project_id)
 
     response = HttpResponse()
     response["HX-Trigger"] = "tagsUpdated, columnUpdated"
@@ -103,15 +200,103 @@ def delete_tag(request, tag_id: int):
 # --- Column Endpoints ---
 
 
+class BoardFilterSchema(Schema):
+    tags: list[int] = []
+    # Empty means no filter. Checked here, so a bad value is a 422 and not a 500
+    assignee: str = Field("", pattern=f"{ASSIGNEE_PATTERN}|^$")
+    q: str = ""
+    updated_since: datetime.date | None = None
+    saved: int | None = None
+
+
+# Filtered renders are also keyed by the board version, so any change to the
+# board invalidates them before this runs out
+FILTERED_COLUMNS_CACHE_SECONDS = 300
+
+
 @api.get("/boards/{board_id}/columns")
-def get_columns(request, board_id: int):
-    """Returns the HTML for all columns in the board"""
-    board = get_object_or_404(Board, id=board_id)
-    columns = board.columns.all()
-    return render(request, "kanban_app/partials/columns.html", {"columns": columns})
+@query_budget(7)
+def get_columns(request, board_id: int, filters: Query[BoardFilterSchema]):
+    """Returns the HTML for all columns in the board, or only the matching tasks"""
+    board = get_object_or_404(Board.objects.live(), id=board_id)
+    if filters.saved:
+        saved = get_object_or_404(
+            SavedFilter, id=filters.saved, board=board, user_id=request.user.id
+        )
+        params = clean_filters(saved.params)
+    else:
+        params = clean_filters(filters.model_dump(mode="json"))
+
+    if not params:
+        columns = board_columns(board)
+        return render(
+            request,
+            "kanban_app/partials/columns.html",
+            {"board": board, "columns": columns},
+        )
+
+    key = filtered_columns_cache_key(board, request.user.id, params)
+    html = cache.get(key)
+    if html is None:
+        columns = board_columns(board, params, request.user.id)
+        html = render_to_string(
+            "kanban_app/partials/columns.html",
+            {"columns": columns, "filtered": True},
+            request=request,
+        )
+        cache.set(key, html, FILTERED_COLUMNS_CACHE_SECONDS)
+    return HttpResponse(html)
+
+
+@api.get("/boards/{board_id}/filters")
+@query_budget(3)
+def get_saved_filters(request, board_id: int):
+    """Returns the current user's saved filters for the board"""
+    saved_filters = SavedFilter.objects.filter(
+        board_id=board_id, user_id=request.user.id
+    )
+    return render(
+        request,
+        "kanban_app/partials/saved_filters.html",
+        {"saved_filters": saved_filters},
+    )
+
+
+# Saved filters are the user's own, viewers save them too
+@api.post("/boards/{board_id}/filters", auth=ProjectAuth(Role.VIEWER))
+@query_budget(4)
+def save_filter(request, board_id: int, data: Form[BoardFilterSchema]):
+    """Saves the current filter under the name entered in the HTMX prompt"""
+    board = get_object_or_404(Board.objects.live(), id=board_id)
+    name = request.headers.get("HX-Prompt", "").strip()
+    params = clean_filters(data.model_dump(mode="json"))
+    if not name or not params:
+        return HttpResponse("Set a filter and a name to save it.", status=400)
+
+    # A single INSERT ... ON CONFLICT replaces a filter saved under the same name
+    SavedFilter.objects.bulk_create(
+        [SavedFilter(user=request.user, board=board, name=name[:100], params=params)],
+        update_conflicts=True,
+        unique_fields=["user", "board", "name"],
+        update_fields=["params"],
+    )
+    response = HttpResponse()
+    response["HX-Trigger"] = "savedFiltersUpdated"
+    return response
+
+
+@api.delete("/filters/{filter_id}", auth=ProjectAuth(Role.VIEWER))
+@query_budget(3)
+def delete_saved_filter(request, filter_id: int):
+    """Deletes one of the current user's saved filters"""
+    SavedFilter.objects.filter(id=filter_id, user_id=request.user.id).delete()
+    response = HttpResponse()
+    response["HX-Trigger"] = "savedFiltersUpdated"
+    return response
 
 
 @api.get("/boards/{board_id}/columns/form")
+@query_budget(0)
 def get_column_form(request, board_id: int):
     """Returns the form modal for creating a new column"""
     return render(
@@ -121,18 +306,24 @@ def get_column_form(request, board_id: int):
 
 class ColumnFormSchema(Schema):
     name: str
+    is_terminal: bool = False
 
 
 @api.post("/boards/{board_id}/columns")
+@query_budget(8)
 def create_column(request, board_id: int, data: Form[ColumnFormSchema]):
     """Creates a new column and triggers fetching columns"""
-    board = get_object_or_404(Board, id=board_id)
+    board = get_object_or_404(Board.objects.live(), id=board_id)
 
     # Get highest order
     last_col = board.columns.last()
     order = (last_col.order + 1) if last_col else 0
 
-    Column.objects.create(board=board, name=data.name, order=order)
+    with record_task_events(get_username(request)) as events:
+        Column.objects.create(
+            board=board, name=data.name, order=order, is_terminal=data.is_terminal
+        )
+        events.touch(board.project_id)
 
     response = HttpResponse()
     # Trigger HTMX to reload the body, and close the modal
@@ -140,15 +331,68 @@ def create_column(request, board_id: int, data: Form[ColumnFormSchema]):
     return response
 
 
-@api.delete("/columns/{column_id}")
-def delete_column(request, column_id: int):
-    """Deletes a column"""
-    column = get_object_or_404(Column, id=column_id)
-    column.delete()
+@api.get("/columns/{column_id}/delete/form")
+@query_budget(2)
+def get_delete_column_form(request, column_id: int):
+    """Returns the modal asking what to do with the tasks of a column being deleted"""
+    column = get_object_or_404(Column.objects.live(), id=column_id)
+    other_columns = Column.objects.filter(board_id=column.board_id).exclude(
+        id=column.id
+    )
+    return render(
+        request,
+        "kanban_app/partials/delete_column_form.html",
+        {"column": column, "other_columns": other_columns},
+    )
 
-    response = HttpResponse()
+
+@api.delete("/columns/{column_id}")
+@query_budget(16)
+def delete_column(
+    request, column_id: int, move_to: int | None = None, archive: bool = False
+):
+    """Deletes a column, moving, archiving or deleting its tasks.
+
+    With `move_to` the tasks go to the end of that column and with `archive`
+    they are archived, both with a few set-based UPDATEs. Otherwise the
+    column is hidden and a background job deletes it with its tasks, the
+    response then carries the job ID.
+    """
+    column = get_object_or_404(
+        Column.objects.live().select_related("board"), id=column_id
+    )
+    target = None
+    if move_to is not None:
+        target = Column.objects.filter(board_id=column.board_id, id=move_to).first()
+        if target is None or target.id == column.id:
+            return HttpResponse(
+                "Tasks can only be moved to another column of the board.", status=400
+            )
+
+    with record_task_events(get_username(request)) as events:
+        events.touch(column.board.project_id)
+        if target is not None:
+            move_column_tasks(events, column, target)
+            job = None
+        elif archive:
+            archive_column_tasks(events, column)
+            job = None
+        else:
+            # Tasks of deleted columns no longer count, nor show in "my work"
+            events.touch_assignees(column.tasks.all())
+            column.is_deleted = True
+            column.save(update_fields=["is_deleted", "updated_at"])
+            events.recount(column.board.project_id)
+            job = enqueue(
+                "delete_column",
+                column_id=column.id,
+                project_id=column.board.project_id,
+                username=get_username(request),
+            )
+
+    response = JsonResponse({"job_id": job.id if job else None})
     # Trigger HTMX to reload the body
-    response["HX-Trigger"] = "columnUpdated"
+    response["HX-Trigger"] = "columnUpdated, closeModal"
     return response
 
 
@@ -157,20 +401,26 @@ class MoveColumnSchema(Schema):
 
 
 @api.post("/columns/{column_id}/move")
+@query_budget(8)
 def move_column(request, column_id: int, data: Form[MoveColumnSchema]):
     """Moves a column to a new order"""
-    column = get_object_or_404(Column, id=column_id)
-    board = column.board
+    column = get_object_or_404(
+        Column.objects.live().select_related("board"), id=column_id
+    )
     new_order = data.new_order
 
-    columns = list(board.columns.exclude(id=column.id))
+    columns = list(
+        Column.objects.filter(board_id=column.board_id).exclude(id=column.id)
+    )
     # Insert at new position
     columns.insert(new_order, column)
 
-    # Update orders
+    # Update orders in a single query
     for index, col in enumerate(columns):
         col.order = index
-        col.save()
+    with record_task_events(get_username(request)) as events:
+        Column.objects.bulk_update(columns, ["order"])
+        events.touch(column.board.project_id)
 
     return HttpResponse(status=204)  # No Content, Sortable handles UI
 
@@ -179,9 +429,12 @@ def move_column(request, column_id: int, data: Form[MoveColumnSchema]):
 
 
 @api.get("/columns/{column_id}/tasks/form")
+@query_budget(2)
 def get_task_form(request, column_id: int):
     """Returns the form modal for creating a new task in a specific column"""
-    column = get_object_or_404(Column, id=column_id)
+    column = get_object_or_404(
+        Column.objects.live().select_related("board__project"), id=column_id
+    )
     tags = column.board.project.tags.all()
     return render(
         request,
@@ -190,6 +443,14 @@ def get_task_form(request, column_id: int):
     )
 
 
+def project_tags(project_id: int, tag_ids: list[int]) -> list[Tag]:
+    """The project's tags with these IDs, 422 if any is another project's"""
+    tags = list(Tag.objects.filter(project_id=project_id, id__in=tag_ids))
+    if len(tags) != len(set(tag_ids)):
+        raise HttpError(422, "Unknown tag.")
+    return tags
+
+
 class TaskFormSchema(Schema):
     title: str
     description: str = ""
@@ -197,22 +458,23 @@ class TaskFormSchema(Schema):
 
 
 @api.post("/columns/{column_id}/tasks")
+@query_budget(15)
 def create_task(request, column_id: int, data: Form[TaskFormSchema]):
     """Creates a new task in the given column"""
-    column = get_object_or_404(Column, id=column_id)
+    column = get_object_or_404(
+        Column.objects.live().select_related("board"), id=column_id
+    )
 
-    # Wrap in transaction to safely generate sequential ID
-    with transaction.atomic():
-        # Get the project for this column's board, locking the row to prevent
-        # race conditions
-        project = Project.objects.select_for_update().get(board=column.board)
+    project_id = column.board.project_id
+    tags = project_tags(project_id, data.tags) if data.tags else []
 
+    with record_task_events(get_username(request)) as events:
         # Get highest order
         last_task = column.tasks.last()
         order = (last_task.order + 1) if last_task else 0
 
-        # Determine the project-specific ID
-        task_id = project.next_task_id
+        # Reserve the project-specific ID, rolled back with the task on failure
+        (task_id,) = allocate_task_ids(project_id)
 
         task = Task.objects.create(
             column=column,
@@ -222,21 +484,10 @@ def create_task(request, column_id: int, data: Form[TaskFormSchema]):
             project_task_id=task_id,
         )
 
-        TaskStatusHistory.objects.create(task=task, new_column=column)
-
-        log_task_change(
-            project.id,
-            request.user.username if request.user.is_authenticated else "System",
-            task.title,
-            f"Created in {column.name}",
-        )
+        events.created(project_id, task, column)
 
-        if data.tags:
-            task.tags.set(data.tags)
-
-        # Increment project counter
-        project.next_task_id += 1
-        project.save()
+        if tags:
+            task.tags.set(tags)
 
     response = HttpResponse()
     # Trigger HTMX to reload the board
@@ -245,19 +496,18 @@ def create_task(request, column_id: int, data: Form[TaskFormSchema]):
 
 
 @api.delete("/tasks/{task_id}")
+@query_budget(13)
 def delete_task(request, task_id: int):
     """Deletes a task"""
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(
+        Task.objects.live().select_related("column__board"), id=task_id
+    )
     project_id = task.column.board.project_id
-    task_title = task.title
-    task.delete()
 
-    log_task_change(
-        project_id,
-        request.user.username if request.user.is_authenticated else "System",
-        task_title,
-        "Deleted task",
-    )
+    with record_task_events(get_username(request)) as events:
+        events.touch_columns(task.column_id)
+        task.delete()
+        events.deleted(project_id, task)
 
     response = HttpResponse()
     response["HX-Trigger"] = "columnUpdated"
@@ -265,9 +515,12 @@ def delete_task(request, task_id: int):
 
 
 @api.get("/tasks/{task_id}/tags/form")
+@query_budget(3)
 def get_task_tags_form(request, task_id: int):
     """Returns the form modal for managing tags for a specific task"""
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(
+        Task.objects.live().select_related("column__board__project"), id=task_id
+    )
     project = task.column.board.project
     tags = project.tags.all()
     # We need to pass the IDs of the currently assigned tags
@@ -284,18 +537,20 @@ class TaskTagsFormSchema(Schema):
 
 
 @api.post("/tasks/{task_id}/tags")
+@query_budget(8)
 def update_task_tags(request, task_id: int, data: Form[TaskTagsFormSchema]):
     """Updates the tags for a task"""
-    task = get_object_or_404(Task, id=task_id)
-    task.tags.set(data.tags)
-
-    log_task_change(
-        task.column.board.project_id,
-        request.user.username if request.user.is_authenticated else "System",
-        task.title,
-        "Tags updated",
+    task = get_object_or_404(
+        Task.objects.live().select_related("column__board"), id=task_id
     )
 
+    project_id = task.column.board.project_id
+    tags = project_tags(project_id, data.tags)
+
+    with record_task_events(get_username(request)) as events:
+        task.tags.set(tags)
+        events.log(project_id, task.title, "Tags updated")
+
     response = HttpResponse()
     # Trigger HTMX to reload the board and close the modal
     response["HX-Trigger"] = "columnUpdated, closeModal"
@@ -305,61 +560,137 @@ def update_task_tags(request, task_id: int, data: Form[TaskTagsFormSchema]):
 class MoveTaskSchema(Schema):
     new_column_id: int
     new_order: int
+    # Versions the client saw, checked before moving
+    version: int | None = None
+    column_version: int | None = None
 
 
 @api.post("/tasks/{task_id}/move")
+@query_budget(16)
 def move_task(request, task_id: int, data: Form[MoveTaskSchema]):
-    """Moves a task between columns or to a new order"""
-    task = get_object_or_404(Task, id=task_id)
-    new_col = get_object_or_404(Column, id=data.new_column_id)
+    """Moves a task between columns or to a new order.
+
+    Refused with 409 if the target column's tasks were moved since the client
+    loaded it, or the task itself changed when it changes column, so a drop
+    never overwrites someone else's move.
+    """
+    task = get_object_or_404(
+        Task.objects.live().select_related("column__board"), id=task_id
+    )
+    new_col = get_object_or_404(
+        Column.objects.live(), id=data.new_column_id, board_id=task.column.board_id
+    )
     new_order = data.new_order
 
-    # Same column movement
-    if task.column_id == new_col.id:
-        tasks = list(new_col.tasks.exclude(id=task.id))
-        tasks.insert(new_order, task)
-        for idx, t in enumerate(tasks):
-            t.order = idx
-            t.save()
-    else:
-        old_col = task.column
-        # Change column
-        if task.assigned_to_id is None:
-            return HttpResponse("Unassigned tasks cannot change status.", status=400)
-
-        task.column = new_col
-        task.save()
+    if task.column_id != new_col.id and task.assigned_to_id is None:
+        return HttpResponse("Unassigned tasks cannot change status.", status=400)
 
-        TaskStatusHistory.objects.create(
-            task=task, old_column=old_col, new_column=new_col
+    task_version = task.version if data.version is None else data.version
+    column_version = (
+        new_col.version if data.column_version is None else data.column_version
+    )
+    columns = {}
+    try:
+        with record_task_events(get_username(request)) as events:
+            events.touch(task.column.board.project_id)
+            columns[new_col.id] = bump_version(
+                Column.objects.filter(id=new_col.id), column_version
+            )
+            if task.column_id != new_col.id:
+                old_col = task.column
+                columns[old_col.id] = bump_version(
+                    Column.objects.filter(id=old_col.id), old_col.version
+                )
+                task_version = bump_version(
+                    Task.objects.filter(id=task.id), task_version, column=new_col
+                )
+                task.column = new_col
+                events.moved(old_col.board.project_id, task, old_col, new_col)
+
+            # Insert in the (new) column and renumber it in a single query
+            tasks = list(
+                new_col.tasks.exclude(id=task.id).only("id", "order", "assigned_to_id")
+            )
+            tasks.insert(new_order, task)
+            for idx, t in enumerate(tasks):
+                if t.order != idx:
+                    # "My work" lists the tasks in their column's order
+                    events.touch_user(t.assigned_to_id)
+                t.order = idx
+            Task.objects.bulk_update(tasks, ["order"])
+    except VersionConflict:
+        return HttpResponse(
+            "Someone else changed this board, it has been reloaded.", status=409
         )
 
-        log_task_change(
-            old_col.board.project_id,
-            request.user.username if request.user.is_authenticated else "System",
-            task.title,
-            f"Moved from {old_col.name} to {new_col.name}",
-        )
+    response = HttpResponse(status=204)
+    # Lets the board keep its copy of the versions current, see `main.js`
+    response["HX-Trigger"] = json.dumps(
+        {"versionsChanged": {"tasks": {task.id: task_version}, "columns": columns}}
+    )
+    return response
 
-        # Insert in new column
-        tasks = list(new_col.tasks.exclude(id=task.id))
-        tasks.insert(new_order, task)
-        for idx, t in enumerate(tasks):
-            t.order = idx
-            t.save()
 
-    return HttpResponse(status=204)
+class ColumnTasksSchema(Schema):
+    id: int
+    # Every task of the column, top to bottom
+    tasks: list[int]
+    # Version the client saw, checked if the column changes
+    version: int | None = None
+
+
+class BoardReorderSchema(Schema):
+    columns: list[ColumnTasksSchema] = []
+    # Versions the client saw, checked for tasks that change column
+    task_versions: dict[int, int] = {}
+    # Every column of the board, left to right
+    column_order: list[int] | None = None
+
+
+@api.post("/boards/{board_id}/reorder")
+@query_budget(13)
+def apply_board_order(request, board_id: int, data: BoardReorderSchema):
+    """Applies the drags made on the board since the last call, in one transaction.
+
+    The board sends the final order of the columns it touched, so a burst of
+    drags costs one request and one write per task that actually moved.
+    Refused with 409 like `move_task`, with nothing applied.
+    """
+    board = get_object_or_404(Board.objects.live(), id=board_id)
+    try:
+        with record_task_events(get_username(request)) as events:
+            versions = reorder_board(
+                events,
+                board,
+                {column.id: column.tasks for column in data.columns},
+                {column.id: column.version for column in data.columns},
+                data.task_versions,
+                data.column_order,
+            )
+    except ReorderError as exc:
+        return HttpResponse(str(exc), status=400)
+    except VersionConflict:
+        return HttpResponse(
+            "Someone else changed this board, it has been reloaded.", status=409
+        )
+
+    response = HttpResponse(status=204)
+    response["HX-Trigger"] = json.dumps({"versionsChanged": versions})
+    return response
 
 
 @api.get("/tasks/{task_id}/details")
+@query_budget(9)
 def get_task_details(request, task_id: int):
     """Returns the details view for a task."""
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(
+        Task.objects.live().select_related("column__board__project"), id=task_id
+    )
     project = task.column.board.project
     tags = project.tags.all()
     # We need to pass the IDs of the currently assigned tags
     task_tag_ids = list(task.tags.values_list("id", flat=True))
-    users = User.objects.all()
+    users = project_members(project.id)
 
     # Build combined chronological change history
     history: list[dict] = []
@@ -384,6 +715,7 @@ def get_task_details(request, task_id: int):
             }
         )
     history.sort(key=lambda x: x["changed_at"])
+    blocked_by = task.upstream_links.select_related("upstream__column")
 
     return render(
         request,
@@ -394,6 +726,7 @@ def get_task_details(request, task_id: int):
             "task_tag_ids": task_tag_ids,
             "users": users,
             "history": history,
+            "blocked_by": blocked_by,
         },
     )
 
@@ -401,40 +734,62 @@ def get_task_details(request, task_id: int):
 class TaskUpdateDetailsSchema(Schema):
     title: str
     description: str = ""
+    # The version the client saw, checked before saving
+    version: int | None = None
 
 
 @api.post("/tasks/{task_id}/update_details")
+@query_budget(9)
 def update_task_details(request, task_id: int, data: Form[TaskUpdateDetailsSchema]):
-    """Updates the details for a task"""
-    task = get_object_or_404(Task, id=task_id)
-    old_title = task.title
-    task.title = data.title
-    task.description = data.description
-    task.save()
+    """Updates the details for a task and returns its card to swap into the board.
 
-    log_task_change(
-        task.column.board.project_id,
-        request.user.username if request.user.is_authenticated else "System",
-        old_title,
-        f"Updated details (new title: {task.title})"
-        if old_title != task.title
-        else "Updated details",
+    Refused with 409 if the task changed since the client loaded it.
+    """
+    task = get_object_or_404(
+        Task.objects.live().select_related("column__board"), id=task_id
     )
+    old_title = task.title
 
-    response = HttpResponse()
-    # Trigger HTMX to reload the board
-    response["HX-Trigger"] = "columnUpdated"
-    return response
+    try:
+        with record_task_events(get_username(request)) as events:
+            bump_version(
+                Task.objects.filter(id=task.id),
+                task.version if data.version is None else data.version,
+                title=data.title,
+                description=data.description,
+            )
+            task.title = data.title
+
+            events.touch_user(task.assigned_to_id)
+            events.log(
+                task.column.board.project_id,
+                old_title,
+                f"Updated details (new title: {task.title})"
+                if old_title != task.title
+                else "Updated details",
+            )
+    except VersionConflict:
+        return HttpResponse(
+            "Someone else changed this task, reopen it to see their changes.",
+            status=409,
+        )
+
+    # Only the card is swapped in, the rest of the board stays as it is
+    task = board_tasks().get(id=task.id)
+    return render(request, "kanban_app/partials/task_updated.html", {"task": task})
 
 
 # --- Assignment Endpoints ---
 
 
 @api.get("/tasks/{task_id}/assign/form")
+@query_budget(4)
 def get_task_assign_form(request, task_id: int):
     """Returns the form modal for assigning a user to a task"""
-    task = get_object_or_404(Task, id=task_id)
-    users = User.objects.all()
+    task = get_object_or_404(
+        Task.objects.live().select_related("column__board"), id=task_id
+    )
+    users = project_members(task.column.board.project_id)
     return render(
         request,
         "kanban_app/partials/task_assign_form.html",
@@ -443,43 +798,211 @@ def get_task_assign_form(request, task_id: int):
 
 
 class TaskAssignFormSchema(Schema):
+    # A user ID, "me" or empty to unassign
     user_id: str | None = None
 
 
 @api.post("/tasks/{task_id}/assign")
+@query_budget(9)
 def assign_task(request, task_id: int, data: Form[TaskAssignFormSchema]):
-    """Assigns a task to a user"""
-    task = get_object_or_404(Task, id=task_id)
+    """Assigns a task to a member of its project"""
+    task = get_object_or_404(
+        Task.objects.live().select_related("column__board"), id=task_id
+    )
+    project_id = task.column.board.project_id
 
     old_assignee_id = task.assigned_to_id
-    new_assignee_id = int(data.user_id) if data.user_id else None
+    if data.user_id == "me":
+        new_assignee_id = request.user.id
+    else:
+        new_assignee_id = int(data.user_id) if data.user_id else None
+    if new_assignee_id is not None and not user_role(new_assignee_id, project_id):
+        return HttpResponse("Only members of the project can be assigned.", status=400)
 
     if old_assignee_id != new_assignee_id:
-        task.assigned_to_id = new_assignee_id
-        task.save()
+        with record_task_events(get_username(request)) as events:
+            task.assigned_to_id = new_assignee_id
+            # Assignment is not versioned, a stale copy must not reset the version
+            task.save(update_fields=["assigned_to", "updated_at"])
+
+            events.assigned(project_id, task, old_assignee_id, task.assigned_to)
+
+    response = HttpResponse()
+    # Trigger HTMX to reload the board and close the modal
+    response["HX-Trigger"] = "columnUpdated, closeModal"
+    return response
+
+
+# --- Dashboard Endpoints ---
 
-        TaskAssignmentHistory.objects.create(
-            task=task, old_assignee_id=old_assignee_id, new_assignee_id=new_assignee_id
+MY_WORK_CACHE_SECONDS = 300
+
+
+@api.get("/my-work")
+@query_budget(2, per_shard=1)
+def get_my_work(request):
+    """Returns the current user's assigned tasks across projects, grouped by column"""
+    # Dropped by the task event recorder when the user's tasks change
+    key = my_work_cache_key(request.user.id)
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string(
+            "kanban_app/partials/my_work.html",
+            {"tasks": my_tasks(request.user)},
+            request=request,
         )
+        cache.set(key, html, MY_WORK_CACHE_SECONDS)
+    return HttpResponse(html)
+
+
+# --- Archive Endpoints ---
+
 
-        assignee_name = task.assigned_to.username if task.assigned_to else "Unassigned"
-        log_task_change(
-            task.column.board.project_id,
-            request.user.username if request.user.is_authenticated else "System",
-            task.title,
-            f"Assigned to {assignee_name}",
+@api.post("/tasks/{task_id}/archive")
+@query_budget(10)
+def archive_task_endpoint(request, task_id: int):
+    """Archives a task sitting in a terminal column"""
+    task = get_object_or_404(
+        Task.objects.live().select_related("column__board"), id=task_id
+    )
+    if not task.column.is_terminal:
+        return HttpResponse("Only tasks in a done column can be archived.", status=400)
+
+    archive_task(task, get_username(request))
+
+    response = HttpResponse()
+    response["HX-Trigger"] = "columnUpdated, closeModal"
+    return response
+
+
+@api.get("/projects/{project_id}/archive")
+@query_budget(2)
+def get_project_archive(request, project_id: int, q: str = ""):
+    """Returns the archive modal listing the archived tasks of a project"""
+    project = get_object_or_404(Project, id=project_id)
+    tasks = search_archived_tasks(project.id, q)[:100]
+    return render(
+        request,
+        "kanban_app/partials/archive.html",
+        {"project": project, "tasks": tasks, "q": q},
+    )
+
+
+@api.post("/tasks/{task_id}/restore")
+@query_budget(11)
+def restore_task_endpoint(request, task_id: int):
+    """Restores an archived task to its column"""
+    task = get_object_or_404(
+        Task.all_objects.live().select_related("column__board"),
+        id=task_id,
+        archived_at__isnull=False,
+    )
+    try:
+        restore_task(task, get_username(request))
+    except Column.DoesNotExist:
+        return HttpResponse("Add a column to restore this task to.", status=400)
+
+    response = HttpResponse()
+    response["HX-Trigger"] = "columnUpdated, archiveUpdated"
+    return response
+
+
+# --- Dependency Endpoints ---
+
+
+class TaskDependencyFormSchema(Schema):
+    upstream_project_task_id: int
+
+
+@api.post("/tasks/{task_id}/dependencies")
+@query_budget(15)
+def add_task_dependency(request, task_id: int, data: Form[TaskDependencyFormSchema]):
+    """Marks the task as blocked by another task of the same project"""
+    task = get_object_or_404(
+        Task.objects.live().select_related("column__board"), id=task_id
+    )
+    project_id = task.column.board.project_id
+    upstream = (
+        Task.objects.select_related("column__board")
+        .filter(
+            column__board__project_id=project_id,
+            project_task_id=data.upstream_project_task_id,
+        )
+        .first()
+    )
+    if upstream is None:
+        return HttpResponse(
+            f"Task #{data.upstream_project_task_id} does not exist.", status=400
         )
 
+    try:
+        with record_task_events(get_username(request)) as events:
+            add_dependency(upstream, task)
+            events.log(
+                project_id, task.title, f"Blocked by #{upstream.project_task_id}"
+            )
+    except DependencyError as exc:
+        return HttpResponse(str(exc), status=400)
+
+    response = HttpResponse()
+    response["HX-Trigger"] = "columnUpdated, closeModal"
+    return response
+
+
+@api.delete("/tasks/{task_id}/dependencies/{upstream_id}")
+@query_budget(7)
+def remove_task_dependency(request, task_id: int, upstream_id: int):
+    """Removes a blocker from the task"""
+    task = get_object_or_404(
+        Task.objects.live().select_related("column__board"), id=task_id
+    )
+    with record_task_events(get_username(request)) as events:
+        if remove_dependency(upstream_id, task.id):
+            events.log(task.column.board.project_id, task.title, "Blocker removed")
+
     response = HttpResponse()
-    # Trigger HTMX to reload the board and close the modal
     response["HX-Trigger"] = "columnUpdated, closeModal"
     return response
 
 
+# --- Job Endpoints ---
+
+
+class JobSchema(Schema):
+    id: int
+    name: str
+    status: str
+    progress: int
+    total: int | None
+    attempts: int
+    error: str
+
+
+@api.get("/jobs/{job_id}", response=JobSchema)
+@query_budget(1)
+def get_job(request, job_id: int):
+    """Returns the state of a background job"""
+    job = get_object_or_404(Job, id=job_id)
+    # `ProjectAuth` checked the role for a project's job, the others are staff's
+    if job.params.get("project_id") is None and not request.user.is_staff:
+        return HttpResponse("Staff only.", status=403)
+    return job
+
+
+@api.get("/fragments/stats")
+@query_budget(2)
+def get_fragment_cache_stats(request):
+    """Returns the hit rate of this process's board fragment cache, for staff"""
+    if not request.user.is_staff:
+        return HttpResponse("Staff only.", status=403)
+    return JsonResponse(fragment_cache_stats())
+
+
 # --- History Endpoints ---
 
 
-@api.delete("/projects/{project_id}/history")
+@api.delete("/projects/{project_id}/history", auth=ProjectAuth(Role.OWNER))
+@query_budget(1)
 def delete_project_history(request, project_id: int):
     """Deletes the project history file"""
     get_object_or_404(Project, id=project_id)
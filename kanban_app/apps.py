@@ -1,5 +1,39 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class KanbanAppConfig(AppConfig):
     name = "kanban_app"
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from . import boards, sharding
+        from .models import Project, ProjectMembership
+        from .permissions import forget_role
+
+        # The receivers do nothing unless KANBAN_SHARDS is set
+        post_save.connect(sharding.mirror_project, sender=Project)
+        post_delete.connect(sharding.forget_project, sender=Project)
+        post_save.connect(sharding.mirror_user, sender=get_user_model())
+        post_delete.connect(sharding.forget_user, sender=get_user_model())
+        post_migrate.connect(sharding.reserve_id_range, sender=self)
+
+        post_save.connect(forget_role, sender=ProjectMembership)
+        post_delete.connect(forget_role, sender=ProjectMembership)
+
+        # The cached board fragments show the usernames of assignees
+        post_save.connect(boards.forget_assignee_boards, sender=get_user_model())
+
+        # Only processes serving requests read the user cache, the lean CLI
+        # settings leave the middleware and its imports out
+        if (
+            "kanban_app.user_cache.CachedAuthenticationMiddleware"
+            in settings.MIDDLEWARE
+        ):
+            from . import user_cache
+
+            post_save.connect(user_cache.forget_cached_user, sender=get_user_model())
+            post_delete.connect(user_cache.forget_cached_user, sender=get_user_model())
+            user_logged_out.connect(user_cache.forget_cached_user)
@@ -0,0 +1,120 @@
+import datetime
+from django.db.models import F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from .models import Column, Task, TaskStatusHistory
+from .sharding import select_shards
+from .task_events import record_task_events
+
+
+def archivable_tasks(days: int, project_id: int | None = None) -> QuerySet:
+    """Returns active tasks that entered a terminal column more than `days` days ago"""
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    entered_column_at = (
+        TaskStatusHistory.objects.filter(
+            task=OuterRef("pk"), new_column=OuterRef("column")
+        )
+        .order_by("-changed_at")
+        .values("changed_at")[:1]
+    )
+    tasks = Task.objects.filter(column__is_terminal=True)
+    if project_id is not None:
+        tasks = tasks.filter(column__board__project_id=project_id)
+    # Tasks created through the ORM may have no history, fall back to the
+    # last time the row was touched.
+    return tasks.annotate(
+        entered_column_at=Coalesce(Subquery(entered_column_at), "updated_at")
+    ).filter(entered_column_at__lt=cutoff)
+
+
+def archive_stale_tasks(
+    days: int,
+    batch_size: int = 500,
+    project_id: int | None = None,
+    username: str = "System",
+) -> int:
+    """Archives stale terminal-column tasks in batches and returns how many were archived"""
+    return sum(
+        _archive_stale_tasks(days, batch_size, project_id, username)
+        for _ in select_shards(project_id)
+    )
+
+
+def _archive_stale_tasks(
+    days: int, batch_size: int, project_id: int | None, username: str
+) -> int:
+    archived = 0
+    while True:
+        # One short transaction per batch so the SQLite write lock is never
+        # held for the whole run.
+        with record_task_events(username) as events:
+            tasks = archivable_tasks(days, project_id).order_by("id")
+            batch = list(
+                tasks.values_list(
+                    "id",
+                    "title",
+                    "column_id",
+                    "assigned_to_id",
+                    "column__board__project_id",
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            Task.objects.filter(id__in=[task_id for task_id, *_ in batch]).update(
+                archived_at=timezone.now()
+            )
+            for _, title, column_id, assignee_id, task_project_id in batch:
+                events.archived(task_project_id, title)
+                events.touch_columns(column_id)
+                events.touch_user(assignee_id)
+
+        archived += len(batch)
+
+    return archived
+
+
+def archive_task(task: Task, username: str = "System") -> None:
+    """Archives a single task"""
+    with record_task_events(username) as events:
+        task.archived_at = timezone.now()
+        task.save(update_fields=["archived_at"])
+        events.touch_user(task.assigned_to_id)
+        events.touch_columns(task.column_id)
+        events.archived(
+            task.column.board.project_id, task.title, task.column.is_terminal
+        )
+
+
+def restore_task(task: Task, username: str = "System") -> None:
+    """Restores an archived task to the bottom of its column.
+
+    Tasks archived along with their column go to the board's first column.
+    Raises `Column.DoesNotExist` if the board has no column left.
+    """
+    project_id = task.column.board.project_id
+    with record_task_events(username) as events:
+        if task.column.is_deleted:
+            task.column = Column.objects.filter(board_id=task.column.board_id).first()
+            if task.column is None:
+                raise Column.DoesNotExist("The board has no column to restore to")
+        last_order = task.column.tasks.aggregate(last=Max("order"))["last"]
+        task.order = 0 if last_order is None else last_order + 1
+        task.archived_at = None
+        task.version = F("version") + 1
+        task.save(update_fields=["archived_at", "column", "order", "version"])
+        events.touch_user(task.assigned_to_id)
+        events.touch_columns(task.column_id)
+        events.restored(project_id, task.title, task.column.is_terminal)
+
+
+def search_archived_tasks(project_id: int, query: str = "") -> QuerySet:
+    """Returns the archived tasks of a project, optionally filtered by text"""
+    tasks = Task.all_objects.filter(
+        archived_at__isnull=False, column__board__project_id=project_id
+    )
+    if query:
+        tasks = tasks.filter(
+            Q(title__icontains=query) | Q(description__icontains=query)
+        )
+    return tasks.select_related("column").order_by("-archived_at")
@@ -0,0 +1,122 @@
+import datetime
+import hashlib
+import json
+import re
+from typing import Any
+from django.db.models import Exists, F, OuterRef, Prefetch, Q
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from .models import Board, Task
+from .sharding import select_shards
+
+# Board filter parameters, as sent by the filter bar and stored in `SavedFilter`
+FILTER_FIELDS = ("tags", "assignee", "q", "updated_since")
+# A user ID, "me" or "none"
+ASSIGNEE_PATTERN = r"^(\d+|me|none)$"
+
+
+def clean_filters(params: dict[str, Any]) -> dict[str, Any]:
+    """Drops unknown and empty board filter parameters.
+
+    An assignee that is not a user ID, "me" or "none" is dropped too, the
+    API refuses them but filters saved before it did may hold one.
+    """
+    params = {key: params[key] for key in FILTER_FIELDS if params.get(key)}
+    if "assignee" in params and not re.match(ASSIGNEE_PATTERN, str(params["assignee"])):
+        del params["assignee"]
+    return params
+
+
+def filter_tasks(
+    tasks: QuerySet, filters: dict[str, Any], user_id: int | None
+) -> QuerySet:
+    """Applies board filter parameters to a task queryset.
+
+    `tags` keeps tasks with any of the tag IDs, `assignee` is a user ID,
+    "me" or "none", `q` searches title and description and `updated_since`
+    is an ISO date.
+    """
+    if tag_ids := filters.get("tags"):
+        # EXISTS on the (task, tag) unique index, no duplicate rows to remove
+        tagged = Task.tags.through.objects.filter(
+            task_id=OuterRef("pk"), tag_id__in=tag_ids
+        )
+        tasks = tasks.filter(Exists(tagged))
+
+    assignee = filters.get("assignee")
+    if assignee == "me":
+        tasks = tasks.filter(assigned_to_id=user_id)
+    elif assignee == "none":
+        tasks = tasks.filter(assigned_to__isnull=True)
+    elif assignee:
+        tasks = tasks.filter(assigned_to_id=int(assignee))
+
+    if q := filters.get("q"):
+        tasks = tasks.filter(Q(title__icontains=q) | Q(description__icontains=q))
+
+    if updated_since := filters.get("updated_since"):
+        since = datetime.datetime.combine(
+            datetime.date.fromisoformat(str(updated_since)), datetime.time.min
+        )
+        # Compare with a datetime, a __date lookup could not use the index
+        tasks = tasks.filter(updated_at__gte=timezone.make_aware(since))
+
+    return tasks
+
+
+def board_tasks() -> QuerySet:
+    """Live tasks with what a board card shows loaded: assignee, tags and `is_blocked`"""
+    return (
+        Task.objects.select_related("assigned_to")
+        .with_blocked()
+        .prefetch_related("tags")
+    )
+
+
+def board_columns(
+    board: Board, filters: dict[str, Any] | None = None, user_id: int | None = None
+) -> QuerySet:
+    """Returns the board's columns with tasks, assignees, tags and `is_blocked` loaded
+
+    With `filters`, only the matching tasks are loaded.
+    """
+    tasks = board_tasks()
+    if filters:
+        tasks = filter_tasks(tasks, filters, user_id)
+    return board.columns.prefetch_related(Prefetch("tasks", queryset=tasks))
+
+
+def filtered_columns_cache_key(
+    board: Board, user_id: int | None, filters: dict[str, Any]
+) -> str:
+    """Cache key for a filtered board render, invalidated by any board change"""
+    digest = hashlib.md5(
+        json.dumps(filters, sort_keys=True, default=str).encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    return f"board-columns:{board.id}:{board.version}:{user_id}:{digest}"
+
+
+def board_version(board_id: int) -> int | None:
+    """Returns the board's change counter, `None` if the board is gone"""
+    return Board.objects.filter(id=board_id).values_list("version", flat=True).first()
+
+
+def forget_assignee_boards(
+    sender, instance, created=False, raw=False, update_fields=None, **kwargs
+) -> None:
+    """Bumps the boards showing a renamed user on their cards.
+
+    The board fragments are cached by board version, which the task event
+    recorder bumps for task changes but a new username does not go through.
+    """
+    if (
+        raw
+        or created
+        or (update_fields is not None and "username" not in update_fields)
+    ):
+        return
+    for _ in select_shards():
+        Board.objects.filter(columns__tasks__assigned_to_id=instance.id).update(
+            version=F("version") + 1
+        )
@@ -0,0 +1,98 @@
+from django.db import connections, router
+from django.utils import timezone
+from .models import Column, Task, TaskStatusHistory
+from .task_events import TaskEventRecorder
+
+
+def move_column_tasks(events: TaskEventRecorder, column: Column, target: Column) -> int:
+    """Moves every task of `column` to the end of `target` and deletes `column`.
+
+    Active tasks keep their relative order after the active tasks of
+    `target`, which are renumbered 0, 1, 2, ... first. Archived tasks move
+    without an order, restoring one puts it at the bottom of its column.
+    Each moved task gets a status history row like a single move, the file
+    log one line for the column. Every step is one statement over the
+    table, no task is loaded. Returns how many active tasks were moved.
+    """
+    database = router.db_for_write(Task)
+    connection = connections[database]
+    table = connection.ops.quote_name(Task._meta.db_table)
+    history = connection.ops.quote_name(TaskStatusHistory._meta.db_table)
+    order = connection.ops.quote_name("order")
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    events.touch_assignees(Task.objects.using(database).filter(column=column))
+    with connection.cursor() as cursor:
+        # Before the delete, which nulls their `old_column` like it does for
+        # the older rows (`on_delete=SET_NULL`, one UPDATE per reference)
+        cursor.execute(
+            f"""
+            INSERT INTO {history} (task_id, old_column_id, new_column_id, changed_at)
+            SELECT id, column_id, %s, %s FROM {table}
+            WHERE column_id = %s AND archived_at IS NULL
+            """,
+            [target.id, now, column.id],
+        )
+        cursor.execute(
+            f"""
+            UPDATE {table} SET {order} = r.position
+            FROM (
+                SELECT id, ROW_NUMBER() OVER (ORDER BY {order}, id) - 1 AS position
+                FROM {table}
+                WHERE column_id = %s AND archived_at IS NULL
+            ) r
+            WHERE {table}.id = r.id AND {table}.{order} <> r.position
+            """,
+            [target.id],
+        )
+        # Numbered on from the target's tasks, renumbered above
+        cursor.execute(
+            f"""
+            UPDATE {table} SET column_id = %s, version = {table}.version + 1,
+                updated_at = %s, {order} = r.position + (
+                    SELECT COUNT(*) FROM {table}
+                    WHERE column_id = %s AND archived_at IS NULL
+                )
+            FROM (
+                SELECT id, ROW_NUMBER() OVER (ORDER BY {order}, id) - 1 AS position
+                FROM {table}
+                WHERE column_id = %s AND archived_at IS NULL
+            ) r
+            WHERE {table}.id = r.id
+            """,
+            [target.id, now, target.id, column.id],
+        )
+        moved = cursor.rowcount
+    Task.all_objects.using(database).filter(column=column).update(
+        column=target, updated_at=timezone.now()
+    )
+    column.delete()
+
+    project_id = column.board.project_id
+    events.moved_in_bulk(project_id, moved, column, target)
+    events.touch_columns(target.id)
+    events.log(
+        project_id,
+        column.name,
+        f"Column deleted, {moved} tasks moved to {target.name}",
+    )
+    return moved
+
+
+def archive_column_tasks(events: TaskEventRecorder, column: Column) -> int:
+    """Archives every task of `column` and hides the column.
+
+    The column stays as a hidden row for the archived tasks to point at,
+    restoring one of them puts it in the board's first column. Returns how
+    many tasks were archived.
+    """
+    tasks = Task.objects.filter(column=column)
+    events.touch_assignees(tasks)
+    archived = tasks.update(archived_at=timezone.now(), updated_at=timezone.now())
+    column.is_deleted = True
+    column.save(update_fields=["is_deleted", "updated_at"])
+
+    project_id = column.board.project_id
+    events.recount(project_id)
+    events.touch_columns(column.id)
+    events.log(project_id, column.name, f"Column deleted, {archived} tasks archived")
+    return archived
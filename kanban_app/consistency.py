@@ -0,0 +1,328 @@
+"""
+Board consistency checks.
+
+The board relies on invariants the database does not enforce:
+
+- the live columns of a board are numbered 0, 1, 2, ... by `order`, and so
+  are the active tasks of a column, since `move_column`, `move_task` and
+  the board reorder insert by position,
+- a project's `next_task_id` is above every `project_task_id` it handed out,
+- no two tasks of a project share a `project_task_id`.
+
+Each check is one statement over every project of a database, with window
+functions and GROUP BY ... HAVING, so it reads each project's rows once
+whatever the number of projects. `repair_boards` fixes what they find with
+set-based UPDATEs, in one transaction.
+
+Deleting or archiving a task leaves a gap in its column until the next
+move renumbers the column. Gaps are reported apart from repeated positions,
+which make the order of the tasks ambiguous.
+"""
+
+from collections import defaultdict
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Board, Column, Project, Task
+from .task_ids import allocate_task_ids
+
+# Duplicate task IDs listed per project
+MAX_LISTED_IDS = 10
+
+
+def _tables(database: str) -> dict[str, str]:
+    quote = connections[database].ops.quote_name
+    return {
+        "project": quote(Project._meta.db_table),
+        "board": quote(Board._meta.db_table),
+        "column": quote(Column._meta.db_table),
+        "task": quote(Task._meta.db_table),
+        "order": quote("order"),
+    }
+
+
+def _project_filter(project_id: int | None) -> tuple[str, list]:
+    if project_id is None:
+        return "", []
+    return "AND b.project_id = %s", [project_id]
+
+
+def _fetch(database: str, sql: str, params: list) -> list[tuple]:
+    with connections[database].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _positions(database: str, level: str, project_id: int | None) -> tuple[str, list]:
+    """A subquery numbering the live columns of each board or the active
+    tasks of each column 0, 1, 2, ... in their current order.
+
+    Rows are `(project_id, parent_id, id, order, position)`.
+    """
+    t = _tables(database)
+    where, params = _project_filter(project_id)
+    if level == "column":
+        sql = f"""
+            SELECT b.project_id, c.board_id AS parent_id, c.id, c.{t["order"]},
+                ROW_NUMBER() OVER (
+                    PARTITION BY c.board_id ORDER BY c.{t["order"]}, c.id
+                ) - 1 AS position
+            FROM {t["column"]} c
+            JOIN {t["board"]} b ON b.id = c.board_id
+            WHERE c.is_deleted = %s {where}
+        """
+    else:
+        sql = f"""
+            SELECT b.project_id, t.column_id AS parent_id, t.id, t.{t["order"]},
+                ROW_NUMBER() OVER (
+                    PARTITION BY t.column_id ORDER BY t.{t["order"]}, t.id
+                ) - 1 AS position
+            FROM {t["task"]} t
+            JOIN {t["column"]} c ON c.id = t.column_id
+            JOIN {t["board"]} b ON b.id = c.board_id
+            WHERE t.archived_at IS NULL AND c.is_deleted = %s {where}
+        """
+    return sql, [False, *params]
+
+
+def check_orders(
+    database: str, level: str, project_id: int | None = None
+) -> list[dict]:
+    """The boards (`level="column"`) or columns (`level="task"`) whose rows
+    are not numbered 0, 1, 2, ..."""
+    positions, params = _positions(database, level, project_id)
+    order = _tables(database)["order"]
+    rows = _fetch(
+        database,
+        f"""
+        SELECT r.project_id, r.parent_id, COUNT(*),
+            SUM(CASE WHEN r.{order} <> r.position THEN 1 ELSE 0 END),
+            COUNT(*) - COUNT(DISTINCT r.{order})
+        FROM ({positions}) r
+        GROUP BY r.project_id, r.parent_id
+        HAVING SUM(CASE WHEN r.{order} <> r.position THEN 1 ELSE 0 END) > 0
+        ORDER BY r.project_id, r.parent_id
+        """,
+        params,
+    )
+    parent = "board" if level == "column" else "column"
+    violations = []
+    for project, parent_id, count, misplaced, repeated in rows:
+        problem = "repeated positions" if repeated else "gaps"
+        violations.append(
+            {
+                "check": f"{level} order",
+                "project_id": project,
+                "parent_id": parent_id,
+                # Left by deletes and archives, the order is still clear
+                "gaps_only": not repeated,
+                "detail": (
+                    f"{parent} {parent_id}: {misplaced} of {count} {level}s "
+                    f"out of place ({problem})"
+                ),
+            }
+        )
+    return violations
+
+
+def check_task_ids(database: str, project_id: int | None = None) -> list[dict]:
+    """The projects whose `next_task_id` is not above their highest task ID,
+    or that gave an ID to several tasks"""
+    t = _tables(database)
+    where, params = _project_filter(project_id)
+    rows = _fetch(
+        database,
+        f"""
+        SELECT b.project_id, p.next_task_id, MAX(t.project_task_id),
+            COUNT(t.project_task_id) - COUNT(DISTINCT t.project_task_id)
+        FROM {t["task"]} t
+        JOIN {t["column"]} c ON c.id = t.column_id
+        JOIN {t["board"]} b ON b.id = c.board_id
+        JOIN {t["project"]} p ON p.id = b.project_id
+        WHERE t.project_task_id IS NOT NULL {where}
+        GROUP BY b.project_id, p.next_task_id
+        HAVING MAX(t.project_task_id) >= p.next_task_id
+            OR COUNT(t.project_task_id) > COUNT(DISTINCT t.project_task_id)
+        ORDER BY b.project_id
+        """,
+        params,
+    )
+    violations = []
+    duplicated = []
+    for project, next_task_id, highest, duplicates in rows:
+        if highest >= next_task_id:
+            violations.append(
+                {
+                    "check": "task ID counter",
+                    "project_id": project,
+                    "detail": f"next_task_id is {next_task_id}, task #{highest} exists",
+                }
+            )
+        if duplicates:
+            duplicated.append(project)
+    if duplicated:
+        violations += _duplicate_task_ids(database, duplicated)
+    return violations
+
+
+def _duplicate_task_ids(database: str, project_ids: list[int]) -> list[dict]:
+    t = _tables(database)
+    placeholders = ", ".join(["%s"] * len(project_ids))
+    rows = _fetch(
+        database,
+        f"""
+        SELECT b.project_id, t.project_task_id, COUNT(*)
+        FROM {t["task"]} t
+        JOIN {t["column"]} c ON c.id = t.column_id
+        JOIN {t["board"]} b ON b.id = c.board_id
+        WHERE t.project_task_id IS NOT NULL AND b.project_id IN ({placeholders})
+        GROUP BY b.project_id, t.project_task_id
+        HAVING COUNT(*) > 1
+        ORDER BY b.project_id, t.project_task_id
+        """,
+        project_ids,
+    )
+    ids = defaultdict(list)
+    for project_id, task_id, count in rows:
+        ids[project_id].append(f"#{task_id} ({count} tasks)")
+    violations = []
+    for project_id, listed in ids.items():
+        detail = ", ".join(listed[:MAX_LISTED_IDS])
+        if len(listed) > MAX_LISTED_IDS:
+            detail += f" and {len(listed) - MAX_LISTED_IDS} more"
+        violations.append(
+            {"check": "duplicate task IDs", "project_id": project_id, "detail": detail}
+        )
+    return violations
+
+
+def check_boards(database: str, project_id: int | None = None) -> list[dict]:
+    """Every violation in the database, or in one of its projects"""
+    return [
+        *check_orders(database, "column", project_id),
+        *check_orders(database, "task", project_id),
+        *check_task_ids(database, project_id),
+    ]
+
+
+# --- Repairs ---
+
+
+def _renumber(database: str, level: str, project_id: int | None) -> int:
+    """Sets `order` to the row's position, returns the number of rows changed"""
+    model = Column if level == "column" else Task
+    table = connections[database].ops.quote_name(model._meta.db_table)
+    order = _tables(database)["order"]
+    positions, params = _positions(database, level, project_id)
+    with connections[database].cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table} SET {order} = r.position
+            FROM ({positions}) r
+            WHERE {table}.id = r.id AND {table}.{order} <> r.position
+            """,
+            params,
+        )
+        return cursor.rowcount
+
+
+def _raise_task_id_counters(database: str, project_id: int | None) -> int:
+    """Moves each project's `next_task_id` past its highest task ID"""
+    t = _tables(database)
+    where, params = _project_filter(project_id)
+    with connections[database].cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {t["project"]} SET next_task_id = m.highest + 1
+            FROM (
+                SELECT b.project_id, MAX(t.project_task_id) AS highest
+                FROM {t["task"]} t
+                JOIN {t["column"]} c ON c.id = t.column_id
+                JOIN {t["board"]} b ON b.id = c.board_id
+                WHERE t.project_task_id IS NOT NULL {where}
+                GROUP BY b.project_id
+            ) m
+            WHERE {t["project"]}.id = m.project_id
+                AND {t["project"]}.next_task_id <= m.highest
+            """,
+            params,
+        )
+        return cursor.rowcount
+
+
+def _renumber_duplicate_task_ids(database: str, project_ids: list[int]) -> int:
+    """Gives new IDs to every task sharing its ID with an older task"""
+    if not project_ids:
+        return 0
+    t = _tables(database)
+    placeholders = ", ".join(["%s"] * len(project_ids))
+    rows = _fetch(
+        database,
+        f"""
+        SELECT r.project_id, r.id FROM (
+            SELECT b.project_id, t.id, ROW_NUMBER() OVER (
+                PARTITION BY b.project_id, t.project_task_id ORDER BY t.id
+            ) AS copy
+            FROM {t["task"]} t
+            JOIN {t["column"]} c ON c.id = t.column_id
+            JOIN {t["board"]} b ON b.id = c.board_id
+            WHERE t.project_task_id IS NOT NULL AND b.project_id IN ({placeholders})
+        ) r
+        WHERE r.copy > 1
+        ORDER BY r.project_id, r.id
+        """,
+        project_ids,
+    )
+    copies = defaultdict(list)
+    for project_id, task_id in rows:
+        copies[project_id].append(task_id)
+    tasks = []
+    for project_id, task_ids in copies.items():
+        new_ids = allocate_task_ids(project_id, len(task_ids))
+        for task_id, new_id in zip(task_ids, new_ids, strict=True):
+            # The card shows the ID, a new version re-renders it
+            tasks.append(
+                Task(id=task_id, project_task_id=new_id, version=F("version") + 1)
+            )
+    Task._base_manager.using(database).bulk_update(
+        tasks, ["project_task_id", "version"], batch_size=500
+    )
+    return len(tasks)
+
+
+def repair_boards(database: str, project_id: int | None = None) -> dict[str, int]:
+    """Fixes every violation in the database, or in one of its projects.
+
+    Runs in one transaction on the database, call it with the database's
+    shard selected. Returns the number of rows changed per check.
+    """
+    with transaction.atomic(using=database):
+        violations = check_boards(database, project_id)
+        if not violations:
+            return {}
+        repaired = {
+            "task ID counter": _raise_task_id_counters(database, project_id),
+            "duplicate task IDs": _renumber_duplicate_task_ids(
+                database,
+                [
+                    violation["project_id"]
+                    for violation in violations
+                    if violation["check"] == "duplicate task IDs"
+                ],
+            ),
+            "column order": _renumber(database, "column", project_id),
+            "task order": _renumber(database, "task", project_id),
+        }
+        # Refuse drags based on the old positions and re-render the boards
+        columns = [
+            violation["parent_id"]
+            for violation in violations
+            if violation["check"] == "task order"
+        ]
+        Column._base_manager.using(database).filter(id__in=columns).update(
+            version=F("version") + 1
+        )
+        Board._base_manager.using(database).filter(
+            project_id__in={violation["project_id"] for violation in violations}
+        ).update(version=F("version") + 1, updated_at=timezone.now())
+    return {check: count for check, count in repaired.items() if count}
@@ -0,0 +1,41 @@
+from collections.abc import Iterable
+from django.core.cache import cache
+from .models import Task, User
+from .sharding import select_shards
+
+
+def my_work_cache_key(user_id: int) -> str:
+    return f"my-work:{user_id}"
+
+
+def forget_my_work(user_ids: Iterable[int]) -> None:
+    """Drops the cached dashboards of these users"""
+    cache.delete_many([my_work_cache_key(user_id) for user_id in user_ids])
+
+
+def my_tasks(user: User) -> list[Task]:
+    """The user's unarchived tasks across live projects, done ones included,
+    in one query per shard.
+
+    Sorted by project, column and position, ready for `{% regroup %}`.
+    """
+    tasks = []
+    for _ in select_shards():
+        tasks += (
+            user.assigned_tasks.live()
+            .filter(column__is_deleted=False)
+            .select_related("column__board__project")
+            .with_blocked()
+            .order_by(
+                "column__board__project__name",
+                "column__board__project_id",
+                "column__order",
+                "column_id",
+                "order",
+            )
+        )
+    # Merges the shards, each is in order already
+    tasks.sort(
+        key=lambda task: (task.column.board.project.name, task.column.board.project_id)
+    )
+    return tasks
@@ -0,0 +1,158 @@
+from collections import defaultdict
+from django.db import router, transaction
+from django.db.models import Max, Min
+from .models import Project, Task, TaskDependency
+
+
+class DependencyError(ValueError):
+    """Raised when a dependency cannot be added"""
+
+
+class DependencyCycleError(DependencyError):
+    """Raised when a dependency would make a task (indirectly) block itself"""
+
+
+def _assign_new_ranks(project_id: int, upstream: Task, downstream: Task) -> None:
+    """Gives tasks entering the dependency graph a rank that needs no reordering.
+
+    A task without any dependency can go anywhere in the order, so a new
+    upstream task is put before every ranked task and a new downstream task
+    after them.
+    """
+    if upstream.dependency_rank is not None and downstream.dependency_rank is not None:
+        return
+    bounds = Task.all_objects.filter(column__board__project_id=project_id).aggregate(
+        low=Min("dependency_rank"), high=Max("dependency_rank")
+    )
+    low = bounds["low"] if bounds["low"] is not None else 0
+    high = bounds["high"] if bounds["high"] is not None else 0
+
+    changed = []
+    if upstream.dependency_rank is None:
+        if downstream.dependency_rank is None:
+            upstream.dependency_rank = high + 1
+        else:
+            upstream.dependency_rank = low - 1
+        changed.append(upstream)
+    if downstream.dependency_rank is None:
+        downstream.dependency_rank = max(high, upstream.dependency_rank) + 1
+        changed.append(downstream)
+    Task.all_objects.bulk_update(changed, ["dependency_rank"])
+
+
+def _reorder(project_id: int, upstream: Task, downstream: Task) -> None:
+    """Restores the topological order for a new edge that points backwards in it.
+
+    This is the Pearce-Kelly dynamic topological sort: only the tasks ranked
+    between `downstream` and `upstream` can be affected, so only the edges
+    inside that window are loaded. Tasks reachable from `downstream` and
+    tasks reaching `upstream` within the window swap places, keeping their
+    relative order and reusing the same set of ranks. Reaching `upstream`
+    from `downstream` means the edge would close a cycle.
+    """
+    low, high = downstream.dependency_rank, upstream.dependency_rank
+    edges = TaskDependency.objects.filter(
+        project_id=project_id,
+        upstream__dependency_rank__gte=low,
+        downstream__dependency_rank__lte=high,
+    ).values_list(
+        "upstream_id",
+        "downstream_id",
+        "upstream__dependency_rank",
+        "downstream__dependency_rank",
+    )
+
+    successors: dict[int, list[int]] = defaultdict(list)
+    predecessors: dict[int, list[int]] = defaultdict(list)
+    rank = {upstream.id: high, downstream.id: low}
+    for upstream_id, downstream_id, upstream_rank, downstream_rank in edges:
+        successors[upstream_id].append(downstream_id)
+        predecessors[downstream_id].append(upstream_id)
+        rank[upstream_id] = upstream_rank
+        rank[downstream_id] = downstream_rank
+
+    forward = {downstream.id}
+    stack = [downstream.id]
+    while stack:
+        for task_id in successors[stack.pop()]:
+            if task_id == upstream.id:
+                raise DependencyCycleError(
+                    f"'{upstream}' already depends on '{downstream}'"
+                )
+            if task_id not in forward:
+                forward.add(task_id)
+                stack.append(task_id)
+
+    backward = {upstream.id}
+    stack = [upstream.id]
+    while stack:
+        for task_id in predecessors[stack.pop()]:
+            if task_id not in backward:
+                backward.add(task_id)
+                stack.append(task_id)
+
+    moved = sorted(backward, key=rank.__getitem__) + sorted(
+        forward, key=rank.__getitem__
+    )
+    new_ranks = sorted(rank[task_id] for task_id in moved)
+    changed = [
+        Task(id=task_id, dependency_rank=new_rank)
+        for task_id, new_rank in zip(moved, new_ranks, strict=True)
+        if rank[task_id] != new_rank
+    ]
+    Task.all_objects.bulk_update(changed, ["dependency_rank"])
+
+
+def add_dependency(upstream: Task, downstream: Task) -> TaskDependency:
+    """Makes `downstream` blocked by `upstream`.
+
+    Every project keeps its tasks in a topological order (`dependency_rank`,
+    upstream before downstream), so most new edges are accepted without
+    looking at the graph and the rest only search the part of the order the
+    edge spans. Raises `DependencyCycleError` instead of creating a cycle.
+    """
+    project_id = upstream.column.board.project_id
+    if downstream.column.board.project_id != project_id:
+        raise DependencyError("Tasks can only depend on tasks in the same project")
+    if upstream.id == downstream.id:
+        raise DependencyCycleError("A task cannot depend on itself")
+
+    using = router.db_for_write(TaskDependency)
+    with transaction.atomic(using=using):
+        # Serialises changes to the project's order
+        Project.all_objects.using(using).select_for_update().filter(
+            id=project_id
+        ).first()
+        existing = TaskDependency.objects.filter(
+            upstream=upstream, downstream=downstream
+        ).first()
+        if existing:
+            return existing
+
+        # Ranks may have moved since the tasks were loaded
+        ranks = dict(
+            Task.all_objects.filter(id__in=[upstream.id, downstream.id]).values_list(
+                "id", "dependency_rank"
+            )
+        )
+        upstream.dependency_rank = ranks[upstream.id]
+        downstream.dependency_rank = ranks[downstream.id]
+
+        _assign_new_ranks(project_id, upstream, downstream)
+        if upstream.dependency_rank > downstream.dependency_rank:
+            _reorder(project_id, upstream, downstream)
+
+        return TaskDependency.objects.create(
+            project_id=project_id, upstream=upstream, downstream=downstream
+        )
+
+
+def remove_dependency(upstream_id: int, downstream_id: int) -> bool:
+    """Removes a dependency, returns whether there was one.
+
+    Removing an edge never breaks the topological order, so ranks stay as they are.
+    """
+    deleted, _ = TaskDependency.objects.filter(
+        upstream_id=upstream_id, downstream_id=downstream_id
+    ).delete()
+    return bool(deleted)
@@ -0,0 +1,55 @@
+import threading
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+# Cache alias of the `{% cache %}` fragments in the board templates
+FRAGMENT_CACHE = "fragments"
+
+_MISSING = object()
+_lock = threading.Lock()
+# Hits and misses per cache location, shared by the per-thread cache objects
+_counters: dict[str, dict[str, int]] = {}
+
+
+class CountingLocMemCache(LocMemCache):
+    """A local memory cache that counts its hits and misses.
+
+    Memory stays bounded by `MAX_ENTRIES`, a full cache drops a third of its
+    entries (`CULL_FREQUENCY`) on the next write.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._location = name
+        with _lock:
+            _counters.setdefault(name, {"hits": 0, "misses": 0})
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        outcome = "misses" if value is _MISSING else "hits"
+        with _lock:
+            _counters[self._location][outcome] += 1
+        return default if value is _MISSING else value
+
+    def stats(self) -> dict[str, float]:
+        """Hits, misses and hit rate since the process started or the cache was cleared"""
+        with _lock:
+            counters = dict(_counters[self._location])
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "entries": len(self._cache),
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+        }
+
+    def reset_stats(self) -> None:
+        with _lock:
+            _counters[self._location] = {"hits": 0, "misses": 0}
+
+    def clear(self):
+        super().clear()
+        self.reset_stats()
+
+
+def fragment_cache_stats() -> dict[str, float]:
+    return caches[FRAGMENT_CACHE].stats()
@@ -1,6 +1,7 @@
 import os
 import datetime
 from django.conf import settings
+from .metrics import HISTORY_WRITE_SECONDS
 
 HISTORY_DIR = os.path.join(settings.BASE_DIR, "task_history")
 
@@ -12,12 +13,35 @@ def get_history_file_path(project_id: int) -> str:
 
 def log_task_change(project_id: int, username: str, task_title: str, action: str):
     """Appends a task modifications record to the project's task history file"""
+    log_task_changes(project_id, username, [(task_title, action)])
+
+
+def log_task_changes(
+    project_id: int, username: str, changes: list[tuple[str, str]]
+) -> None:
+    """Appends several (task title, action) records with a single file write"""
     if not os.path.exists(HISTORY_DIR):
         os.makedirs(HISTORY_DIR)
 
     date_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     # Format: date -> username -> subject -> object
-    line = f"{date_str} -> {username} -> {task_title} -> {action}\n"
+    lines = "".join(
+        f"{date_str} -> {username} -> {task_title} -> {action}\n"
+        for task_title, action in changes
+    )
+
+    path = get_history_file_path(project_id)
+    with HISTORY_WRITE_SECONDS.time(), open(path, "a") as f:
+        f.write(lines)
 
-    with open(get_history_file_path(project_id), "a") as f:
-        f.write(line)
+
+def history_file_sizes() -> dict[int, int]:
+    """The size in bytes of each project's task history file"""
+    if not os.path.exists(HISTORY_DIR):
+        return {}
+    sizes = {}
+    for entry in os.scandir(HISTORY_DIR):
+        name = entry.name.removeprefix("project_").removesuffix(".txt")
+        if name.isdigit() and entry.is_file():
+            sizes[int(name)] = entry.stat().st_size
+    return sizes
@@ -0,0 +1,323 @@
+import math
+import sys
+import time
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+from rich.prompt import Prompt, IntPrompt
+from .boards import board_columns, board_version
+from .models import Project, Board, Column, Task
+from .operations import CLI_USERNAME, Operations
+from .sharding import activate_project
+from .task_events import record_task_events
+
+console = Console()
+
+
+def display_projects():
+    projects = Project.objects.all()
+    if not projects.exists():
+        console.print("[yellow]No projects found.[/yellow]")
+        return None
+
+    table = Table(title="Available Projects")
+    table.add_column("ID", justify="right", style="cyan", no_wrap=True)
+    table.add_column("Name", style="magenta")
+
+    for project in projects:
+        table.add_row(str(project.id), project.name)
+
+    console.print(table)
+    return projects
+
+
+def select_project():
+    projects = display_projects()
+    if not projects:
+        return None
+
+    while True:
+        project_id = IntPrompt.ask("Enter the Project ID to select")
+        try:
+            return Project.objects.get(id=project_id)
+        except Project.DoesNotExist:
+            console.print(
+                f"[red]Project with ID {project_id} does not exist. "
+                "Please try again.[/red]"
+            )
+
+
+def get_board(project: Project) -> Board | None:
+    # Everything the board shows lives in the project's shard
+    activate_project(project.id)
+    try:
+        return project.board
+    except Board.DoesNotExist:
+        console.print(f"[yellow]No board found for project '{project.name}'.[/yellow]")
+        return None
+
+
+class BoardView:
+    """The board as last loaded by the CLI.
+
+    Columns, tasks and tags are loaded once with prefetching; after an action
+    only the columns it touched are reloaded.
+    """
+
+    def __init__(
+        self,
+        board: Board,
+        column_names: tuple[str, ...] = (),
+        page_size: int | None = None,
+    ):
+        self.board = board
+        self.column_names = {name.lower() for name in column_names}
+        self.page_size = page_size
+        self.page = 0
+        self.reload()
+
+    def reload(self) -> None:
+        """Reloads the whole board"""
+        self.version = board_version(self.board.id)
+        self.columns = list(board_columns(self.board))
+        self.tasks = {column.id: list(column.tasks.all()) for column in self.columns}
+
+    def refresh_columns(self, *column_ids: int) -> None:
+        """Reloads the tasks of the given columns only"""
+        self.version = board_version(self.board.id)
+        for column in board_columns(self.board).filter(id__in=column_ids):
+            self.tasks[column.id] = list(column.tasks.all())
+
+    @property
+    def visible_columns(self) -> list[Column]:
+        if not self.column_names:
+            return self.columns
+        return [c for c in self.columns if c.name.lower() in self.column_names]
+
+    @property
+    def page_count(self) -> int:
+        if not self.page_size:
+            return 1
+        longest = max((len(self.tasks[c.id]) for c in self.visible_columns), default=0)
+        return max(1, math.ceil(longest / self.page_size))
+
+    def turn_page(self, step: int) -> None:
+        self.page = min(max(self.page + step, 0), self.page_count - 1)
+
+    def render(self) -> Table | str:
+        columns = self.visible_columns
+        if not columns:
+            return f"[yellow]No columns found in board '{self.board.name}'.[/yellow]"
+
+        title = f"Board: {self.board.name}"
+        if self.page_count > 1:
+            title += f" (page {self.page + 1}/{self.page_count})"
+        table = Table(title=title)
+        column_tasks = []
+        for column in columns:
+            tasks = self.tasks[column.id]
+            table.add_column(f"{column.name} ({len(tasks)})")
+            if self.page_size:
+                start = self.page * self.page_size
+                end = start + self.page_size
+                tasks = tasks[start:end]
+            column_tasks.append(tasks)
+
+        # We need to render tasks row by row
+        max_tasks = max(len(tasks) for tasks in column_tasks)
+        for row_idx in range(max_tasks):
+            row_data = []
+            for tasks in column_tasks:
+                if row_idx < len(tasks):
+                    task = tasks[row_idx]
+                    tag_names = ", ".join(t.name for t in task.tags.all())
+                    tags_str = f" [[yellow]{tag_names}[/yellow]]" if tag_names else ""
+                    blocked_str = " [red](blocked)[/red]" if task.is_blocked else ""
+                    task_str = (
+                        f"[cyan]#{task.project_task_id}[/cyan]: {task.title}"
+                        f"{tags_str}{blocked_str}"
+                    )
+                    row_data.append(task_str)
+                else:
+                    row_data.append("")
+            table.add_row(*row_data)
+
+        return table
+
+
+def watch_board(view: BoardView, interval: float) -> None:
+    """Redraws the board whenever its version changes, until interrupted"""
+    with Live(view.render(), console=console, auto_refresh=False) as live:
+        try:
+            while True:
+                time.sleep(interval)
+                if board_version(view.board.id) != view.version:
+                    view.reload()
+                    live.update(view.render(), refresh=True)
+        except KeyboardInterrupt:
+            pass
+
+
+def create_task(view: BoardView, project: Project) -> list[int]:
+    """Prompts for a new task and returns the IDs of the columns it changed"""
+    columns = view.columns
+    if not columns:
+        console.print("[red]Cannot create a task because there are no columns.[/red]")
+        return []
+
+    title = Prompt.ask("Enter task title")
+    description = Prompt.ask("Enter task description (optional)", default="")
+
+    tags = list(project.tags.all())
+    selected_tags = []
+    if tags:
+        console.print("Available Tags:")
+        for idx, tag in enumerate(tags, start=1):
+            console.print(f"{idx}. {tag.name}")
+
+        tag_choices = Prompt.ask(
+            "Enter tag numbers to assign (comma-separated), or leave blank", default=""
+        )
+        if tag_choices:
+            for part in tag_choices.split(","):
+                part = part.strip()
+                if part.isdigit():
+                    t_idx = int(part)
+                    if 1 <= t_idx <= len(tags):
+                        selected_tags.append(tags[t_idx - 1])
+
+    console.print("Available Columns:")
+    for idx, col in enumerate(columns, start=1):
+        console.print(f"{idx}. {col.name}")
+
+    while True:
+        col_choice = IntPrompt.ask("Select column number")
+        if 1 <= col_choice <= len(columns):
+            selected_column = columns[col_choice - 1]
+            break
+        console.print("[red]Invalid selection.[/red]")
+
+    with record_task_events(CLI_USERNAME) as events:
+        Operations(events).create_in(
+            project.id, selected_column, title, description, selected_tags
+        )
+
+    console.print(f"[green]Task '{title}' created successfully![/green]")
+    return [selected_column.id]
+
+
+def change_task_status(view: BoardView) -> list[int]:
+    """Prompts for a task move and returns the IDs of the columns it changed"""
+    board = view.board
+    columns = view.columns
+    if not columns:
+        console.print("[red]No columns available.[/red]")
+        return []
+
+    project_task_id = IntPrompt.ask("Enter the Task ID (project local ID) to move")
+
+    try:
+        # Need to find the task by project_task_id within this board's columns
+        task = Task.objects.select_related("column").get(
+            column__board=board, project_task_id=project_task_id
+        )
+    except Task.DoesNotExist:
+        console.print(f"[red]Task #{project_task_id} not found on this board.[/red]")
+        return []
+
+    console.print(f"Moving Task: [cyan]#{task.project_task_id}[/cyan]: {task.title}")
+    console.print(f"Current Column: [magenta]{task.column.name}[/magenta]")
+
+    console.print("Available Columns:")
+    for idx, col in enumerate(columns, start=1):
+        console.print(f"{idx}. {col.name}")
+
+    while True:
+        col_choice = IntPrompt.ask("Select new column number")
+        if 1 <= col_choice <= len(columns):
+            new_column = columns[col_choice - 1]
+            break
+        console.print("[red]Invalid selection.[/red]")
+
+    if task.column == new_column:
+        console.print("[yellow]Task is already in that column.[/yellow]")
+        return []
+
+    old_column = task.column
+    with record_task_events(CLI_USERNAME) as events:
+        Operations(events).move_to(board.project_id, task, new_column)
+    console.print("[green]Task moved successfully![/green]")
+    return [old_column.id, new_column.id]
+
+
+def run(
+    project_id: int | None,
+    column_names: tuple[str, ...],
+    page_size: int | None,
+    watch: bool,
+    interval: float,
+) -> None:
+    """Runs the interactive board until the user quits"""
+    console.print("[bold cyan]Welcome to the Kanban CLI[/bold cyan] 📋")
+
+    project = Project.objects.filter(id=project_id).first() if project_id else None
+    if project is None:
+        project = select_project()
+    if not project:
+        sys.exit(0)
+
+    board = get_board(project)
+    if not board:
+        console.print("[red]Board missing. Exiting...[/red]")
+        sys.exit(1)
+    view = BoardView(board, column_names, page_size)
+
+    if watch:
+        watch_board(view, interval)
+        sys.exit(0)
+
+    while True:
+        console.print(view.render())
+
+        console.print("\n[bold]Options:[/bold]")
+        console.print("1. Create Task")
+        console.print("2. Move Task (Change Status)")
+        console.print("3. Switch Project")
+        console.print("4. Quit")
+        console.print("5. Reload Board")
+        choices = ["1", "2", "3", "4", "5"]
+        if view.page_count > 1:
+            console.print("n. Next Page")
+            console.print("p. Previous Page")
+            choices += ["n", "p"]
+
+        choice = Prompt.ask(
+            "Choose an action",
+            choices=choices,
+            show_choices=False,
+        )
+
+        console.print("\n")
+
+        if choice == "1":
+            view.refresh_columns(*create_task(view, project))
+        elif choice == "2":
+            view.refresh_columns(*change_task_status(view))
+        elif choice == "3":
+            project = select_project()
+            if not project:
+                sys.exit(0)
+            board = get_board(project)
+            if not board:
+                console.print("[red]Board missing. Exiting...[/red]")
+                sys.exit(1)
+            view = BoardView(board, column_names, page_size)
+        elif choice == "4":
+            console.print("Goodbye! 👋")
+            sys.exit(0)
+        elif choice == "5":
+            view.reload()
+        elif choice == "n":
+            view.turn_page(1)
+        elif choice == "p":
+            view.turn_page(-1)
@@ -0,0 +1,191 @@
+import datetime
+import logging
+import os
+import socket
+import traceback
+from collections.abc import Callable
+from contextlib import nullcontext
+from django.db.models import F
+from django.utils import timezone
+from .archive import archive_stale_tasks
+from .models import Column, Job, Task
+from .retention import delete_tasks_in_batches, purge_project
+from .sharding import use_project
+from .task_events import record_task_events
+
+logger = logging.getLogger(__name__)
+
+# A failed attempt is retried after RETRY_DELAY, doubled for every further attempt
+RETRY_DELAY = datetime.timedelta(seconds=30)
+# A running job whose worker has not finished it by then is assumed dead
+STALE_AFTER = datetime.timedelta(minutes=30)
+
+JobHandler = Callable[..., None]
+handlers: dict[str, JobHandler] = {}
+
+
+def register(name: str) -> Callable[[JobHandler], JobHandler]:
+    """Registers a job handler, called as `handler(job, **job.params)`
+
+    Jobs with a `project_id` param run with the project's shard selected.
+    """
+
+    def decorator(handler: JobHandler) -> JobHandler:
+        handlers[name] = handler
+        return handler
+
+    return decorator
+
+
+def enqueue(name: str, max_attempts: int = 3, **params) -> Job:
+    """Queues a job; call it inside the transaction that makes the job necessary"""
+    if name not in handlers:
+        raise ValueError(f"Unknown job '{name}'")
+    return Job.objects.create(name=name, params=params, max_attempts=max_attempts)
+
+
+def set_progress(job: Job, progress: int, total: int | None = None) -> None:
+    """Records how far a running job has got, visible to the jobs endpoint and the admin"""
+    job.progress = progress
+    updates = {"progress": progress}
+    if total is not None:
+        job.total = total
+        updates["total"] = total
+    Job.objects.filter(id=job.id).update(**updates)
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_job(worker: str) -> Job | None:
+    """Marks the next due job as running for this worker and returns it.
+
+    The claim is a conditional UPDATE, so two workers racing for the same job
+    cannot both get it, on any database and without row locks.
+    """
+    while True:
+        now = timezone.now()
+        job_id = (
+            Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=now)
+            .order_by("run_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        claimed = Job.objects.filter(id=job_id, status=Job.Status.QUEUED).update(
+            status=Job.Status.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+
+
+def run_job(job: Job) -> None:
+    """Runs a claimed job and records the outcome, scheduling a retry on failure"""
+    project_id = job.params.get("project_id")
+    try:
+        handler = handlers[job.name]
+        with nullcontext() if project_id is None else use_project(project_id):
+            handler(job, **job.params)
+    except Exception:
+        logger.exception("Job %s failed (attempt %s)", job, job.attempts)
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.Status.QUEUED
+            job.run_at = timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1)
+        else:
+            job.status = Job.Status.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = Job.Status.SUCCEEDED
+        job.error = ""
+        job.finished_at = timezone.now()
+
+    job.locked_by = ""
+    job.locked_at = None
+    job.save(
+        update_fields=[
+            "status",
+            "error",
+            "run_at",
+            "finished_at",
+            "locked_by",
+            "locked_at",
+        ]
+    )
+
+
+def requeue_stale_jobs(stale_after: datetime.timedelta = STALE_AFTER) -> int:
+    """Puts back jobs whose worker died, or fails them if they are out of attempts"""
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING, locked_at__lt=timezone.now() - stale_after
+    )
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED,
+        error="The worker running this job stopped responding.",
+        finished_at=timezone.now(),
+    )
+    return stale.update(status=Job.Status.QUEUED, locked_by="", locked_at=None)
+
+
+def run_pending_jobs(worker: str | None = None, limit: int | None = None) -> int:
+    """Runs due jobs until there are none left (or `limit` ran), returns how many ran"""
+    worker = worker or worker_name()
+    count = 0
+    while limit is None or count < limit:
+        job = claim_job(worker)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+# --- Handlers ---
+
+
+@register("delete_column")
+def delete_column(
+    job: Job,
+    column_id: int,
+    username: str,
+    project_id: int | None = None,
+    batch_size: int = 500,
+):
+    """Deletes a column hidden by `delete_column` in the API, with its tasks"""
+    # Still shown if the request that queued the job rolled back, with
+    # sharding the job is not in the transaction of the shard
+    column = (
+        Column.all_objects.select_related("board")
+        .filter(id=column_id, is_deleted=True)
+        .first()
+    )
+    if column is None:
+        return
+
+    tasks = Task.all_objects.filter(column_id=column_id)
+    set_progress(job, 0, tasks.count())
+    delete_tasks_in_batches(
+        tasks, batch_size, on_batch=lambda deleted: set_progress(job, deleted)
+    )
+
+    with record_task_events(username) as events:
+        # Only history rows are left, `on_delete=SET_NULL` keeps them
+        column.delete()
+        events.touch(column.board.project_id)
+
+
+@register("purge_project")
+def purge_project_job(job: Job, project_id: int, batch_size: int = 500):
+    purge_project(project_id, batch_size)
+
+
+@register("archive_stale_tasks")
+def archive_stale_tasks_job(
+    job: Job, days: int, project_id: int | None = None, batch_size: int = 500
+):
+    set_progress(job, archive_stale_tasks(days, batch_size, project_id))
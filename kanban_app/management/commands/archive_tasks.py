@@ -0,0 +1,57 @@
+import djclick as click
+from rich.console import Console
+from kanban_app.archive import archivable_tasks, archive_stale_tasks
+from kanban_app.jobs import enqueue
+from kanban_app.sharding import select_shards
+
+console = Console()
+
+
+@click.command()
+@click.option(
+    "--days",
+    type=int,
+    default=14,
+    show_default=True,
+    help="Archive tasks that have been in a done column for longer than this.",
+)
+@click.option(
+    "--batch-size",
+    type=int,
+    default=500,
+    show_default=True,
+    help="Number of tasks archived per transaction.",
+)
+@click.option(
+    "--project", "project_id", type=int, default=None, help="Only archive this project."
+)
+@click.option(
+    "--dry-run", is_flag=True, help="Only report how many tasks would be archived."
+)
+@click.option(
+    "--background", is_flag=True, help="Queue a job for the run_jobs worker instead."
+)
+def command(
+    days: int, batch_size: int, project_id: int | None, dry_run: bool, background: bool
+):
+    """Archive tasks that have been sitting in a done column for too long."""
+    if dry_run:
+        count = sum(
+            archivable_tasks(days, project_id).count()
+            for _ in select_shards(project_id)
+        )
+        console.print(f"[yellow]{count} task(s) would be archived.[/yellow]")
+        return
+
+    if background:
+        job = enqueue(
+            "archive_stale_tasks",
+            days=days,
+            project_id=project_id,
+            batch_size=batch_size,
+        )
+        console.print(f"[green]Queued job {job.id}.[/green]")
+        return
+
+    count = archive_stale_tasks(days, batch_size=batch_size, project_id=project_id)
+    console.print(f"[green]Archived {count} task(s).[/green]")
@@ -0,0 +1,49 @@
+import djclick as click
+from rich.console import Console
+from django.core.management import CommandError
+from kanban_app.consistency import check_boards, repair_boards
+from kanban_app.sharding import select_shards
+
+console = Console()
+
+
+@click.command()
+@click.option(
+    "--project", "project_id", type=int, default=None, help="Only check this project."
+)
+@click.option(
+    "--repair", is_flag=True, help="Fix what is found, in one transaction per database."
+)
+def command(project_id: int | None, repair: bool):
+    """Check the column and task order and the task IDs of every board.
+
+    Reports columns and tasks not numbered 0, 1, 2, ..., task ID counters
+    behind the IDs in use and task IDs given to several tasks. With
+    --repair, renumbers them and gives the duplicates new IDs. Exits with
+    an error when problems other than gaps in the order are left.
+    """
+    found = 0
+    gaps = 0
+    for database in select_shards(project_id):
+        violations = check_boards(database, project_id)
+        for violation in violations:
+            color = "yellow" if violation.get("gaps_only") else "red"
+            console.print(
+                f"[{color}]Project {violation['project_id']}[/{color}] "
+                f"{violation['check']}: {violation['detail']}"
+            )
+        found += sum(not violation.get("gaps_only") for violation in violations)
+        gaps += sum(bool(violation.get("gaps_only")) for violation in violations)
+        if repair and violations:
+            repaired = repair_boards(database, project_id)
+            summary = ", ".join(
+                f"{check} ({count} rows)" for check, count in repaired.items()
+            )
+            console.print(f"[green]{database}: repaired {summary}.[/green]")
+
+    if not found and not gaps:
+        console.print("[green]No problems found.[/green]")
+    elif not found:
+        console.print(f"[yellow]Only gaps found, in {gaps} place(s).[/yellow]")
+    elif not repair:
+        raise CommandError(f"{found} problem(s) found, run with --repair to fix them.")
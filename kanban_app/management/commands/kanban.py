@@ -1,229 +1,284 @@
 import djclick as click
-from rich.console import Console
-from rich.table import Table
-from rich.prompt import Prompt, IntPrompt
-from kanban_app.models import Project, Board, Task
-import sys
-
-console = Console()
-
-
-def display_projects():
-    projects = Project.objects.all()
-    if not projects.exists():
-        console.print("[yellow]No projects found.[/yellow]")
-        return None
-
-    table = Table(title="Available Projects")
-    table.add_column("ID", justify="right", style="cyan", no_wrap=True)
-    table.add_column("Name", style="magenta")
-
-    for project in projects:
-        table.add_row(str(project.id), project.name)
-
-    console.print(table)
-    return projects
-
-
-def select_project():
-    projects = display_projects()
-    if not projects:
-        return None
-
-    while True:
-        project_id = IntPrompt.ask("Enter the Project ID to select")
-        try:
-            return Project.objects.get(id=project_id)
-        except Project.DoesNotExist:
-            console.print(
-                f"[red]Project with ID {project_id} does not exist. "
-                "Please try again.[/red]"
-            )
-
-
-def display_board(project: Project):
+from django.core.management import CommandError
+from kanban_app.models import Project, Column
+from kanban_app.operations import (
+    CLI_USERNAME,
+    OperationError,
+    Operations,
+    serializable_tasks,
+    task_to_dict,
+)
+from kanban_app.sharding import CrossShardError, use_project, use_projects
+from kanban_app.task_events import record_task_events
+import json
+
+
+def echo_json(data) -> None:
+    click.echo(json.dumps(data))
+
+
+def apply_operations(operations: list[dict]) -> list[dict]:
+    """Applies scripted operations in one transaction and returns the tasks as dicts"""
+    project_ids = {
+        operation["project_id"]
+        for operation in operations
+        if isinstance(operation.get("project_id"), int)
+    }
     try:
-        board = project.board
-    except Board.DoesNotExist:
-        console.print(f"[yellow]No board found for project '{project.name}'.[/yellow]")
-        return None
-
-    if not board:
-        console.print(f"[yellow]No board found for project '{project.name}'.[/yellow]")
-        return None
-
-    table = Table(title=f"Board: {board.name}")
-    columns = list(board.columns.all())
-
-    if not columns:
-        console.print(f"[yellow]No columns found in board '{board.name}'.[/yellow]")
-        return board
-
-    for column in columns:
-        table.add_column(column.name)
-
-    # We need to render tasks row by row
-    # Determine the maximum number of tasks in any column
-    max_tasks = 0
-    column_tasks = []
-    for column in columns:
-        tasks = list(column.tasks.all())
-        column_tasks.append(tasks)
-        max_tasks = max(max_tasks, len(tasks))
-
-    for row_idx in range(max_tasks):
-        row_data = []
-        for col_idx in range(len(columns)):
-            tasks = column_tasks[col_idx]
-            if row_idx < len(tasks):
-                task = tasks[row_idx]
-                tag_names = ", ".join(t.name for t in task.tags.all())
-                tags_str = f" [[yellow]{tag_names}[/yellow]]" if tag_names else ""
-                task_str = (
-                    f"[cyan]#{task.project_task_id}[/cyan]: {task.title}{tags_str}"
-                )
-                row_data.append(task_str)
-            else:
-                row_data.append("")
-        table.add_row(*row_data)
-
-    console.print(table)
-    return board
-
-
-def create_task(board: Board, project: Project):
-    columns = list(board.columns.all())
-    if not columns:
-        console.print("[red]Cannot create a task because there are no columns.[/red]")
+        with use_projects(project_ids):
+            with record_task_events(CLI_USERNAME) as events:
+                tasks = Operations(events).apply_all(operations)
+
+            # Reload everything the output needs in a few queries, not a few per task
+            loaded = serializable_tasks().in_bulk([task.id for task in tasks])
+    except (OperationError, CrossShardError) as exc:
+        raise CommandError(str(exc)) from exc
+    return [task_to_dict(loaded[task.id]) for task in tasks]
+
+
+project_option = click.option(
+    "--project", "project_id", type=int, required=True, help="The project ID."
+)
+task_option = click.option(
+    "--task",
+    "project_task_id",
+    type=int,
+    required=True,
+    help="The task ID within the project.",
+)
+
+
+@click.group(invoke_without_command=True)
+@click.pass_context
+@click.option(
+    "--project",
+    "project_id",
+    type=int,
+    default=None,
+    help="Open this project directly.",
+)
+@click.option(
+    "--column",
+    "column_names",
+    multiple=True,
+    help="Only show columns with this name (repeatable).",
+)
+@click.option(
+    "--page-size",
+    type=int,
+    default=None,
+    help="Show at most this many tasks per column.",
+)
+@click.option(
+    "--watch", is_flag=True, help="Keep redrawing the board whenever it changes."
+)
+@click.option(
+    "--interval",
+    type=float,
+    default=2.0,
+    show_default=True,
+    help="Seconds between change checks in --watch mode.",
+)
+def command(
+    ctx: click.Context,
+    project_id: int | None,
+    column_names: tuple[str, ...],
+    page_size: int | None,
+    watch: bool,
+    interval: float,
+):
+    """Manage Kanban boards using a rich interactive CLI.
+
+    Run without a subcommand for the interactive board, or use one of the
+    subcommands below to script changes with JSON output.
+    """
+    if ctx.invoked_subcommand is not None:
         return
 
-    title = Prompt.ask("Enter task title")
-    description = Prompt.ask("Enter task description (optional)", default="")
-
-    tags = list(project.tags.all())
-    selected_tags = []
-    if tags:
-        console.print("Available Tags:")
-        for idx, tag in enumerate(tags, start=1):
-            console.print(f"{idx}. {tag.name}")
-
-        tag_choices = Prompt.ask(
-            "Enter tag numbers to assign (comma-separated), or leave blank", default=""
+    # rich is only imported for the interactive board, not the JSON subcommands
+    from kanban_app.interactive_cli import run
+
+    run(project_id, column_names, page_size, watch, interval)
+
+
+@command.command("list")
+@project_option
+@click.option(
+    "--column",
+    "column_names",
+    multiple=True,
+    help="Only list tasks in the column with this name (repeatable).",
+)
+def list_tasks(project_id: int, column_names: tuple[str, ...]):
+    """List the tasks of a project as JSON."""
+    if not Project.objects.filter(id=project_id).exists():
+        raise CommandError(f"Project {project_id} does not exist")
+    with use_project(project_id):
+        tasks = serializable_tasks().filter(column__board__project_id=project_id)
+        for name in column_names:
+            tasks = tasks.filter(column__name__iexact=name)
+        echo_json(
+            [task_to_dict(task) for task in tasks.order_by("column__order", "order")]
         )
-        if tag_choices:
-            for part in tag_choices.split(","):
-                part = part.strip()
-                if part.isdigit():
-                    t_idx = int(part)
-                    if 1 <= t_idx <= len(tags):
-                        selected_tags.append(tags[t_idx - 1])
-
-    console.print("Available Columns:")
-    for idx, col in enumerate(columns, start=1):
-        console.print(f"{idx}. {col.name}")
-
-    while True:
-        col_choice = IntPrompt.ask("Select column number")
-        if 1 <= col_choice <= len(columns):
-            selected_column = columns[col_choice - 1]
-            break
-        console.print("[red]Invalid selection.[/red]")
-
-    # Assuming project provides project_task_id
-    project_task_id = project.next_task_id
-    project.next_task_id += 1
-    project.save(update_fields=["next_task_id"])
-
-    task = Task.objects.create(
-        column=selected_column,
-        title=title,
-        description=description,
-        project_task_id=project_task_id,
-        # Put it at the end of the column
-        order=selected_column.tasks.count(),
-    )
-    if selected_tags:
-        task.tags.set(selected_tags)
 
-    console.print(f"[green]Task '{title}' created successfully![/green]")
 
-
-def change_task_status(board: Board):
-    columns = list(board.columns.all())
-    if not columns:
-        console.print("[red]No columns available.[/red]")
-        return
-
-    project_task_id = IntPrompt.ask("Enter the Task ID (project local ID) to move")
-
-    try:
-        # Need to find the task by project_task_id within this board's columns
-        task = Task.objects.get(column__board=board, project_task_id=project_task_id)
-    except Task.DoesNotExist:
-        console.print(f"[red]Task #{project_task_id} not found on this board.[/red]")
-        return
-
-    console.print(f"Moving Task: [cyan]#{task.project_task_id}[/cyan]: {task.title}")
-    console.print(f"Current Column: [magenta]{task.column.name}[/magenta]")
-
-    console.print("Available Columns:")
-    for idx, col in enumerate(columns, start=1):
-        console.print(f"{idx}. {col.name}")
-
-    while True:
-        col_choice = IntPrompt.ask("Select new column number")
-        if 1 <= col_choice <= len(columns):
-            new_column = columns[col_choice - 1]
-            break
-        console.print("[red]Invalid selection.[/red]")
-
-    if task.column == new_column:
-        console.print("[yellow]Task is already in that column.[/yellow]")
-        return
-
-    task.column = new_column
-    task.order = new_column.tasks.count()  # append to the end
-    task.save()
-    console.print("[green]Task moved successfully![/green]")
-
-
-@click.command()
-def command():
-    """Manage Kanban boards using a rich interactive CLI."""
-    console.print("[bold cyan]Welcome to the Kanban CLI[/bold cyan] 📋")
-
-    project = select_project()
-    if not project:
-        sys.exit(0)
-
-    while True:
-        board = display_board(project)
-        if not board:
-            console.print("[red]Board missing. Exiting...[/red]")
-            sys.exit(1)
-
-        console.print("\n[bold]Options:[/bold]")
-        console.print("1. Create Task")
-        console.print("2. Move Task (Change Status)")
-        console.print("3. Switch Project")
-        console.print("4. Quit")
-
-        choice = Prompt.ask(
-            "Choose an action",
-            choices=["1", "2", "3", "4"],
-            show_choices=False,
+@command.command("create")
+@project_option
+@click.option("--title", required=True, help="The task title.")
+@click.option("--column", required=True, help="The name of the column to add to.")
+@click.option("--description", default="", help="The task description.")
+@click.option("--tag", "tags", multiple=True, help="A tag name (repeatable).")
+@click.option("--assign", "assigned_to", default=None, help="Assign to this user.")
+def create(
+    project_id: int,
+    title: str,
+    column: str,
+    description: str,
+    tags: tuple[str, ...],
+    assigned_to: str | None,
+):
+    """Create a task and print it as JSON."""
+    (task,) = apply_operations(
+        [
+            {
+                "op": "create",
+                "project_id": project_id,
+                "title": title,
+                "column": column,
+                "description": description,
+                "tags": tags,
+                "assigned_to": assigned_to,
+            }
+        ]
+    )
+    echo_json(task)
+
+
+@command.command("move")
+@project_option
+@task_option
+@click.option("--column", required=True, help="The name of the column to move to.")
+def move(project_id: int, project_task_id: int, column: str):
+    """Move a task to the end of another column and print it as JSON."""
+    (task,) = apply_operations(
+        [
+            {
+                "op": "move",
+                "project_id": project_id,
+                "project_task_id": project_task_id,
+                "column": column,
+            }
+        ]
+    )
+    echo_json(task)
+
+
+@command.command("assign")
+@project_option
+@task_option
+@click.option("--user", "username", default=None, help="Leave out to unassign.")
+def assign(project_id: int, project_task_id: int, username: str | None):
+    """Assign a task to a user and print it as JSON."""
+    (task,) = apply_operations(
+        [
+            {
+                "op": "assign",
+                "project_id": project_id,
+                "project_task_id": project_task_id,
+                "username": username,
+            }
+        ]
+    )
+    echo_json(task)
+
+
+@command.command("tag")
+@project_option
+@task_option
+@click.option("--add", multiple=True, help="A tag name to add (repeatable).")
+@click.option("--remove", multiple=True, help="A tag name to remove (repeatable).")
+def tag(
+    project_id: int,
+    project_task_id: int,
+    add: tuple[str, ...],
+    remove: tuple[str, ...],
+):
+    """Add or remove tags on a task and print it as JSON."""
+    (task,) = apply_operations(
+        [
+            {
+                "op": "tag",
+                "project_id": project_id,
+                "project_task_id": project_task_id,
+                "add": add,
+                "remove": remove,
+            }
+        ]
+    )
+    echo_json(task)
+
+
+@command.command("export")
+@project_option
+def export(project_id: int):
+    """Print a project with its columns, tags and tasks as JSON."""
+    project = Project.objects.filter(id=project_id).first()
+    if project is None:
+        raise CommandError(f"Project {project_id} does not exist")
+    with use_project(project_id):
+        columns = Column.objects.filter(board__project_id=project_id)
+        tasks = serializable_tasks().filter(column__board__project_id=project_id)
+        echo_json(
+            {
+                "id": project.id,
+                "name": project.name,
+                "columns": [
+                    {"name": c.name, "order": c.order, "is_terminal": c.is_terminal}
+                    for c in columns
+                ],
+                "tags": [
+                    {"name": t.name, "color": t.color}
+                    for t in project.tags.order_by("name")
+                ],
+                "tasks": [
+                    task_to_dict(task)
+                    for task in tasks.order_by("column__order", "order")
+                ],
+            }
         )
 
-        console.print("\n")
-
-        if choice == "1":
-            create_task(board, project)
-        elif choice == "2":
-            change_task_status(board)
-        elif choice == "3":
-            project = select_project()
-            if not project:
-                sys.exit(0)
-        elif choice == "4":
-            console.print("Goodbye! 👋")
-            sys.exit(0)
+
+@command.command("batch")
+@click.argument("source", type=click.File("r"), default="-")
+@click.option(
+    "--project",
+    "project_id",
+    type=int,
+    default=None,
+    help="Project ID for operations that do not name one.",
+)
+def batch(source, project_id: int | None):
+    """Apply JSON-lines operations from SOURCE (default stdin) in one transaction.
+
+    Each line is an object with an "op" of create, move, assign or tag and
+    the same fields as the matching subcommand, for example
+    {"op": "move", "project_id": 1, "project_task_id": 4, "column": "Done"}.
+    Nothing is changed if any line fails. Prints each resulting task as a
+    JSON line.
+    """
+    operations = []
+    for number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            operation = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise CommandError(f"Line {number}: invalid JSON ({exc})") from exc
+        if not isinstance(operation, dict):
+            raise CommandError(f"Line {number}: expected a JSON object")
+        if project_id is not None:
+            operation.setdefault("project_id", project_id)
+        operations.append(operation)
+
+    for task in apply_operations(operations):
+        echo_json(task)
@@ -0,0 +1,49 @@
+import djclick as click
+from rich.console import Console
+from django.db import transaction
+from kanban_app.jobs import enqueue
+from kanban_app.retention import purge_deleted_projects, purgeable_projects
+
+console = Console()
+
+
+@click.command()
+@click.option(
+    "--grace-days",
+    type=int,
+    default=30,
+    show_default=True,
+    help="Only purge projects deleted longer ago than this.",
+)
+@click.option(
+    "--batch-size",
+    type=int,
+    default=500,
+    show_default=True,
+    help="Number of tasks deleted per transaction.",
+)
+@click.option(
+    "--dry-run", is_flag=True, help="Only list the projects that would be purged."
+)
+@click.option(
+    "--background",
+    is_flag=True,
+    help="Queue one job per project for the run_jobs worker instead.",
+)
+def command(grace_days: int, batch_size: int, dry_run: bool, background: bool):
+    """Hard-delete soft-deleted projects once their grace period has expired."""
+    if dry_run:
+        for project in purgeable_projects(grace_days):
+            console.print(f"Would purge project {project.id}: {project.name}")
+        return
+
+    if background:
+        project_ids = list(purgeable_projects(grace_days).values_list("id", flat=True))
+        with transaction.atomic():
+            for project_id in project_ids:
+                enqueue("purge_project", project_id=project_id, batch_size=batch_size)
+        console.print(f"[green]Queued {len(project_ids)} project purge(s).[/green]")
+        return
+
+    project_ids = purge_deleted_projects(grace_days, batch_size=batch_size)
+    console.print(f"[green]Purged {len(project_ids)} project(s).[/green]")
@@ -0,0 +1,25 @@
+import djclick as click
+from rich.console import Console
+from kanban_app.models import Project
+from kanban_app.sharding import select_shards
+from kanban_app.stats import refresh_project_stats
+
+console = Console()
+
+
+@click.command()
+@click.option(
+    "--project", "project_id", type=int, default=None, help="Only recount this project."
+)
+def command(project_id: int | None):
+    """Recount the task statistics shown in the project list."""
+    recounted = 0
+    for database in select_shards(project_id):
+        # With sharding, the projects mirrored into the shard
+        projects = Project.objects.using(database)
+        if project_id is not None:
+            projects = projects.filter(id=project_id)
+        project_ids = list(projects.values_list("id", flat=True))
+        refresh_project_stats(project_ids)
+        recounted += len(project_ids)
+    console.print(f"[green]Recounted {recounted} project(s).[/green]")
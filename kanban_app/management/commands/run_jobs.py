@@ -0,0 +1,38 @@
+import time
+import djclick as click
+from rich.console import Console
+from kanban_app.jobs import requeue_stale_jobs, run_pending_jobs, worker_name
+
+console = Console()
+
+
+@click.command()
+@click.option("--once", is_flag=True, help="Run the jobs that are due, then exit.")
+@click.option(
+    "--interval",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="Seconds to wait before polling again when the queue is empty.",
+)
+@click.option(
+    "--worker",
+    default=None,
+    help="Name recorded on claimed jobs. Defaults to host:pid.",
+)
+def command(once: bool, interval: float, worker: str | None):
+    """Run queued background jobs, such as column deletions and project purges."""
+    worker = worker or worker_name()
+    console.print(f"[bold cyan]Job worker {worker} started[/bold cyan]")
+    try:
+        while True:
+            requeue_stale_jobs()
+            count = run_pending_jobs(worker)
+            if count:
+                console.print(f"Ran {count} job(s).")
+            if once:
+                break
+            if not count:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        console.print("Worker stopped.")
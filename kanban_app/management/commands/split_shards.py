@@ -0,0 +1,126 @@
+import djclick as click
+from rich.console import Console
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django.db.models.functions import Mod
+from django.db.models.query import QuerySet
+from kanban_app.models import (
+    Board,
+    Column,
+    Project,
+    ProjectStats,
+    SavedFilter,
+    Tag,
+    Task,
+    TaskAssignmentHistory,
+    TaskDependency,
+    TaskStatusHistory,
+)
+from kanban_app.sharding import shard_aliases, shard_index, sharding_enabled
+
+console = Console()
+
+# Copied in this order, so the parents of every row are in the shard first.
+# A row goes to the shard of the project any of its lookups leads to.
+PROJECT_LOOKUPS = [
+    (Project, ["id"]),
+    (Board, ["project_id"]),
+    (ProjectStats, ["project_id"]),
+    (Tag, ["project_id"]),
+    (Column, ["board__project_id"]),
+    (Task, ["column__board__project_id"]),
+    (Task.tags.through, ["task__column__board__project_id"]),
+    (TaskDependency, ["project_id"]),
+    (SavedFilter, ["board__project_id"]),
+    # The history of deleted tasks is found through its columns
+    (
+        TaskStatusHistory,
+        [
+            "task__column__board__project_id",
+            "new_column__board__project_id",
+            "old_column__board__project_id",
+        ],
+    ),
+    (TaskAssignmentHistory, ["task__column__board__project_id"]),
+]
+
+
+def copy_rows(rows: QuerySet, database: str, batch_size: int) -> int:
+    """Copies rows from the default database as stored, keeping rows already there.
+
+    The values go over as SQLite stores them, so IDs, timestamps and JSON
+    are copied exactly, `auto_now` fields included. Returns the number of
+    rows inserted, rows already there are not counted.
+    """
+    model = rows.model
+    fields = model._meta.concrete_fields
+    target = connections[database]
+    table = target.ops.quote_name(model._meta.db_table)
+    columns = ", ".join(target.ops.quote_name(field.column) for field in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+    insert = f"INSERT OR IGNORE INTO {table} ({columns}) VALUES ({placeholders})"
+
+    select, params = (
+        rows.order_by("pk")
+        .values_list(*[field.attname for field in fields])
+        .query.sql_with_params()
+    )
+    copied = 0
+    with (
+        connections[DEFAULT_DB_ALIAS].cursor() as source,
+        target.cursor() as cursor,
+    ):
+        source.execute(select, params)
+        while batch := source.fetchmany(batch_size):
+            cursor.executemany(insert, batch)
+            # What `OR IGNORE` skipped is not in the count
+            copied += cursor.rowcount
+    return copied
+
+
+@click.command()
+@click.option(
+    "--batch-size",
+    type=int,
+    default=1000,
+    show_default=True,
+    help="Number of rows copied per statement.",
+)
+def command(batch_size: int):
+    """Copy the projects of the default database into their shards.
+
+    Migrates every shard, copies all users into each of them, then each
+    project's board, columns, tasks, tags, filters, counts and history into
+    the shard of the project. Rows already in a shard are left as they are,
+    so running it again only copies what is missing. The default database
+    keeps its copy: without KANBAN_SHARDS the app uses it as before.
+    """
+    if not sharding_enabled():
+        raise CommandError("Set KANBAN_SHARDS to the number of shards to split into.")
+
+    users = get_user_model()._base_manager.using(DEFAULT_DB_ALIAS)
+    projects = Project.all_objects.using(DEFAULT_DB_ALIAS)
+    for database in shard_aliases():
+        call_command("migrate", database=database, verbosity=0)
+
+        # The projects of this shard, as a subquery
+        project_ids = (
+            projects.alias(shard=Mod("id", len(shard_aliases())))
+            .filter(shard=shard_index(database))
+            .values("id")
+        )
+        with transaction.atomic(using=database):
+            copied = {"users": copy_rows(users.all(), database, batch_size)}
+            for model, lookups in PROJECT_LOOKUPS:
+                condition = Q()
+                for lookup in lookups:
+                    condition |= Q(**{f"{lookup}__in": project_ids})
+                rows = model._base_manager.using(DEFAULT_DB_ALIAS).filter(condition)
+                copied[model._meta.verbose_name_plural] = copy_rows(
+                    rows, database, batch_size
+                )
+
+        summary = ", ".join(f"{count} {name}" for name, count in copied.items())
+        console.print(f"[green]{database}:[/green] {summary}")
@@ -0,0 +1,338 @@
+"""
+Operational metrics in the Prometheus text format, served at `/metrics`.
+
+Counters and histograms are kept in the memory of each process. With
+`KANBAN_METRICS_DIR` set, each process also writes its values to a file of
+its own in that directory, at most once a second after a request and when
+it exits, and `/metrics` adds up the files of every process. Files of
+processes that have exited still count, so counters never go back; empty
+the directory when the server is restarted. Without `KANBAN_METRICS_DIR`,
+`/metrics` reports the process that serves it.
+
+Cache hits and misses are read from the counting caches and the history
+file sizes from `task_history/` when the metrics are written or scraped.
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Self
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError, connections
+from .fragment_cache import CountingLocMemCache
+
+# Seconds between two writes of a process's metrics file
+FLUSH_SECONDS = 1.0
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 50, 100)
+
+Labels = tuple[tuple[str, str], ...]
+
+_lock = threading.Lock()
+# (metric name, labels) -> counter value, or the histogram's count per
+# bucket followed by the sum and count of the observations
+_values: dict[tuple[str, Labels], float | list[float]] = {}
+_flushed_at = 0.0
+_file: Path | None = None
+_file_pid: int | None = None
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        METRICS[name] = self
+
+
+METRICS: dict[str, Metric] = {}
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = (self.name, _labels(labels))
+        with _lock:
+            _values[key] = _values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value read when the metrics are scraped, never stored"""
+
+    kind = "gauge"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple[float, ...]):
+        super().__init__(name, documentation)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels) -> None:
+        key = (self.name, _labels(labels))
+        # The first bucket the value fits in, one past the last for +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            counts = _values.get(key)
+            if counts is None:
+                counts = _values[key] = [0] * (len(self.buckets) + 3)
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - began, **labels)
+
+
+TASK_EVENTS = Counter(
+    "kanban_task_events_total",
+    "Committed task changes, by event (created, moved, assigned, deleted, ...)",
+)
+REQUEST_SECONDS = Histogram(
+    "kanban_request_duration_seconds",
+    "Time to respond, by route and method. The board renders are the "
+    "project/<int:project_id>/ and api/boards/<board_id>/columns routes.",
+    LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "kanban_request_queries", "SQL statements per request, by route", QUERY_BUCKETS
+)
+HISTORY_WRITE_SECONDS = Histogram(
+    "kanban_history_write_seconds",
+    "Time to append to a task history file",
+    LATENCY_BUCKETS,
+)
+HISTORY_FILE_BYTES = Gauge(
+    "kanban_history_file_bytes", "Size of each project's task history file"
+)
+CACHE_REQUESTS = Counter(
+    "kanban_cache_requests_total", "Cache lookups, by cache and result (hit, miss)"
+)
+DB_LOCK_WAIT_SECONDS = Histogram(
+    "kanban_db_lock_wait_seconds",
+    "Time waiting for a database's write lock (BEGIN IMMEDIATE), by database",
+    LATENCY_BUCKETS,
+)
+DB_LOCKED = Counter(
+    "kanban_db_locked_total",
+    "Statements that failed because the database stayed locked past its "
+    "timeout, by database",
+)
+
+
+def count_task_events(events: dict[str, int]) -> None:
+    for event, count in events.items():
+        TASK_EVENTS.inc(count, event=event)
+
+
+class QueryCounter:
+    """Counts the statements run in a block, on every database.
+
+    Times the waits for write locks and counts the statements that gave up
+    waiting. SQLite retries a locked database itself until the connection's
+    `timeout`, so a wait shows up as a slow `BEGIN IMMEDIATE` and only a
+    wait past the timeout as an error.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def _count(self, execute, sql, params, many, context):
+        self.count += 1
+        alias = context["connection"].alias
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as exc:
+            if "locked" in str(exc):
+                DB_LOCKED.inc(db=alias)
+            raise
+        finally:
+            if sql.startswith("BEGIN IMMEDIATE"):
+                DB_LOCK_WAIT_SECONDS.observe(time.perf_counter() - began, db=alias)
+
+    def __enter__(self) -> Self:
+        self._exit_stack = ExitStack()
+        for connection in connections.all():
+            self._exit_stack.enter_context(connection.execute_wrapper(self._count))
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self._exit_stack.close()
+        return False
+
+
+class MetricsMiddleware:
+    """Records the latency and the statements of every request, by route"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        began = time.perf_counter()
+        with QueryCounter() as queries:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - began
+        match = request.resolver_match
+        # URL patterns, not paths, so the number of routes stays bounded
+        route = match.route if match is not None else "<unmatched>"
+        REQUEST_SECONDS.observe(elapsed, route=route, method=request.method)
+        REQUEST_QUERIES.observe(queries.count, route=route)
+        flush()
+        return response
+
+
+# --- Collection ---
+
+
+def _cache_samples() -> dict[tuple[str, Labels], float]:
+    samples = {}
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if isinstance(cache, CountingLocMemCache):
+            stats = cache.stats()
+            for result, count in (("hit", stats["hits"]), ("miss", stats["misses"])):
+                key = (CACHE_REQUESTS.name, _labels({"cache": alias, "result": result}))
+                samples[key] = count
+    return samples
+
+
+def process_samples() -> dict[tuple[str, Labels], float | list[float]]:
+    """The metrics of this process"""
+    with _lock:
+        samples = {
+            key: list(value) if isinstance(value, list) else value
+            for key, value in _values.items()
+        }
+    samples.update(_cache_samples())
+    return samples
+
+
+def flush(force: bool = False) -> None:
+    """Writes this process's metrics to its file in `KANBAN_METRICS_DIR`"""
+    global _file, _file_pid, _flushed_at
+    directory = settings.KANBAN_METRICS_DIR
+    now = time.monotonic()
+    if not directory or (not force and now - _flushed_at < FLUSH_SECONDS):
+        return
+    _flushed_at = now
+    with _lock:
+        if not _values:
+            # Nothing recorded, such as a management command that only read
+            return
+    if _file_pid != os.getpid() or _file.parent != Path(directory):
+        # A forked worker gets a file of its own, process IDs are reused
+        _file_pid = os.getpid()
+        _file = Path(directory) / f"{_file_pid}-{time.time_ns()}.json"
+    rows = [
+        [name, [list(label) for label in labels], value]
+        for (name, labels), value in process_samples().items()
+    ]
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    # One per thread, two requests can end at the same time
+    temporary = _file.with_suffix(f".{threading.get_ident()}.tmp")
+    temporary.write_text(json.dumps(rows))
+    # Readers see the old file or the new one, never half of one
+    os.replace(temporary, _file)
+
+
+atexit.register(flush, force=True)
+
+
+def collect() -> dict[tuple[str, Labels], float | list[float]]:
+    """The metrics of every process writing to `KANBAN_METRICS_DIR`"""
+    directory = settings.KANBAN_METRICS_DIR
+    if not directory:
+        return process_samples()
+    flush(force=True)
+    totals: dict[tuple[str, Labels], float | list[float]] = {}
+    for path in Path(directory).glob("*.json"):
+        try:
+            rows = json.loads(path.read_text())
+        except FileNotFoundError:
+            # Replaced while listing
+            continue
+        for name, labels, value in rows:
+            key = (name, tuple(tuple(label) for label in labels))
+            total = totals.get(key)
+            if total is None:
+                totals[key] = value
+            elif isinstance(value, list):
+                totals[key] = [a + b for a, b in zip(total, value, strict=True)]
+            else:
+                totals[key] = total + value
+    return totals
+
+
+def _history_samples() -> dict[tuple[str, Labels], float]:
+    from .history_logger import history_file_sizes
+
+    return {
+        (HISTORY_FILE_BYTES.name, _labels({"project": project_id})): size
+        for project_id, size in history_file_sizes().items()
+    }
+
+
+# --- Exposition ---
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _sample(name: str, labels: Labels, value: float) -> str:
+    if labels:
+        text = ",".join(f'{label}="{_escape(text)}"' for label, text in labels)
+        name = f"{name}{{{text}}}"
+    return f"{name} {value}"
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    samples = collect()
+    samples.update(_history_samples())
+    by_metric: dict[str, list[tuple[Labels, float | list[float]]]] = {}
+    for (name, labels), value in sorted(samples.items()):
+        by_metric.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for metric in METRICS.values():
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for labels, value in by_metric.get(metric.name, []):
+            if not isinstance(metric, Histogram):
+                lines.append(_sample(metric.name, labels, value))
+                continue
+            cumulative = 0
+            for bound, count in zip((*metric.buckets, "+Inf"), value[:-2], strict=True):
+                cumulative += count
+                bucket = (*labels, ("le", str(bound)))
+                lines.append(_sample(f"{metric.name}_bucket", bucket, cumulative))
+            lines.append(_sample(f"{metric.name}_sum", labels, value[-2]))
+            lines.append(_sample(f"{metric.name}_count", labels, value[-1]))
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Forgets this process's counters and histograms"""
+    with _lock:
+        _values.clear()
@@ -0,0 +1,47 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_done_columns_terminal(apps, schema_editor):
+    Column = apps.get_model("kanban_app", "Column")
+    db = schema_editor.connection.alias
+    Column.objects.using(db).filter(name__iexact="done").update(is_terminal=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kanban_app", "0008_taskassignmenthistory"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="column",
+            name="is_terminal",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("archived_at__isnull", True)),
+                fields=["column", "order"],
+                name="task_active_column_order",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("archived_at__isnull", False)),
+                fields=["archived_at"],
+                name="task_archived_at",
+            ),
+        ),
+        migrations.RunPython(mark_done_columns_terminal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:33
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_deleted_at(apps, schema_editor):
+    Project = apps.get_model("kanban_app", "Project")
+    db = schema_editor.connection.alias
+    Project.objects.using(db).filter(is_deleted=True).update(deleted_at=F("updated_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kanban_app", "0009_task_archiving"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["id"],
+                name="project_active",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                condition=models.Q(("is_deleted", True)),
+                fields=["deleted_at"],
+                name="project_deleted_at",
+            ),
+        ),
+        migrations.RunPython(backfill_deleted_at, migrations.RunPython.noop),
+    ]
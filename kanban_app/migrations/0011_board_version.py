@@ -0,0 +1,17 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kanban_app", "0010_project_deleted_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="board",
+            name="version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
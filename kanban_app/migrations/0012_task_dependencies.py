@@ -0,0 +1,70 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kanban_app", "0011_board_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="dependency_rank",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="TaskDependency",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "downstream",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upstream_links",
+                        to="kanban_app.task",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="task_dependencies",
+                        to="kanban_app.project",
+                    ),
+                ),
+                (
+                    "upstream",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="downstream_links",
+                        to="kanban_app.task",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("upstream", "downstream"), name="task_dependency_unique"
+                    ),
+                    models.CheckConstraint(
+                        condition=models.Q(
+                            ("upstream", models.F("downstream")), _negated=True
+                        ),
+                        name="task_dependency_not_self",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kanban_app", "0014_background_jobs"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="taskstatushistory",
+            name="new_column",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="kanban_app.column",
+            ),
+        ),
+    ]
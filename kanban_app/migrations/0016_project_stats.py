@@ -0,0 +1,56 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_project_stats(apps, schema_editor):
+    Project = apps.get_model("kanban_app", "Project")
+    ProjectStats = apps.get_model("kanban_app", "ProjectStats")
+    live_tasks = Q(
+        board__columns__tasks__archived_at__isnull=True,
+        board__columns__is_deleted=False,
+    )
+    db = schema_editor.connection.alias
+    projects = Project.objects.using(db).annotate(
+        total=Count("board__columns__tasks", filter=live_tasks),
+        done=Count(
+            "board__columns__tasks",
+            filter=live_tasks & Q(board__columns__is_terminal=True),
+        ),
+    )
+    ProjectStats.objects.using(db).bulk_create(
+        ProjectStats(project=project, task_count=project.total, done_count=project.done)
+        for project in projects
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kanban_app", "0015_keep_history_of_deleted_columns"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectStats",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="kanban_app.project",
+                    ),
+                ),
+                ("task_count", models.IntegerField(default=0)),
+                ("done_count", models.IntegerField(default=0)),
+            ],
+            options={
+                "verbose_name_plural": "project stats",
+            },
+        ),
+        migrations.RunPython(backfill_project_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kanban_app", "0016_project_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="column",
+            name="version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
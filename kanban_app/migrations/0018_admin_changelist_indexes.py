@@ -0,0 +1,30 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kanban_app", "0017_versions"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["created_at", "id"], name="job_created_at"),
+        ),
+        migrations.AddIndex(
+            model_name="taskassignmenthistory",
+            index=models.Index(
+                fields=["changed_at", "id"], name="assignment_history_changed_at"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="taskstatushistory",
+            index=models.Index(
+                fields=["changed_at", "id"], name="status_history_changed_at"
+            ),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+
+MEMBER = 20
+OWNER = 30
+
+
+def backfill_memberships(apps, schema_editor):
+    """Gives the users working on each project access to it.
+
+    Everyone who is or was assigned a task of a project becomes a member of
+    it, staff users become owners of every project. Other users see no
+    project until an owner adds them in the admin.
+    """
+    db = schema_editor.connection.alias
+    if db != DEFAULT_DB_ALIAS:
+        # Memberships are only read from the catalog, not from the shards
+        return
+    Project = apps.get_model("kanban_app", "Project")
+    ProjectMembership = apps.get_model("kanban_app", "ProjectMembership")
+    Task = apps.get_model("kanban_app", "Task")
+    TaskAssignmentHistory = apps.get_model("kanban_app", "TaskAssignmentHistory")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    roles = {}
+    assignees = Task.objects.using(db).filter(assigned_to__isnull=False)
+    for pair in assignees.values_list("column__board__project_id", "assigned_to_id"):
+        roles[pair] = MEMBER
+    past_assignees = TaskAssignmentHistory.objects.using(db).filter(
+        new_assignee__isnull=False
+    )
+    for pair in past_assignees.values_list(
+        "task__column__board__project_id", "new_assignee_id"
+    ):
+        roles[pair] = MEMBER
+    staff = list(
+        User.objects.using(db).filter(is_staff=True).values_list("id", flat=True)
+    )
+    for project_id in Project.objects.using(db).values_list("id", flat=True):
+        for user_id in staff:
+            roles[project_id, user_id] = OWNER
+
+    ProjectMembership.objects.using(db).bulk_create(
+        (
+            ProjectMembership(project_id=project_id, user_id=user_id, role=role)
+            for (project_id, user_id), role in roles.items()
+            # Boards without a project
+            if project_id is not None
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kanban_app", "0018_admin_changelist_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectMembership",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "role",
+                    models.PositiveSmallIntegerField(
+                        choices=[(10, "Viewer"), (20, "Member"), (30, "Owner")],
+                        default=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="memberships",
+                        to="kanban_app.project",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="project_memberships",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("project", "user"), name="project_membership_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_memberships, migrations.RunPython.noop),
+    ]
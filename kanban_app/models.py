@@ -1,7 +1,9 @@
-from typing import Any
+from typing import Any, Self
 from django.db import models
+from django.db.models import Exists, F, OuterRef, Q
 from django.db.models.query import QuerySet
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -11,18 +13,85 @@ class ActiveProjectManager(models.Manager):
         return super().get_queryset().filter(is_deleted=False)
 
 
+class ProjectScopedQuerySet(models.QuerySet):
+    """QuerySet for rows that belong to a project, which may be soft-deleted"""
+
+    project_lookup = "project"
+
+    def live(self) -> Self:
+        """Excludes rows whose project has been soft-deleted"""
+        return self.exclude(**{f"{self.project_lookup}__is_deleted": True})
+
+
+class BoardQuerySet(ProjectScopedQuerySet):
+    project_lookup = "project"
+
+
+class ColumnQuerySet(ProjectScopedQuerySet):
+    project_lookup = "board__project"
+
+
+class TaskQuerySet(ProjectScopedQuerySet):
+    project_lookup = "column__board__project"
+
+    def with_blocked(self) -> Self:
+        """Annotates `is_blocked`: whether any upstream task is still open.
+
+        An upstream task is done once it sits in a terminal column or has been
+        archived. This is one correlated subquery in the same SELECT, so the
+        board can highlight blocked cards without a query per card.
+        """
+        open_upstream = TaskDependency.objects.filter(
+            downstream=OuterRef("pk"),
+            upstream__archived_at__isnull=True,
+            upstream__column__is_terminal=False,
+        )
+        return self.annotate(is_blocked=Exists(open_upstream))
+
+
+class TagQuerySet(ProjectScopedQuerySet):
+    project_lookup = "project"
+
+
+class ActiveColumnManager(models.Manager.from_queryset(ColumnQuerySet)):
+    def get_queryset(self) -> QuerySet:
+        return super().get_queryset().filter(is_deleted=False)
+
+
+class ActiveTaskManager(models.Manager.from_queryset(TaskQuerySet)):
+    def get_queryset(self) -> QuerySet:
+        return super().get_queryset().filter(archived_at__isnull=True)
+
+
 class Project(models.Model):
     name = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)
     next_task_id = models.IntegerField(default=1)
 
     objects = ActiveProjectManager()
     all_objects = models.Manager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=Q(is_deleted=False),
+                name="project_active",
+            ),
+            models.Index(
+                fields=["deleted_at"],
+                condition=Q(is_deleted=True),
+                name="project_deleted_at",
+            ),
+        ]
+
     def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        # Soft delete, the rows are hard-purged later by `purge_projects`
         self.is_deleted = True
+        self.deleted_at = timezone.now()
         self.save()
         return (1, {self._meta.label: 1})
 
@@ -30,11 +99,69 @@ class Project(models.Model):
         return self.name
 
 
+class ProjectMembership(models.Model):
+    """A user's access to a project, checked by `kanban_app.permissions`"""
+
+    class Role(models.IntegerChoices):
+        # Sees the board
+        VIEWER = 10
+        # Changes the board
+        MEMBER = 20
+        # Also deletes the project and its history
+        OWNER = 30
+
+    project = models.ForeignKey(
+        Project, related_name="memberships", on_delete=models.CASCADE
+    )
+    user = models.ForeignKey(
+        User, related_name="project_memberships", on_delete=models.CASCADE
+    )
+    role = models.PositiveSmallIntegerField(choices=Role.choices, default=Role.MEMBER)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "user"], name="project_membership_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} in {self.project} ({self.get_role_display()})"
+
+
+class ProjectStats(models.Model):
+    """Live task counts of a project, for the project list.
+
+    Kept up to date by the task event recorder, see `kanban_app.stats`.
+    Tasks that are archived or sit in a deleted column are not counted.
+    """
+
+    project = models.OneToOneField(
+        Project, primary_key=True, related_name="stats", on_delete=models.CASCADE
+    )
+    task_count = models.IntegerField(default=0)
+    # Tasks in a terminal column
+    done_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "project stats"
+
+    @property
+    def open_count(self) -> int:
+        return self.task_count - self.done_count
+
+    def __str__(self) -> str:
+        return f"{self.project_id}: {self.done_count}/{self.task_count} done"
+
+
 class Tag(models.Model):
     project = models.ForeignKey(Project, related_name="tags", on_delete=models.CASCADE)
     name = models.CharField(max_length=50)
     color = models.CharField(max_length=20, default="#3b82f6")
 
+    objects = TagQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.project.name} - {self.name}"
 
@@ -44,9 +171,13 @@ class Board(models.Model):
         Project, related_name="board", on_delete=models.CASCADE, null=True, blank=True
     )
     name = models.CharField(max_length=255)
+    # Bumped once per request or command that changes the board's content
+    version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BoardQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
@@ -55,9 +186,20 @@ class Column(models.Model):
     board = models.ForeignKey(Board, related_name="columns", on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
     order = models.IntegerField(default=0)
+    # Tasks sitting in a terminal ("done") column are candidates for archiving
+    is_terminal = models.BooleanField(default=False)
+    # Set while a background job deletes the column's tasks, see `kanban_app.jobs`
+    is_deleted = models.BooleanField(default=False)
+    # Bumped whenever a task is dragged into, out of or within the column, so
+    # a drop based on a stale task order is refused (see `kanban_app.versions`)
+    version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Columns being deleted are hidden from the board (and from `board.columns`)
+    objects = ActiveColumnManager()
+    all_objects = models.Manager.from_queryset(ColumnQuerySet)()
+
     class Meta:
         ordering = ["order"]
 
@@ -79,16 +221,105 @@ class Task(models.Model):
     )
     order = models.IntegerField(default=0)
     project_task_id = models.IntegerField(null=True, blank=True)
+    # Position in the project's dependency order, unique per project among
+    # tasks that have ever had a dependency (see `kanban_app.dependencies`)
+    dependency_rank = models.IntegerField(null=True, blank=True)
+    archived_at = models.DateTimeField(null=True, blank=True)
+    # Bumped whenever the title, description or column changes, so an edit
+    # based on a stale copy is refused (see `kanban_app.versions`)
+    version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Archived tasks are hidden from the board (and from `column.tasks`) but
+    # stay reachable through `all_objects` for searching and restoring.
+    objects = ActiveTaskManager()
+    all_objects = models.Manager.from_queryset(TaskQuerySet)()
+
     class Meta:
         ordering = ["order"]
+        indexes = [
+            models.Index(
+                fields=["column", "order"],
+                condition=Q(archived_at__isnull=True),
+                name="task_active_column_order",
+            ),
+            models.Index(
+                fields=["archived_at"],
+                condition=Q(archived_at__isnull=False),
+                name="task_archived_at",
+            ),
+            # Board filters by assignee and by last update
+            models.Index(
+                fields=["assigned_to", "column"],
+                condition=Q(archived_at__isnull=True),
+                name="task_active_assignee",
+            ),
+            models.Index(
+                fields=["column", "updated_at"],
+                condition=Q(archived_at__isnull=True),
+                name="task_active_updated_at",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class TaskDependency(models.Model):
+    """`downstream` is blocked until `upstream` is done"""
+
+    project = models.ForeignKey(
+        Project, related_name="task_dependencies", on_delete=models.CASCADE
+    )
+    upstream = models.ForeignKey(
+        Task, related_name="downstream_links", on_delete=models.CASCADE
+    )
+    downstream = models.ForeignKey(
+        Task, related_name="upstream_links", on_delete=models.CASCADE
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["upstream", "downstream"], name="task_dependency_unique"
+            ),
+            models.CheckConstraint(
+                condition=~Q(upstream=F("downstream")),
+                name="task_dependency_not_self",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.upstream} blocks {self.downstream}"
+
+
+class SavedFilter(models.Model):
+    """A named set of board filter parameters saved by a user"""
+
+    user = models.ForeignKey(
+        User, related_name="saved_filters", on_delete=models.CASCADE
+    )
+    board = models.ForeignKey(
+        Board, related_name="saved_filters", on_delete=models.CASCADE
+    )
+    name = models.CharField(max_length=100)
+    params = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "board", "name"], name="saved_filter_unique_name"
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
 class TaskStatusHistory(models.Model):
     task = models.ForeignKey(
         Task, related_name="status_history", on_delete=models.CASCADE
@@ -96,14 +327,23 @@ class TaskStatusHistory(models.Model):
     old_column = models.ForeignKey(
         Column, related_name="+", on_delete=models.SET_NULL, null=True, blank=True
     )
-    new_column = models.ForeignKey(Column, related_name="+", on_delete=models.CASCADE)
+    # Kept when the column is deleted, so a task's history survives the
+    # columns it passed through
+    new_column = models.ForeignKey(
+        Column, related_name="+", on_delete=models.SET_NULL, null=True, blank=True
+    )
     changed_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-changed_at"]
+        # Pages of the admin changelist and its date drill-down
+        indexes = [
+            models.Index(fields=["changed_at", "id"], name="status_history_changed_at"),
+        ]
 
     def __str__(self):
-        return f"{self.task.title} moved to {self.new_column.name} at {self.changed_at}"
+        column_name = self.new_column.name if self.new_column else "a deleted column"
+        return f"{self.task.title} moved to {column_name} at {self.changed_at}"
 
 
 class TaskAssignmentHistory(models.Model):
@@ -120,6 +360,95 @@ class TaskAssignmentHistory(models.Model):
 
     class Meta:
         ordering = ["-changed_at"]
+        indexes = [
+            models.Index(
+                fields=["changed_at", "id"], name="assignment_history_changed_at"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.task.title} assigned from {self.old_assignee} to {self.new_assignee} at {self.changed_at}"
+
+
+class Job(models.Model):
+    """A unit of background work, run by the `run_jobs` worker"""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    name = models.CharField(max_length=100)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.QUEUED
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # Not picked up before this time, pushed back after a failed attempt
+    run_at = models.DateTimeField(default=timezone.now)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["run_at", "id"],
+                condition=Q(status="queued"),
+                name="job_queued_run_at",
+            ),
+            models.Index(fields=["created_at", "id"], name="job_created_at"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+
+class RequestProfile(models.Model):
+    """A profiled request, recorded by `kanban_app.profiling`"""
+
+    class Trigger(models.TextChoices):
+        # Asked for by a staff user
+        HEADER = "header"
+        QUERY = "query"
+        # One of `KANBAN_PROFILE_SAMPLE_RATE` requests
+        SAMPLE = "sample"
+
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    user = models.ForeignKey(
+        User, related_name="+", null=True, blank=True, on_delete=models.SET_NULL
+    )
+    trigger = models.CharField(max_length=10, choices=Trigger.choices)
+    duration_ms = models.FloatField()
+    sql_count = models.PositiveIntegerField(default=0)
+    sql_ms = models.FloatField(default=0)
+    template_ms = models.FloatField(default=0)
+    # {"frames": [[name, file, line], ...], "stacks": [[[frame, ...], seconds], ...]},
+    # outermost frame first
+    samples = models.JSONField(default=dict)
+    # [{"sql", "db", "count", "ms"}, ...], slowest first
+    queries = models.JSONField(default=list)
+    # [{"name", "count", "ms"}, ...], slowest first
+    templates = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"], name="request_profile_created_at"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,276 @@
+import inspect
+from collections.abc import Iterable
+from typing import Any
+from django.db.models import F, Max, Prefetch
+from django.db.models.query import QuerySet
+from .models import Column, Project, Tag, Task, User
+from .task_events import TaskEventRecorder
+from .task_ids import allocate_task_ids
+
+# Name recorded in the task history for changes made through the CLI
+CLI_USERNAME = "CLI"
+
+
+class OperationError(ValueError):
+    """Raised when a scripted operation refers to something that does not exist"""
+
+
+def task_to_dict(task: Task) -> dict[str, Any]:
+    """The JSON shape of a task in the CLI output"""
+    return {
+        "id": task.id,
+        "project_task_id": task.project_task_id,
+        "title": task.title,
+        "description": task.description,
+        "column": task.column.name,
+        "order": task.order,
+        "assigned_to": task.assigned_to.username if task.assigned_to else None,
+        "tags": [tag.name for tag in task.tags.all()],
+        "blocked": task.is_blocked,
+        "created_at": task.created_at.isoformat(),
+        "updated_at": task.updated_at.isoformat(),
+    }
+
+
+def serializable_tasks() -> QuerySet:
+    """Live tasks of live columns with everything `task_to_dict` reads loaded
+    up front"""
+    return (
+        Task.objects.filter(column__is_deleted=False)
+        .select_related("column", "assigned_to")
+        .with_blocked()
+        .prefetch_related(Prefetch("tags", queryset=Tag.objects.order_by("name")))
+    )
+
+
+class Operations:
+    """Applies task changes addressed by name, as the CLI subcommands get them.
+
+    Projects are looked up by ID, columns and tags by name, users by username
+    and tasks by their project task ID. Every lookup is cached for the life of
+    the instance, so a batch touching the same board a thousand times only
+    loads its columns and tags once. All changes go through one recorder,
+    so they share its transaction.
+    """
+
+    def __init__(self, events: TaskEventRecorder):
+        self.events = events
+        self._projects: dict[int, Project] = {}
+        self._columns: dict[int, dict[str, Column]] = {}
+        self._tags: dict[int, dict[str, Tag]] = {}
+        self._users: dict[str, User] = {}
+        self._tasks: dict[tuple[int, int], Task] = {}
+        self._next_order: dict[int, int] = {}
+        self._reserved_ids: dict[int, list[int]] = {}
+
+    def project(self, project_id: int) -> Project:
+        if project_id not in self._projects:
+            project = Project.objects.filter(id=project_id).first()
+            if project is None:
+                raise OperationError(f"Project {project_id} does not exist")
+            self._projects[project_id] = project
+        return self._projects[project_id]
+
+    def column(self, project_id: int, name: str) -> Column:
+        if project_id not in self._columns:
+            self.project(project_id)
+            columns = Column.objects.filter(board__project_id=project_id)
+            self._columns[project_id] = {c.name.lower(): c for c in columns}
+        column = self._columns[project_id].get(name.lower())
+        if column is None:
+            raise OperationError(
+                f"Column '{name}' does not exist in project {project_id}"
+            )
+        return column
+
+    def tags(self, project_id: int, names: Iterable[str]) -> list[Tag]:
+        if project_id not in self._tags:
+            tags = Tag.objects.filter(project_id=project_id)
+            self._tags[project_id] = {t.name.lower(): t for t in tags}
+        tags = []
+        for name in names:
+            tag = self._tags[project_id].get(name.lower())
+            if tag is None:
+                raise OperationError(
+                    f"Tag '{name}' does not exist in project {project_id}"
+                )
+            tags.append(tag)
+        return tags
+
+    def user(self, username: str) -> User:
+        if username not in self._users:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise OperationError(f"User '{username}' does not exist")
+            self._users[username] = user
+        return self._users[username]
+
+    def task(self, project_id: int, project_task_id: int) -> Task:
+        key = (project_id, project_task_id)
+        if key not in self._tasks:
+            task = (
+                Task.objects.filter(
+                    column__board__project_id=project_id,
+                    project_task_id=project_task_id,
+                )
+                .select_related("column", "assigned_to")
+                .first()
+            )
+            if task is None:
+                raise OperationError(
+                    f"Task #{project_task_id} does not exist in project {project_id}"
+                )
+            self._tasks[key] = task
+        return self._tasks[key]
+
+    def reserve_task_ids(self, project_id: int, count: int) -> None:
+        """Allocates `count` project task IDs up front for the creates to come"""
+        self.project(project_id)
+        self._reserved_ids.setdefault(project_id, []).extend(
+            allocate_task_ids(project_id, count)
+        )
+
+    def _take_task_id(self, project_id: int) -> int:
+        reserved = self._reserved_ids.get(project_id)
+        if reserved:
+            return reserved.pop(0)
+        (project_task_id,) = allocate_task_ids(project_id)
+        return project_task_id
+
+    def _append_order(self, column: Column) -> int:
+        """The next free position at the end of the column"""
+        if column.id not in self._next_order:
+            last = column.tasks.aggregate(last=Max("order"))["last"]
+            self._next_order[column.id] = -1 if last is None else last
+        self._next_order[column.id] += 1
+        return self._next_order[column.id]
+
+    def create(
+        self,
+        project_id: int,
+        title: str,
+        column: str,
+        description: str = "",
+        tags: Iterable[str] = (),
+        assigned_to: str | None = None,
+    ) -> Task:
+        return self.create_in(
+            project_id,
+            self.column(project_id, column),
+            title,
+            description,
+            self.tags(project_id, tags),
+            self.user(assigned_to) if assigned_to else None,
+        )
+
+    def create_in(
+        self,
+        project_id: int,
+        target: Column,
+        title: str,
+        description: str = "",
+        tags: Iterable[Tag] = (),
+        assignee: User | None = None,
+    ) -> Task:
+        """Adds a task at the end of a column already looked up"""
+        task = Task.objects.create(
+            column=target,
+            title=title,
+            description=description,
+            assigned_to=assignee,
+            project_task_id=self._take_task_id(project_id),
+            order=self._append_order(target),
+        )
+        if tags:
+            task.tags.set(tags)
+        self._tasks[(project_id, task.project_task_id)] = task
+        self.events.created(project_id, task, target)
+        if assignee:
+            self.events.assigned(project_id, task, None, assignee)
+        return task
+
+    def move(self, project_id: int, project_task_id: int, column: str) -> Task:
+        return self.move_to(
+            project_id,
+            self.task(project_id, project_task_id),
+            self.column(project_id, column),
+        )
+
+    def move_to(self, project_id: int, task: Task, target: Column) -> Task:
+        """Moves a task already looked up to the end of `target`"""
+        if task.column_id == target.id:
+            return task
+        old_column = task.column
+        task.column = target
+        task.order = self._append_order(target)
+        task.version = F("version") + 1
+        task.save(update_fields=["column", "order", "version", "updated_at"])
+        self.events.moved(project_id, task, old_column, target)
+        self.events.touch_columns(old_column.id, target.id)
+        return task
+
+    def assign(
+        self, project_id: int, project_task_id: int, username: str | None
+    ) -> Task:
+        task = self.task(project_id, project_task_id)
+        assignee = self.user(username) if username else None
+        old_assignee_id = task.assigned_to_id
+        if old_assignee_id == (assignee.id if assignee else None):
+            return task
+        task.assigned_to = assignee
+        task.save(update_fields=["assigned_to", "updated_at"])
+        self.events.assigned(project_id, task, old_assignee_id, assignee)
+        return task
+
+    def tag(
+        self,
+        project_id: int,
+        project_task_id: int,
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+    ) -> Task:
+        task = self.task(project_id, project_task_id)
+        added = self.tags(project_id, add)
+        removed = self.tags(project_id, remove)
+        if added:
+            task.tags.add(*added)
+        if removed:
+            task.tags.remove(*removed)
+        if added or removed:
+            self.events.log(project_id, task.title, "Tags updated")
+        return task
+
+    def apply(self, operation: dict[str, Any]) -> Task:
+        """Applies one operation given as a dict, as read from a JSON line"""
+        operation = dict(operation)
+        name = operation.pop("op", None)
+        handler = {
+            "create": self.create,
+            "move": self.move,
+            "assign": self.assign,
+            "tag": self.tag,
+        }.get(name)
+        if handler is None:
+            raise OperationError(f"Unknown operation '{name}'")
+        try:
+            inspect.signature(handler).bind(**operation)
+        except TypeError as exc:
+            raise OperationError(f"Invalid arguments for '{name}': {exc}") from exc
+        return handler(**operation)
+
+    def apply_all(self, operations: list[dict[str, Any]]) -> list[Task]:
+        """Applies operations in order, reserving task IDs for all creates at once"""
+        creates: dict[int, int] = {}
+        for operation in operations:
+            if operation.get("op") == "create" and "project_id" in operation:
+                project_id = operation["project_id"]
+                creates[project_id] = creates.get(project_id, 0) + 1
+        for project_id, count in creates.items():
+            self.reserve_task_ids(project_id, count)
+        tasks = []
+        for number, operation in enumerate(operations, start=1):
+            try:
+                tasks.append(self.apply(operation))
+            except OperationError as exc:
+                raise OperationError(f"Operation {number}: {exc}") from exc
+        return tasks
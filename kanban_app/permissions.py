@@ -0,0 +1,124 @@
+"""
+Project access.
+
+A `ProjectMembership` gives a user a role in a project. Every API endpoint
+sits behind `ProjectAuth` (in `kanban_app.api`): it needs a logged-in user
+and, for an endpoint about one project, a role high enough for the request.
+The project is found from the URL (`project_id`, `board_id`, `task_id`,
+...), before the endpoint runs.
+
+A user's role in a project is resolved once per request and cached for a
+few minutes, a membership saved or deleted drops it from the cache. The
+project a board, column, task, tag or saved filter belongs to never
+changes, so it is cached for as long as the cache keeps it. Once warm, the
+check costs no query.
+"""
+
+from django.contrib.auth.models import AbstractBaseUser
+from django.core.cache import cache
+from django.db.models import Model
+from django.db.models.query import QuerySet
+from .models import Board, Column, Job, ProjectMembership, SavedFilter, Tag, Task, User
+
+Role = ProjectMembership.Role
+
+ROLE_CACHE_SECONDS = 300
+PROJECT_OF_CACHE_SECONDS = 24 * 60 * 60
+
+# The URL arguments naming a row of a project, in the order they are looked
+# for, with the path from that row to its project
+PROJECT_PATHS: dict[str, tuple[type[Model], str]] = {
+    "board_id": (Board, "project_id"),
+    "column_id": (Column, "board__project_id"),
+    "task_id": (Task, "column__board__project_id"),
+    "tag_id": (Tag, "project_id"),
+    "filter_id": (SavedFilter, "board__project_id"),
+    "job_id": (Job, "params__project_id"),
+}
+
+
+def role_cache_key(user_id: int, project_id: int) -> str:
+    return f"project-role:{user_id}:{project_id}"
+
+
+def project_of_cache_key(argument: str, value: int) -> str:
+    return f"project-of:{argument}:{value}"
+
+
+def user_role(user_id: int, project_id: int) -> int:
+    """The user's role in the project, 0 for none"""
+    key = role_cache_key(user_id, project_id)
+    role = cache.get(key)
+    if role is None:
+        role = (
+            ProjectMembership.objects.filter(user_id=user_id, project_id=project_id)
+            .values_list("role", flat=True)
+            .first()
+        ) or 0
+        cache.set(key, role, ROLE_CACHE_SECONDS)
+    return role
+
+
+def request_role(request, project_id: int) -> int:
+    """The role of the request's user in the project, looked up once per request.
+
+    Superusers own every project.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return 0
+    if user.is_superuser:
+        return Role.OWNER
+    if not hasattr(request, "_project_roles"):
+        request._project_roles = {}
+    if project_id not in request._project_roles:
+        request._project_roles[project_id] = user_role(user.id, project_id)
+    return request._project_roles[project_id]
+
+
+def has_role(request, project_id: int, role: int) -> bool:
+    return request_role(request, project_id) >= role
+
+
+def project_from_url(kwargs: dict) -> int | None:
+    """The project the URL arguments lead to, None if they name none"""
+    # The endpoint refuses IDs that are not numbers itself
+    if str(kwargs.get("project_id", "")).isdigit():
+        return int(kwargs["project_id"])
+    for argument, (model, path) in PROJECT_PATHS.items():
+        if not str(kwargs.get(argument, "")).isdigit():
+            continue
+        value = int(kwargs[argument])
+        key = project_of_cache_key(argument, value)
+        project_id = cache.get(key)
+        if project_id is None:
+            # Archived tasks and deleted columns included, the endpoint
+            # decides what it serves
+            project_id = (
+                model._base_manager.filter(pk=value)
+                .values_list(path, flat=True)
+                .first()
+            )
+            if project_id is not None:
+                cache.set(key, project_id, PROJECT_OF_CACHE_SECONDS)
+        return project_id
+    return None
+
+
+def project_members(project_id: int) -> QuerySet:
+    """The users with access to the project, for assignee pickers"""
+    return User.objects.filter(project_memberships__project_id=project_id).order_by(
+        "username"
+    )
+
+
+def member_project_ids(user: AbstractBaseUser) -> list[int] | None:
+    """The projects the user has access to, None for all of them"""
+    if user.is_superuser:
+        return None
+    return list(user.project_memberships.values_list("project_id", flat=True))
+
+
+def forget_role(sender, instance, **kwargs) -> None:
+    """Drops the cached role of a saved or deleted membership"""
+    cache.delete(role_cache_key(instance.user_id, instance.project_id))
@@ -0,0 +1,384 @@
+"""
+On-demand request profiles.
+
+A staff user profiles one of their requests with an `X-Profile` header or a
+`?profile` query argument. `KANBAN_PROFILE_SAMPLE_RATE = N` also profiles
+one in N requests of anyone, 0 turns sampling off. Only the pages and the
+API are profiled, not the admin or static files.
+
+A profiled request runs under a sampling profiler: a thread reads the stack
+of the request's thread every `KANBAN_PROFILE_INTERVAL` seconds and the
+time between two samples goes to the stack seen. Each sample holds the GIL
+while it walks the stack, so a shorter interval slows the request down more.
+The SQL statements of the request and the templates it renders are timed
+too. The path is saved without its query string, which may hold what users
+searched for. The result is saved as a `RequestProfile`, which the admin shows
+as a flame graph and exports for speedscope (https://www.speedscope.app) or
+as folded stacks for `flamegraph.pl`.
+"""
+
+import functools
+import itertools
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+from types import FrameType, TracebackType
+from typing import Self
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+from django.urls import Resolver404, resolve
+from .models import RequestProfile
+
+# Query argument asking for a profile
+PROFILE_VAR = "profile"
+# Statements kept per profile, the slowest ones
+MAX_QUERIES = 200
+
+Trigger = RequestProfile.Trigger
+Frame = tuple[str, str, int]
+
+_install_lock = threading.Lock()
+_template_timer_installed = False
+
+
+@functools.cache
+def short_path(filename: str) -> str:
+    """The file relative to the project or the import path it was found on"""
+    roots = [str(settings.BASE_DIR), *sys.path]
+    for root in sorted((root for root in roots if root), key=len, reverse=True):
+        if filename.startswith(root + "/"):
+            return filename.removeprefix(root + "/")
+    return filename
+
+
+def frame_stack(frame: FrameType | None) -> tuple[Frame, ...]:
+    """The frames leading to this one, outermost first"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(
+            (code.co_qualname, short_path(code.co_filename), code.co_firstlineno)
+        )
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+class StackSampler:
+    """Samples the stack of another thread from a background thread"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        # Seconds spent per stack
+        self.stacks: Counter[tuple[Frame, ...]] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is not None:
+                # Samples are late when the request holds the GIL, weighing
+                # them by the time passed keeps the totals right
+                self.stacks[frame_stack(frame)] += now - last
+            last = now
+
+
+class RequestProfiler:
+    """Samples the current thread and times its SQL and template renders"""
+
+    def __init__(self, interval: float):
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.queries: list[tuple[str, str, float]] = []
+        self.templates: list[tuple[str, float]] = []
+        # Time in templates rendered by the view, not by another template
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.duration = 0.0
+
+    def _time_query(self, execute, sql, params, many, context):
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - began
+            self.queries.append((sql, context["connection"].alias, elapsed))
+
+    def template_rendered(self, name: str, elapsed: float) -> None:
+        self.templates.append((name, elapsed))
+        if self.template_depth == 0:
+            self.template_time += elapsed
+
+    def __enter__(self) -> Self:
+        self._exit_stack = ExitStack()
+        # Every database, a request about a project also reads its shard
+        for connection in connections.all():
+            self._exit_stack.enter_context(connection.execute_wrapper(self._time_query))
+        self._token = _profiler.set(self)
+        self._began = time.perf_counter()
+        self.sampler.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> bool:
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self._began
+        _profiler.reset(self._token)
+        self._exit_stack.close()
+        return False
+
+    def samples(self) -> dict:
+        """The sampled stacks, with each frame stored once"""
+        frames: dict[Frame, int] = {}
+        stacks = []
+        for stack, seconds in self.sampler.stacks.most_common():
+            indexes = [frames.setdefault(frame, len(frames)) for frame in stack]
+            stacks.append([indexes, seconds])
+        return {"frames": [list(frame) for frame in frames], "stacks": stacks}
+
+    def query_summary(self) -> list[dict]:
+        """The statements run, the same SQL counted together, slowest first"""
+        totals = defaultdict(lambda: {"count": 0, "ms": 0.0})
+        for sql, db, elapsed in self.queries:
+            total = totals[sql, db]
+            total["count"] += 1
+            total["ms"] += elapsed * 1000
+        summary = [
+            {"sql": sql, "db": db, **total} for (sql, db), total in totals.items()
+        ]
+        summary.sort(key=lambda query: query["ms"], reverse=True)
+        return summary[:MAX_QUERIES]
+
+    def template_summary(self) -> list[dict]:
+        """The templates rendered, with the templates they include, slowest first"""
+        totals = defaultdict(lambda: {"count": 0, "ms": 0.0})
+        for name, elapsed in self.templates:
+            totals[name]["count"] += 1
+            totals[name]["ms"] += elapsed * 1000
+        summary = [{"name": name, **total} for name, total in totals.items()]
+        summary.sort(key=lambda template: template["ms"], reverse=True)
+        return summary
+
+
+# The profiler of the request running in this thread
+_profiler: ContextVar[RequestProfiler | None] = ContextVar(
+    "request_profiler", default=None
+)
+
+
+def install_template_timer() -> None:
+    """Times `Template.render` for the requests being profiled.
+
+    Other requests only pay for reading a context variable.
+    """
+    global _template_timer_installed
+    with _install_lock:
+        if _template_timer_installed:
+            return
+        render = Template.render
+
+        @functools.wraps(render)
+        def timed_render(self, context):
+            profiler = _profiler.get()
+            if profiler is None:
+                return render(self, context)
+            began = time.perf_counter()
+            profiler.template_depth += 1
+            try:
+                return render(self, context)
+            finally:
+                elapsed = time.perf_counter() - began
+                profiler.template_depth -= 1
+                profiler.template_rendered(self.name or "<string>", elapsed)
+
+        Template.render = timed_render
+        _template_timer_installed = True
+
+
+def profiled_view(request) -> str | None:
+    """The name of the page or API view the request is for, None for other URLs"""
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return None
+    if match.func.__module__ == "kanban_app.views":
+        return match.view_name
+    # Imported here, the API (and Ninja) is only loaded with the URLs
+    from .api import api
+
+    if api.urls_namespace in match.namespaces:
+        return match.view_name
+    return None
+
+
+def save_profile(
+    request, response, profiler: RequestProfiler, trigger: str, view: str
+) -> RequestProfile:
+    user = request.user if request.user.is_authenticated else None
+    queries = profiler.query_summary()
+    templates = profiler.template_summary()
+    return RequestProfile.objects.create(
+        method=request.method,
+        path=request.path_info[:500],
+        view=view[:200],
+        status_code=response.status_code,
+        user=user,
+        trigger=trigger,
+        duration_ms=profiler.duration * 1000,
+        sql_count=len(profiler.queries),
+        sql_ms=sum(elapsed for _, _, elapsed in profiler.queries) * 1000,
+        template_ms=profiler.template_time * 1000,
+        samples=profiler.samples(),
+        queries=queries,
+        templates=templates,
+    )
+
+
+class RequestProfilerMiddleware:
+    """Profiles the requests asked for by staff users and sampled ones"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.KANBAN_PROFILE_SAMPLE_RATE
+        self.interval = settings.KANBAN_PROFILE_INTERVAL
+        self._requests = itertools.count(1)
+        install_template_timer()
+
+    def __call__(self, request):
+        asked = self.asked(request)
+        if asked is None and not self.sample_rate:
+            return self.get_response(request)
+        view = profiled_view(request)
+        if view is None:
+            return self.get_response(request)
+        if asked is not None:
+            trigger = asked
+        elif next(self._requests) % self.sample_rate == 0:
+            trigger = Trigger.SAMPLE
+        else:
+            return self.get_response(request)
+        with RequestProfiler(self.interval) as profiler:
+            response = self.get_response(request)
+        save_profile(request, response, profiler, trigger, view)
+        return response
+
+    def asked(self, request) -> str | None:
+        """How a staff user asked for a profile of the request, if they did"""
+        if "X-Profile" in request.headers:
+            asked = Trigger.HEADER
+        elif PROFILE_VAR in request.GET:
+            asked = Trigger.QUERY
+        else:
+            return None
+        return asked if request.user.is_staff else None
+
+
+# --- Exports ---
+
+
+def speedscope(profile: RequestProfile) -> dict:
+    """The profile in speedscope's file format"""
+    frames = profile.samples.get("frames", [])
+    stacks = profile.samples.get("stacks", [])
+    total_ms = sum(seconds for _, seconds in stacks) * 1000
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": str(profile),
+        "exporter": "kanban",
+        "activeProfileIndex": 0,
+        "shared": {
+            "frames": [
+                {"name": name, "file": file, "line": line}
+                for name, file, line in frames
+            ]
+        },
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": str(profile),
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": total_ms,
+                "samples": [indexes for indexes, _ in stacks],
+                "weights": [seconds * 1000 for _, seconds in stacks],
+            }
+        ],
+    }
+
+
+def folded_stacks(profile: RequestProfile) -> str:
+    """One `frame;frame;frame microseconds` line per stack, for `flamegraph.pl`"""
+    frames = [
+        f"{name} ({file}:{line})".replace(";", ",")
+        for name, file, line in profile.samples.get("frames", [])
+    ]
+    lines = [
+        f"{';'.join(frames[index] for index in indexes)} {round(seconds * 1_000_000)}"
+        for indexes, seconds in profile.samples.get("stacks", [])
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def flame_graph(profile: RequestProfile, min_share: float = 0.002) -> list[dict]:
+    """The boxes of the profile's flame graph, in percent of the sampled time.
+
+    Stacks sharing their outer frames are merged, each box is a frame with
+    its `left` and `width` on the time axis and its `depth` in the stack.
+    Boxes narrower than `min_share` of the total are left out.
+    """
+    frames = profile.samples.get("frames", [])
+    # frame index -> [seconds, children]
+    root: list = [0.0, {}]
+    for indexes, seconds in profile.samples.get("stacks", []):
+        root[0] += seconds
+        node = root
+        for index in indexes:
+            node = node[1].setdefault(index, [0.0, {}])
+            node[0] += seconds
+    total = root[0]
+    if not total:
+        return []
+
+    boxes = []
+
+    def add(children: dict, left: float, depth: int) -> None:
+        for index, (seconds, grandchildren) in sorted(
+            children.items(), key=lambda item: frames[item[0]][0]
+        ):
+            share = seconds / total
+            if share >= min_share:
+                name, file, line = frames[index]
+                boxes.append(
+                    {
+                        "name": name,
+                        "location": f"{file}:{line}",
+                        "ms": seconds * 1000,
+                        "left": left * 100,
+                        "width": share * 100,
+                        "depth": depth,
+                    }
+                )
+                add(grandchildren, left, depth + 1)
+            left += share
+
+    add(root[1], 0.0, 0)
+    return boxes
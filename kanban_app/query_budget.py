@@ -0,0 +1,89 @@
+import logging
+import traceback
+from contextlib import ContextDecorator, ExitStack
+from types import TracebackType
+from typing import Self
+from django.conf import settings
+from django.db import connections
+from .sharding import shard_aliases
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a block runs more queries than its budget"""
+
+
+class query_budget(ContextDecorator):
+    """Declares the maximum number of queries a view or block may run.
+
+    Usable as a decorator on Ninja endpoints and Django views, or as a context
+    manager. Queries on every database count, a project's shard included.
+    When the budget is exceeded it raises `QueryBudgetExceeded` if
+    `settings.QUERY_BUDGET_STRICT` is set (as it is in the test suite), and
+    otherwise logs a warning with the stack of the first query over budget
+    and the SQL that ran.
+
+    Views that gather from every shard add `per_shard` queries per shard to
+    the budget, once without sharding.
+    """
+
+    def __init__(self, max_queries: int, name: str | None = None, per_shard: int = 0):
+        self.max_queries = max_queries
+        self.name = name
+        self.per_shard = per_shard
+        self.queries: list[str] = []
+        self.offending_stack: list[str] = []
+
+    def __call__(self, func):
+        if self.name is None:
+            self.name = func.__qualname__
+        return super().__call__(func)
+
+    def _recreate_cm(self) -> Self:
+        # A fresh counter per call, decorated views can run concurrently
+        return type(self)(self.max_queries, self.name, self.per_shard)
+
+    def _record(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        if len(self.queries) == self.limit + 1:
+            self.offending_stack = traceback.format_stack()[:-1]
+        return execute(sql, params, many, context)
+
+    def __enter__(self) -> Self:
+        self.queries = []
+        self.offending_stack = []
+        self.limit = self.max_queries + self.per_shard * (len(shard_aliases()) or 1)
+        self._exit_stack = ExitStack()
+        for connection in connections.all():
+            self._exit_stack.enter_context(connection.execute_wrapper(self._record))
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> bool:
+        self._exit_stack.close()
+        if exc_type is None and len(self.queries) > self.limit:
+            self._report()
+        return False
+
+    def _report(self) -> None:
+        name = self.name or "block"
+        summary = (
+            f"{name} ran {len(self.queries)} queries, over its budget of {self.limit}"
+        )
+        sql = "\n".join(
+            f"  {index}. {query}" for index, query in enumerate(self.queries, 1)
+        )
+        if getattr(settings, "QUERY_BUDGET_STRICT", False):
+            raise QueryBudgetExceeded(f"{summary}:\n{sql}")
+
+        logger.warning(
+            "%s\nFirst query over budget ran from:\n%s\nQueries:\n%s",
+            summary,
+            "".join(self.offending_stack),
+            sql,
+        )
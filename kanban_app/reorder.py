@@ -0,0 +1,137 @@
+from django.db.models import Case, IntegerField, Q, Value, When
+from .models import Board, Column, Task
+from .task_events import TaskEventRecorder
+from .versions import bump_versions
+
+
+class ReorderError(ValueError):
+    """Raised when a board reordering does not fit the board"""
+
+
+def _per_row(values: dict[int, int]) -> Case:
+    return Case(
+        *(When(pk=pk, then=Value(value)) for pk, value in values.items()),
+        output_field=IntegerField(),
+    )
+
+
+def reorder_board(
+    events: TaskEventRecorder,
+    board: Board,
+    task_orders: dict[int, list[int]],
+    column_versions: dict[int, int | None] | None = None,
+    task_versions: dict[int, int] | None = None,
+    column_order: list[int] | None = None,
+) -> dict[str, dict[int, int]]:
+    """Applies the complete task order of some columns, and the column order.
+
+    `task_orders` maps column IDs to the IDs of their tasks, top to bottom.
+    Tasks missing from a listed column (added since the client loaded it)
+    go after the listed ones. Only rows whose column or position changes
+    are written, history is recorded for tasks that change column.
+
+    Columns whose order changes, and tasks that change column, are checked
+    against `column_versions` and `task_versions` (the versions loaded here
+    when missing) and refused all at once with `VersionConflict`. Returns
+    the new versions, as `versionsChanged` sends them to the client.
+    """
+    column_versions = column_versions or {}
+    task_versions = task_versions or {}
+    columns = {column.id: column for column in board.columns.all()}
+    if unknown := set(task_orders) - set(columns):
+        raise ReorderError(f"Columns {sorted(unknown)} are not on this board.")
+    if column_order is not None and sorted(column_order) != sorted(columns):
+        raise ReorderError("The column order must list every column once.")
+
+    listed = [task_id for task_ids in task_orders.values() for task_id in task_ids]
+    listed_ids = set(listed)
+    if len(listed) != len(listed_ids):
+        raise ReorderError("A task can only be in one place.")
+    tasks = {
+        task.id: task
+        for task in Task.objects.filter(Q(column_id__in=task_orders) | Q(id__in=listed))
+        .only("id", "title", "column_id", "order", "version", "assigned_to_id")
+        .order_by()
+    }
+    if missing := [
+        task_id
+        for task_id in listed
+        if task_id not in tasks or tasks[task_id].column_id not in columns
+    ]:
+        raise ReorderError(f"Tasks {missing} are not on this board.")
+
+    # New (column, position) of every task in a listed column
+    placements = {}
+    for column_id, task_ids in task_orders.items():
+        added = sorted(
+            (
+                task
+                for task in tasks.values()
+                if task.column_id == column_id and task.id not in listed_ids
+            ),
+            key=lambda task: (task.order, task.id),
+        )
+        for order, task_id in enumerate([*task_ids, *(task.id for task in added)]):
+            placements[task_id] = (column_id, order)
+
+    moved = {
+        task_id: column_id
+        for task_id, (column_id, _) in placements.items()
+        if tasks[task_id].column_id != column_id
+    }
+    if any(tasks[task_id].assigned_to_id is None for task_id in moved):
+        raise ReorderError("Unassigned tasks cannot change status.")
+    reordered = {
+        task_id: order
+        for task_id, (column_id, order) in placements.items()
+        if task_id not in moved and tasks[task_id].order != order
+    }
+
+    changed_columns = {tasks[task_id].column_id for task_id in moved}
+    changed_columns |= {placements[task_id][0] for task_id in [*moved, *reordered]}
+    expected_columns = {
+        column_id: columns[column_id].version for column_id in changed_columns
+    }
+    expected_columns.update(
+        (column_id, version)
+        for column_id, version in column_versions.items()
+        if column_id in changed_columns and version is not None
+    )
+    expected_tasks = {
+        task_id: task_versions.get(task_id, tasks[task_id].version) for task_id in moved
+    }
+    new_versions = {
+        "columns": bump_versions(Column.objects.filter(board=board), expected_columns),
+        "tasks": bump_versions(
+            Task.objects.all(),
+            expected_tasks,
+            column_id=_per_row(moved),
+            order=_per_row({task_id: placements[task_id][1] for task_id in moved}),
+        ),
+    }
+    if reordered:
+        Task.objects.filter(id__in=reordered).update(order=_per_row(reordered))
+        for task_id in reordered:
+            # "My work" lists the tasks in their column's order
+            events.touch_user(tasks[task_id].assigned_to_id)
+
+    if column_order is not None:
+        column_positions = {
+            column_id: order
+            for order, column_id in enumerate(column_order)
+            if columns[column_id].order != order
+        }
+        if column_positions:
+            Column.objects.filter(id__in=column_positions).update(
+                order=_per_row(column_positions)
+            )
+            events.touch(board.project_id)
+
+    for task_id, column_id in moved.items():
+        task = tasks[task_id]
+        events.moved(
+            board.project_id, task, columns[task.column_id], columns[column_id]
+        )
+    if changed_columns:
+        events.touch(board.project_id)
+    return new_versions
@@ -0,0 +1,72 @@
+import datetime
+import os
+from collections.abc import Callable
+from django.db import transaction
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from .models import Project, Task
+from .history_logger import get_history_file_path
+from .sharding import use_project
+
+
+def delete_in_batches(
+    rows: QuerySet,
+    batch_size: int = 500,
+    on_batch: Callable[[int], None] | None = None,
+) -> int:
+    """Deletes rows and what cascades from them, one short transaction per batch
+
+    `on_batch` is called with the number of rows deleted so far after each batch.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic(using=rows.db):
+            ids = list(rows.order_by().values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            # Related rows without further cascades are fast-deleted with a
+            # single DELETE each
+            rows.model._base_manager.filter(id__in=ids).delete()
+        deleted += len(ids)
+        if on_batch is not None:
+            on_batch(deleted)
+    return deleted
+
+
+def delete_tasks_in_batches(
+    tasks: QuerySet,
+    batch_size: int = 500,
+    on_batch: Callable[[int], None] | None = None,
+) -> int:
+    """Deletes tasks with their tag links, dependencies and history in batches"""
+    return delete_in_batches(tasks, batch_size, on_batch)
+
+
+def purgeable_projects(grace_days: int) -> QuerySet:
+    """Returns soft-deleted projects whose grace period has expired"""
+    cutoff = timezone.now() - datetime.timedelta(days=grace_days)
+    return Project.all_objects.filter(is_deleted=True, deleted_at__lt=cutoff)
+
+
+def purge_project(project_id: int, batch_size: int = 500) -> None:
+    """Hard-deletes a project, its board, columns, tags, tasks and history file"""
+    with use_project(project_id):
+        delete_tasks_in_batches(
+            Task.all_objects.filter(column__board__project_id=project_id), batch_size
+        )
+    # With sharding, deleting the catalog row deletes the shard's copy too
+    with transaction.atomic():
+        # Only the board, its columns and the tags are left to cascade now
+        Project.all_objects.filter(id=project_id, is_deleted=True).delete()
+
+    file_path = get_history_file_path(project_id)
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+
+def purge_deleted_projects(grace_days: int, batch_size: int = 500) -> list[int]:
+    """Purges every soft-deleted project past its grace period, returns their IDs"""
+    project_ids = list(purgeable_projects(grace_days).values_list("id", flat=True))
+    for project_id in project_ids:
+        purge_project(project_id, batch_size)
+    return project_ids
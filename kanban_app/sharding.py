@@ -0,0 +1,283 @@
+"""
+Optional per-project SQLite sharding.
+
+SQLite lets one writer at a time into a database file, so with one file
+every project waits for every other project's writes. With
+`KANBAN_SHARDS` set, the boards, columns, tasks, tags, saved filters,
+task statistics and history of a project live in the shard file
+`shard_<project ID % KANBAN_SHARDS>` and writes to projects in different
+shards run side by side. The default database stays the catalog of
+projects, users, sessions and jobs.
+
+The router sends the sharded models to the shard selected for the current
+request or command, see `use_project`. Project and user rows are mirrored
+into the shards so that joins and foreign keys keep working inside a
+shard. New rows get IDs from a range of their own per shard, so IDs stay
+unique across shards and the fragment cache keys built from them stay
+valid.
+"""
+
+import contextvars
+import re
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager
+from typing import Any
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models, router
+
+SHARD_PREFIX = "shard_"
+# IDs of rows created in shard N start at (N + 1) * SHARD_ID_SPAN, below the
+# first span are the IDs copied over from the unsharded database. Stays
+# within the integers JavaScript can represent for up to 8191 shards.
+SHARD_ID_SPAN = 2**40
+
+# The models whose rows live in the shard of their project
+SHARDED_MODELS = frozenset(
+    {
+        "board",
+        "column",
+        "task",
+        "task_tags",
+        "tag",
+        "taskdependency",
+        "savedfilter",
+        "projectstats",
+        "taskstatushistory",
+        "taskassignmenthistory",
+    }
+)
+
+_current_shard: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "kanban_shard", default=None
+)
+
+
+class NoShardSelected(LookupError):
+    """Raised when a sharded model is used before a project was selected"""
+
+
+class CrossShardError(ValueError):
+    """Raised when one transaction would change projects in different shards"""
+
+
+def sharding_enabled() -> bool:
+    return settings.KANBAN_SHARDS > 0
+
+
+def is_sharded(model: type[models.Model]) -> bool:
+    return (
+        model._meta.app_label == "kanban_app"
+        and model._meta.model_name in SHARDED_MODELS
+    )
+
+
+def shard_aliases() -> list[str]:
+    return [f"{SHARD_PREFIX}{index}" for index in range(settings.KANBAN_SHARDS)]
+
+
+def shard_index(database: str | None) -> int | None:
+    """The number of a shard's database alias, None for any other database"""
+    match = re.fullmatch(rf"{SHARD_PREFIX}(\d+)", database or "")
+    return int(match[1]) if match else None
+
+
+def shard_for_project(project_id: int) -> str:
+    """The database holding the project's rows"""
+    if not sharding_enabled():
+        return DEFAULT_DB_ALIAS
+    return f"{SHARD_PREFIX}{project_id % settings.KANBAN_SHARDS}"
+
+
+def current_db() -> str:
+    """The database of the selected project, the default database if none is"""
+    return _current_shard.get() or DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def use_shard(database: str) -> Iterator[str]:
+    """Sends the sharded models to this database inside the block"""
+    token = _current_shard.set(database)
+    try:
+        yield database
+    finally:
+        _current_shard.reset(token)
+
+
+def use_project(project_id: int) -> AbstractContextManager[str]:
+    """Selects the shard of the project inside the block"""
+    return use_shard(shard_for_project(project_id))
+
+
+def activate_project(project_id: int) -> None:
+    """Selects the shard of the project until another one is, for long-running CLIs"""
+    _current_shard.set(shard_for_project(project_id))
+
+
+def use_projects(project_ids: set[int]) -> AbstractContextManager[str]:
+    """Selects the shard shared by these projects, see `CrossShardError`"""
+    databases = {shard_for_project(project_id) for project_id in project_ids}
+    if len(databases) > 1:
+        raise CrossShardError(
+            f"Projects {sorted(project_ids)} are in different shards and cannot be "
+            "changed in one transaction."
+        )
+    return use_shard(databases.pop() if databases else current_db())
+
+
+def select_shards(project_id: int | None = None) -> Iterator[str]:
+    """Selects the shard of the project, or each shard in turn when it is None.
+
+    Yields the selected database, so the body of a `for` loop runs once per
+    shard. Without sharding it runs once, on the default database.
+    """
+    if project_id is not None:
+        with use_project(project_id) as database:
+            yield database
+    elif sharding_enabled():
+        for database in shard_aliases():
+            with use_shard(database):
+                yield database
+    else:
+        with use_shard(DEFAULT_DB_ALIAS):
+            yield DEFAULT_DB_ALIAS
+
+
+class ProjectShardRouter:
+    """Routes the sharded models to the selected shard, the rest to the catalog.
+
+    Related rows are read from the database of the row they hang off, so a
+    project or user reached from a task comes from the shard's mirror.
+    """
+
+    def _shard(self, model: type[models.Model], **hints: Any) -> str | None:
+        if not is_sharded(model):
+            return None
+        instance = hints.get("instance")
+        if instance is not None and shard_index(instance._state.db) is not None:
+            return instance._state.db
+        database = _current_shard.get()
+        if database is None:
+            raise NoShardSelected(
+                f"{model._meta.label} lives in the project's shard, select the "
+                "project first with `use_project()`."
+            )
+        return database
+
+    db_for_read = _shard
+    db_for_write = _shard
+
+    def allow_relation(self, obj1: models.Model, obj2: models.Model, **hints: Any):
+        # Mirrored projects and users are the same rows in every database
+        return True
+
+
+class ProjectShardMiddleware:
+    """Selects the shard of the project a request is about.
+
+    The project comes from a `project_id` URL argument or the `X-Project-Id`
+    header, which the board page sends with every request it makes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        token = getattr(request, "_shard_token", None)
+        if token is not None:
+            _current_shard.reset(token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        project_id = str(
+            view_kwargs.get("project_id") or request.headers.get("X-Project-Id", "")
+        )
+        if project_id.isdigit():
+            database = shard_for_project(int(project_id))
+            request._shard_token = _current_shard.set(database)
+
+
+# --- Mirrors ---
+
+
+def copy_row(instance: models.Model, database: str, keep: tuple[str, ...] = ()):
+    """Writes the row as it is into another database, keeping the `keep` fields of a row already there"""
+    model = type(instance)
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in model._meta.concrete_fields
+    }
+    keep = (model._meta.pk.attname, *keep)
+    updated = (
+        model._base_manager.using(database)
+        .filter(pk=instance.pk)
+        .update(**{name: value for name, value in values.items() if name not in keep})
+    )
+    if not updated:
+        # `raw` saves the auto_now fields as they are, like fixtures
+        models.Model.save_base(
+            model(**values), using=database, raw=True, force_insert=True
+        )
+
+
+def mirror_project(sender, instance, raw=False, using=None, **kwargs) -> None:
+    """Copies a project saved in the catalog into its shard"""
+    if sharding_enabled() and not raw and using == DEFAULT_DB_ALIAS:
+        # The shard counts the project's task IDs
+        copy_row(instance, shard_for_project(instance.pk), keep=("next_task_id",))
+
+
+def mirror_user(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    """Copies a user saved in the catalog into every shard"""
+    if not sharding_enabled() or raw or using != DEFAULT_DB_ALIAS:
+        return
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        # Every login saves the user, the shards have no use for it
+        return
+    for database in shard_aliases():
+        copy_row(instance, database)
+
+
+def forget_project(sender, instance, using=None, **kwargs) -> None:
+    """Deletes a project deleted from the catalog from its shard, with its rows"""
+    if sharding_enabled() and using == DEFAULT_DB_ALIAS:
+        database = shard_for_project(instance.pk)
+        sender._base_manager.using(database).filter(pk=instance.pk).delete()
+
+
+def forget_user(sender, instance, using=None, **kwargs) -> None:
+    """Deletes a user deleted from the catalog from every shard"""
+    if sharding_enabled() and using == DEFAULT_DB_ALIAS:
+        for database in shard_aliases():
+            sender._base_manager.using(database).filter(pk=instance.pk).delete()
+
+
+def reserve_id_range(sender, using=DEFAULT_DB_ALIAS, **kwargs) -> None:
+    """Starts the IDs of a shard's new rows at the shard's own range.
+
+    Runs after `migrate`. SQLite keeps the last ID of every AUTOINCREMENT
+    table in `sqlite_sequence`, which is raised to the start of the range.
+    """
+    index = shard_index(using)
+    connection = connections[using]
+    if index is None or connection.vendor != "sqlite":
+        return
+    start = (index + 1) * SHARD_ID_SPAN
+    tables = [
+        model._meta.db_table
+        for model in sender.get_models(include_auto_created=True)
+        if is_sharded(model)
+        and isinstance(model._meta.pk, models.AutoField)
+        and router.allow_migrate_model(using, model)
+    ]
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(
+                "UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s",
+                [start, table, start],
+            )
+            cursor.execute(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)",
+                [table, start, table],
+            )
@@ -0,0 +1,61 @@
+from collections.abc import Iterable
+from django.db.models import Case, Count, F, Q, Value, When
+from .models import ProjectStats, Task
+
+
+def refresh_project_stats(project_ids: Iterable[int]) -> None:
+    """Recounts the tasks of these projects from scratch, two queries in all.
+
+    Used after bulk changes that bypass the per-task events and to create
+    missing rows.
+    """
+    counts = dict.fromkeys(project_ids, (0, 0))
+    if not counts:
+        return
+    rows = (
+        Task.objects.filter(
+            column__board__project_id__in=counts, column__is_deleted=False
+        )
+        .values("column__board__project_id")
+        .annotate(
+            total=Count("id"), done=Count("id", filter=Q(column__is_terminal=True))
+        )
+        .order_by()
+    )
+    for row in rows:
+        counts[row["column__board__project_id"]] = (row["total"], row["done"])
+    ProjectStats.objects.bulk_create(
+        [
+            ProjectStats(project_id=project_id, task_count=total, done_count=done)
+            for project_id, (total, done) in counts.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["project"],
+        update_fields=["task_count", "done_count"],
+    )
+
+
+def apply_stats_deltas(deltas: dict[int, tuple[int, int]]) -> None:
+    """Adds (task count, done count) deltas to the projects' stats in one UPDATE.
+
+    If a project has no stats row yet, the projects are recounted instead.
+    """
+    deltas = {project_id: delta for project_id, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    def delta(index: int) -> Case:
+        return Case(
+            *[
+                When(project_id=project_id, then=Value(change[index]))
+                for project_id, change in deltas.items()
+            ],
+            default=Value(0),
+        )
+
+    updated = ProjectStats.objects.filter(project_id__in=deltas).update(
+        task_count=F("task_count") + delta(0), done_count=F("done_count") + delta(1)
+    )
+    if updated < len(deltas):
+        # The count already includes this transaction's changes
+        refresh_project_stats(deltas)
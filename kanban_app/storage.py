@@ -0,0 +1,56 @@
+import gzip
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Hashed file names, plus `.gz` and `.br` copies of the text files.
+
+    The hash makes the files safe to cache forever, the web server serves the
+    precompressed copies as they are (`gzip_static` in nginx). Brotli copies
+    are only written when the `brotli` or `brotlicffi` package is installed.
+    """
+
+    compress_extensions = (".css", ".js", ".svg", ".json", ".map", ".txt")
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            if hashed_name.endswith(self.compress_extensions):
+                for compressed_name in self.compress(hashed_name):
+                    yield hashed_name, compressed_name, True
+
+    def compress(self, name: str) -> list[str]:
+        """Writes the compressed copies of a file that come out smaller"""
+        with self.open(name) as original:
+            content = original.read()
+        compressors = {".gz": lambda data: gzip.compress(data, mtime=0)}
+        if brotli is not None:
+            compressors[".br"] = brotli.compress
+
+        written = []
+        for suffix, compress in compressors.items():
+            compressed = compress(content)
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            written.append(self._save(name + suffix, ContentFile(compressed)))
+        return written
@@ -0,0 +1,213 @@
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import partial
+from django.db import router, transaction
+from django.db.models import F
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from .models import (
+    Board,
+    Column,
+    Task,
+    TaskAssignmentHistory,
+    TaskStatusHistory,
+    User,
+)
+from .dashboard import forget_my_work
+from .history_logger import log_task_changes
+from .metrics import count_task_events
+from .stats import apply_stats_deltas, refresh_project_stats
+
+
+class TaskEventRecorder:
+    """Collects the task history produced by one request or command.
+
+    History rows are inserted with one `bulk_create` per history table inside
+    the transaction that made the changes, so they commit or roll back with
+    them. File log lines are appended once per project after the commit, so
+    a rolled back change never shows up in `task_history/`. The version of
+    every touched board and column is bumped once, in the same transaction,
+    along with the task counts in `ProjectStats`. The "my work" dashboards of affected
+    assignees are dropped after the commit.
+    """
+
+    def __init__(self, username: str, using: str | None = None):
+        self.username = username
+        self.using = using
+        self.status_history: list[TaskStatusHistory] = []
+        self.assignment_history: list[TaskAssignmentHistory] = []
+        self.log_entries: dict[int, list[tuple[str, str]]] = defaultdict(list)
+        self.touched_projects: set[int] = set()
+        self.touched_columns: set[int] = set()
+        self.touched_users: set[int] = set()
+        self.stats_deltas: dict[int, tuple[int, int]] = {}
+        self.recount_projects: set[int] = set()
+        # Events per kind, for the metrics
+        self.events: Counter[str] = Counter()
+
+    def touch(self, project_id: int) -> None:
+        """Marks the project's board as changed without recording history"""
+        self.touched_projects.add(project_id)
+
+    def touch_columns(self, *column_ids: int) -> None:
+        """Marks columns whose tasks changed outside a board drop.
+
+        Their versions are bumped, so a drop based on the tasks they had
+        before is refused. `move_task` and the board reorder check and bump
+        the versions themselves.
+        """
+        self.touched_columns.update(column_ids)
+
+    def count(self, project_id: int | None, tasks: int, done: int) -> None:
+        """Adds to the project's task and done counts"""
+        if project_id is not None:
+            old_tasks, old_done = self.stats_deltas.get(project_id, (0, 0))
+            self.stats_deltas[project_id] = (old_tasks + tasks, old_done + done)
+
+    def recount(self, project_id: int | None) -> None:
+        """Recounts the project's tasks, for bulk changes made without events"""
+        self.touch(project_id)
+        if project_id is not None:
+            self.recount_projects.add(project_id)
+
+    def touch_user(self, user_id: int | None) -> None:
+        """Marks the user's "my work" dashboard as changed"""
+        if user_id is not None:
+            self.touched_users.add(user_id)
+
+    def touch_assignees(self, tasks: QuerySet) -> None:
+        """Marks the dashboards of the tasks' assignees as changed, for bulk
+        changes made without events. Call it before the change."""
+        self.touched_users.update(
+            tasks.filter(assigned_to__isnull=False)
+            .values_list("assigned_to_id", flat=True)
+            .distinct()
+        )
+
+    def log(self, project_id: int, task_title: str, action: str) -> None:
+        """Records a history file entry only"""
+        self.touch(project_id)
+        self.log_entries[project_id].append((task_title, action))
+
+    def created(self, project_id: int, task: Task, column: Column) -> None:
+        self.status_history.append(TaskStatusHistory(task=task, new_column=column))
+        self.events["created"] += 1
+        self.count(project_id, 1, int(column.is_terminal))
+        self.log(project_id, task.title, f"Created in {column.name}")
+
+    def moved(
+        self, project_id: int, task: Task, old_column: Column, new_column: Column
+    ) -> None:
+        self.status_history.append(
+            TaskStatusHistory(task=task, old_column=old_column, new_column=new_column)
+        )
+        self.events["moved"] += 1
+        self.touch_user(task.assigned_to_id)
+        self.count(project_id, 0, new_column.is_terminal - old_column.is_terminal)
+        self.log(
+            project_id, task.title, f"Moved from {old_column.name} to {new_column.name}"
+        )
+
+    def moved_in_bulk(
+        self, project_id: int, moved: int, old_column: Column, new_column: Column
+    ) -> None:
+        """Counts tasks moved by one statement, which wrote their status
+        history and touched their assignees itself"""
+        self.events["moved"] += moved
+        self.count(
+            project_id, 0, moved * (new_column.is_terminal - old_column.is_terminal)
+        )
+
+    def assigned(
+        self,
+        project_id: int,
+        task: Task,
+        old_assignee_id: int | None,
+        new_assignee: User | None,
+    ) -> None:
+        self.assignment_history.append(
+            TaskAssignmentHistory(
+                task=task, old_assignee_id=old_assignee_id, new_assignee=new_assignee
+            )
+        )
+        self.events["assigned"] += 1
+        self.touch_user(old_assignee_id)
+        self.touch_user(new_assignee.id if new_assignee else None)
+        assignee_name = new_assignee.username if new_assignee else "Unassigned"
+        self.log(project_id, task.title, f"Assigned to {assignee_name}")
+
+    def deleted(self, project_id: int, task: Task) -> None:
+        self.events["deleted"] += 1
+        self.touch_user(task.assigned_to_id)
+        self.count(project_id, -1, -int(task.column.is_terminal))
+        self.log(project_id, task.title, "Deleted task")
+
+    def archived(self, project_id: int, task_title: str, done: bool = True) -> None:
+        """`done` tells whether the task sat in a terminal column"""
+        self.events["archived"] += 1
+        self.count(project_id, -1, -int(done))
+        self.log(project_id, task_title, "Archived")
+
+    def restored(self, project_id: int, task_title: str, done: bool = False) -> None:
+        """`done` tells whether the task was restored to a terminal column"""
+        self.events["restored"] += 1
+        self.count(project_id, 1, int(done))
+        self.log(project_id, task_title, "Restored")
+
+    def flush(self) -> None:
+        """Writes the collected history, must run inside the recording transaction"""
+        if self.status_history:
+            TaskStatusHistory.objects.bulk_create(self.status_history)
+        if self.assignment_history:
+            TaskAssignmentHistory.objects.bulk_create(self.assignment_history)
+        if self.touched_projects:
+            # `updated_at` doubles as the project's last activity
+            Board.objects.filter(project_id__in=self.touched_projects).update(
+                version=F("version") + 1, updated_at=timezone.now()
+            )
+        if self.touched_columns:
+            Column.all_objects.filter(id__in=self.touched_columns).update(
+                version=F("version") + 1, updated_at=timezone.now()
+            )
+        for project_id in self.recount_projects:
+            self.stats_deltas.pop(project_id, None)
+        apply_stats_deltas(self.stats_deltas)
+        refresh_project_stats(self.recount_projects)
+        for project_id, changes in self.log_entries.items():
+            transaction.on_commit(
+                partial(log_task_changes, project_id, self.username, changes),
+                using=self.using,
+            )
+        if self.touched_users:
+            transaction.on_commit(
+                partial(forget_my_work, self.touched_users), using=self.using
+            )
+        if self.events:
+            transaction.on_commit(
+                partial(count_task_events, self.events), using=self.using
+            )
+
+        self.status_history = []
+        self.assignment_history = []
+        self.log_entries = defaultdict(list)
+        self.touched_projects = set()
+        self.touched_columns = set()
+        self.touched_users = set()
+        self.stats_deltas = {}
+        self.recount_projects = set()
+        self.events = Counter()
+
+
+@contextmanager
+def record_task_events(username: str) -> Iterator[TaskEventRecorder]:
+    """Runs the block in a transaction and records its task history on success.
+
+    The transaction is on the database of the tasks, the selected project's
+    shard when sharding is on.
+    """
+    using = router.db_for_write(Task)
+    recorder = TaskEventRecorder(username, using)
+    with transaction.atomic(using=using):
+        yield recorder
+        recorder.flush()
@@ -0,0 +1,31 @@
+from django.db import router, transaction
+from django.db.models import F
+from .models import Project, Task
+
+
+def allocate_task_ids(project_id: int, count: int = 1) -> range:
+    """Reserves `count` consecutive project task IDs and returns them as a range.
+
+    The counter is bumped with `UPDATE ... SET next_task_id = next_task_id +
+    count` and read back in the same transaction. The UPDATE takes the write
+    lock before the read, SQLite at `BEGIN IMMEDIATE` and other databases on
+    the project's row, and it is held until the caller's transaction
+    commits, so no other allocation can slip in between. Call it inside the
+    transaction that creates the tasks: if that transaction rolls back, the
+    counter rolls back with it and the IDs stay gap-free. With sharding the
+    counter is the one on the project's row in its shard, next to the tasks.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    db = router.db_for_write(Task)
+    projects = Project.all_objects.using(db).filter(id=project_id)
+    with transaction.atomic(using=db, savepoint=False):
+        projects.update(next_task_id=F("next_task_id") + count)
+        row = projects.values_list("next_task_id").first()
+
+    if row is None:
+        raise Project.DoesNotExist(f"Project {project_id} does not exist")
+
+    next_task_id = row[0]
+    return range(next_task_id - count, next_task_id)
@@ -0,0 +1,21 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def card_stamp(task) -> str:
+    """Everything a task card shows that its version does not cover.
+
+    Used as `{% cache %}` key: tag edits and assignee renames change it
+    without touching the task, `is_blocked` changes with other tasks.
+    """
+    tags = ",".join(f"{tag.id}:{tag.name}:{tag.color}" for tag in task.tags.all())
+    assignee = task.assigned_to.username if task.assigned_to_id else ""
+    return f"{task.version}:{task.updated_at.isoformat()}:{task.is_blocked}:{assignee}:{tags}"
+
+
+@register.filter
+def column_stamp(column) -> str:
+    """The column's cards in order, changes when any card or the order does"""
+    return "|".join(f"{task.id}={card_stamp(task)}" for task in column.tasks.all())
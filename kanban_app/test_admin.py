@@ -0,0 +1,135 @@
+import datetime
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from model_bakery import baker
+from kanban_app import admin_pagination
+from kanban_app.admin import TaskStatusHistoryAdmin
+from kanban_app.admin_pagination import EstimatedCountPaginator
+from kanban_app.models import Column, Task, TaskStatusHistory
+
+CHANGELIST = "/admin/kanban_app/taskstatushistory/"
+
+
+@pytest.fixture
+def admin_client():
+    client = Client()
+    client.force_login(User.objects.create_superuser("admin", "a@example.com", "pw"))
+    return client
+
+
+@pytest.fixture
+def history(monkeypatch):
+    monkeypatch.setattr(TaskStatusHistoryAdmin, "list_per_page", 3)
+    todo, done = baker.make(Column, _quantity=2)
+    task = baker.make(Task, column=todo, title="Write docs")
+    rows = baker.make(TaskStatusHistory, task=task, new_column=done, _quantity=7)
+    # Two rows share a timestamp, the id breaks the tie
+    start = timezone.now() - datetime.timedelta(days=1)
+    for i, row in enumerate(rows):
+        row.changed_at = start + datetime.timedelta(minutes=min(i, 5))
+    TaskStatusHistory.objects.bulk_update(rows, ["changed_at"])
+    return sorted(rows, key=lambda row: (row.changed_at, row.id), reverse=True)
+
+
+def response_cursor(history):
+    """The cursor of the second page"""
+    last = history[2]
+    return f"{last.changed_at.isoformat()}|{last.id}"
+
+
+def shown_ids(response):
+    return [row.id for row in response.context["cl"].result_list]
+
+
+@pytest.mark.django_db
+def test_history_changelist_pages_by_keyset(admin_client, history):
+    seen = []
+    url = CHANGELIST
+    while url:
+        response = admin_client.get(url)
+        assert response.status_code == 200
+        seen += shown_ids(response)
+        next_url = response.context["cl"].next_page_url()
+        url = next_url and CHANGELIST + next_url
+
+    assert seen == [row.id for row in history]
+
+
+@pytest.mark.django_db
+def test_history_changelist_queries_do_not_grow_with_rows(admin_client, history):
+    admin_client.get(CHANGELIST)
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get(CHANGELIST)
+    baker.make(
+        TaskStatusHistory,
+        task=history[0].task,
+        new_column=history[0].new_column,
+        _quantity=10,
+    )
+    with CaptureQueriesContext(connection) as more_queries:
+        admin_client.get(CHANGELIST)
+
+    assert "Next" in response.content.decode()
+    assert len(more_queries) == len(queries)
+    assert not any("OFFSET" in query["sql"] for query in queries)
+
+
+@pytest.mark.django_db
+def test_history_changelist_reads_the_page_in_one_query(admin_client, history):
+    admin_client.get(CHANGELIST)
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get(CHANGELIST, {"after": response_cursor(history)})
+
+    assert shown_ids(response) == [row.id for row in history[3:6]]
+    sql = [query["sql"] for query in queries]
+    # The rows of the page, no OFFSET page before it
+    row_queries = [
+        query for query in sql if '"kanban_app_taskstatushistory"."task_id"' in query
+    ]
+    assert len(row_queries) == 1
+    # Nor a COUNT(*) or a size estimate
+    assert not any("COUNT(" in query or "rowid" in query for query in sql)
+
+
+@pytest.mark.django_db
+def test_history_changelist_rejects_a_broken_cursor(admin_client, history):
+    response = admin_client.get(CHANGELIST, {"after": "yesterday"})
+
+    assert response.status_code == 302
+    assert "e=1" in response["Location"]
+
+
+@pytest.mark.django_db
+def test_sorted_history_changelist_uses_numbered_pages(admin_client, history):
+    response = admin_client.get(CHANGELIST, {"o": "1", "p": "2"})
+
+    assert response.status_code == 200
+    assert response.context["cl"].keyset is False
+    assert len(shown_ids(response)) == 3
+
+
+@pytest.mark.django_db
+def test_paginator_estimates_large_tables_and_caps_filtered_counts(
+    history, monkeypatch
+):
+    monkeypatch.setattr(admin_pagination, "COUNT_LIMIT", 5)
+    rows = TaskStatusHistory.objects.order_by("-id")
+
+    # MAX(rowid) on SQLite
+    assert EstimatedCountPaginator(rows, 3).count == max(row.id for row in history)
+    assert EstimatedCountPaginator(rows.filter(task=history[0].task), 3).count == 5
+    assert EstimatedCountPaginator(rows.filter(id=history[0].id), 3).count == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "model",
+    ["project", "board", "column", "task", "tag", "taskassignmenthistory", "job"],
+)
+def test_changelists_render(admin_client, history, model):
+    assert admin_client.get(f"/admin/kanban_app/{model}/").status_code == 200
+    assert admin_client.get(f"/admin/kanban_app/{model}/add/").status_code == 200
@@ -1,15 +1,22 @@
 import pytest
-from django.test import Client
 from model_bakery import baker
-from kanban_app.models import Project, Board, Column, Task, Tag, TaskAssignmentHistory
+from kanban_app.models import (
+    Project,
+    ProjectMembership,
+    Board,
+    Column,
+    Task,
+    Tag,
+    TaskAssignmentHistory,
+)
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
 @pytest.fixture
-def api_client():
-    return Client()
+def api_client(admin_client):
+    return admin_client
 
 
 @pytest.mark.django_db
@@ -96,7 +103,7 @@ def test_delete_column(api_client):
     col = baker.make(Column, order=0)
     response = api_client.delete(f"/api/columns/{col.id}")
     assert response.status_code == 200
-    assert response.headers.get("HX-Trigger") == "columnUpdated"
+    assert response.headers.get("HX-Trigger") == "columnUpdated, closeModal"
     assert not Column.objects.filter(id=col.id).exists()
 
 
@@ -173,6 +180,8 @@ def test_task_assignment(api_client):
     task = baker.make(Task, column=col, order=0)
     user1 = baker.make(User)
     user2 = baker.make(User)
+    for user in (user1, user2):
+        baker.make(ProjectMembership, project=project, user=user)
 
     # Assign to user1
     response = api_client.post(
@@ -232,7 +241,10 @@ def test_update_task_details(api_client):
     )
 
     assert response.status_code == 200
-    assert response.headers.get("HX-Trigger") == "columnUpdated"
+    # Only the card is swapped in, the board is not reloaded
+    assert response.headers.get("HX-Trigger") is None
+    assert f'id="task-card-{task.id}"' in response.content.decode()
     task.refresh_from_db()
     assert task.title == "New Title"
+    assert task.version == 1
     assert task.description == "New Description"
@@ -0,0 +1,94 @@
+import datetime
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from model_bakery import baker
+from kanban_app.archive import archive_stale_tasks, search_archived_tasks
+from kanban_app.models import Project, Board, Column, Task, TaskStatusHistory
+
+
+@pytest.fixture
+def board():
+    project = baker.make(Project)
+    return baker.make(Board, project=project)
+
+
+@pytest.fixture
+def done_column(board):
+    return baker.make(Column, board=board, name="Done", order=1, is_terminal=True)
+
+
+def make_done_task(column, days_ago, **kwargs):
+    task = baker.make(Task, column=column, **kwargs)
+    history = TaskStatusHistory.objects.create(task=task, new_column=column)
+    TaskStatusHistory.objects.filter(id=history.id).update(
+        changed_at=timezone.now() - datetime.timedelta(days=days_ago)
+    )
+    return task
+
+
+@pytest.mark.django_db
+def test_archive_stale_tasks_only_archives_old_terminal_tasks(board, done_column):
+    todo = baker.make(Column, board=board, name="To Do", order=0)
+    stale = make_done_task(done_column, days_ago=30)
+    fresh = make_done_task(done_column, days_ago=1)
+    not_done = make_done_task(todo, days_ago=30)
+
+    assert archive_stale_tasks(days=14, batch_size=1) == 1
+
+    assert list(done_column.tasks.all()) == [fresh]
+    assert Task.objects.filter(id=not_done.id).exists()
+    stale.refresh_from_db()
+    assert stale.archived_at is not None
+    # History stays attached to the archived task
+    assert stale.status_history.count() == 1
+
+
+@pytest.mark.django_db
+def test_archive_command_dry_run(board, done_column):
+    make_done_task(done_column, days_ago=30)
+    call_command("archive_tasks", "--days", "14", "--dry-run")
+    assert Task.objects.count() == 1
+
+    call_command("archive_tasks", "--days", "14")
+    assert Task.objects.count() == 0
+    assert Task.all_objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_search_and_restore_archived_task(board, done_column, admin_client):
+    kept = baker.make(Task, column=done_column, order=0)
+    task = make_done_task(done_column, days_ago=30, title="Fix login bug", order=1)
+    archive_stale_tasks(days=14)
+    Task.objects.filter(id=kept.id).update(order=5)
+
+    assert list(search_archived_tasks(board.project_id, "login")) == [task]
+    assert not search_archived_tasks(board.project_id, "signup").exists()
+
+    response = admin_client.post(f"/api/tasks/{task.id}/restore")
+    assert response.status_code == 200
+    task.refresh_from_db()
+    assert task.archived_at is None
+    assert task.order == 6
+
+
+@pytest.mark.django_db
+def test_archive_endpoint_rejects_non_terminal_tasks(board, done_column, admin_client):
+    todo = baker.make(Column, board=board, order=0)
+    task = baker.make(Task, column=todo)
+    response = admin_client.post(f"/api/tasks/{task.id}/archive")
+    assert response.status_code == 400
+
+    done_task = baker.make(Task, column=done_column)
+    response = admin_client.post(f"/api/tasks/{done_task.id}/archive")
+    assert response.status_code == 200
+    assert not Task.objects.filter(id=done_task.id).exists()
+
+
+@pytest.mark.django_db
+def test_get_project_archive(board, done_column, admin_client):
+    make_done_task(done_column, days_ago=30, title="Archived thing")
+    archive_stale_tasks(days=14)
+    response = admin_client.get(f"/api/projects/{board.project_id}/archive?q=thing")
+    assert response.status_code == 200
+    assert b"Archived thing" in response.content
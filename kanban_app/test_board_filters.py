@@ -0,0 +1,126 @@
+import datetime
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from model_bakery import baker
+from kanban_app.boards import filter_tasks
+from kanban_app.models import ProjectMembership, SavedFilter, Tag, Task
+
+User = get_user_model()
+
+
+@pytest.fixture
+def board(board, user):
+    """The shared board with tagged tasks to do, one of them the user's"""
+    project = board.project
+    todo = board.columns.first()
+    bug = baker.make(Tag, project=project, name="bug")
+    feature = baker.make(Tag, project=project, name="feature")
+    mine = baker.make(Task, column=todo, title="Fix crash", assigned_to=user)
+    mine.tags.add(bug, feature)
+    baker.make(Task, column=todo, title="Write docs", description="about bugs")
+    other = baker.make(
+        Task, column=todo, title="Add export", assigned_to=baker.make(User)
+    )
+    other.tags.add(feature)
+    return board
+
+
+def titles(filters, user):
+    return set(
+        filter_tasks(Task.objects.all(), filters, user.id).values_list(
+            "title", flat=True
+        )
+    )
+
+
+@pytest.mark.django_db
+def test_filter_tasks(board, user):
+    bug, feature = Tag.objects.order_by("name")
+    assert titles({"tags": [bug.id]}, user) == {"Fix crash"}
+    # Any of the tags, without duplicates for tasks having both
+    assert titles({"tags": [bug.id, feature.id]}, user) == {"Fix crash", "Add export"}
+    assert titles({"assignee": "me"}, user) == {"Fix crash"}
+    assert titles({"assignee": "none"}, user) == {"Write docs"}
+    assert titles({"q": "BUG"}, user) == {"Write docs"}
+    assert titles({"assignee": "me", "tags": [feature.id]}, user) == {"Fix crash"}
+
+    Task.objects.filter(title="Write docs").update(
+        updated_at=timezone.now() - datetime.timedelta(days=10)
+    )
+    since = (timezone.now() - datetime.timedelta(days=2)).date().isoformat()
+    assert titles({"updated_since": since}, user) == {"Fix crash", "Add export"}
+
+
+@pytest.mark.django_db
+def test_filtered_columns_are_cached_until_the_board_changes(
+    board, client, django_assert_num_queries
+):
+    url = f"/api/boards/{board.id}/columns"
+    response = client.get(url, {"assignee": "me"})
+    content = response.content.decode()
+    assert "Fix crash" in content
+    assert "Write docs" not in content
+    assert 'data-filtered="true"' in content
+
+    # Only the board: the session, user and columns come from caches
+    with django_assert_num_queries(1):
+        assert client.get(url, {"assignee": "me"}).content == response.content
+
+    task = Task.objects.get(title="Fix crash")
+    client.post(f"/api/tasks/{task.id}/update_details", {"title": "Fixed crash"})
+    assert "Fixed crash" in client.get(url, {"assignee": "me"}).content.decode()
+
+
+@pytest.mark.django_db
+def test_unknown_assignee_is_refused(board, client, user):
+    url = f"/api/boards/{board.id}/columns"
+    assert client.get(url, {"assignee": "bob"}).status_code == 422
+    response = client.post(
+        f"/api/boards/{board.id}/filters",
+        {"assignee": "bob"},
+        headers={"HX-Prompt": "Bob"},
+    )
+    assert response.status_code == 422
+    assert not SavedFilter.objects.exists()
+
+    # Saved before the check, the assignee is ignored
+    saved = SavedFilter.objects.create(
+        user=user, board=board, name="Bob", params={"assignee": "bob", "q": "crash"}
+    )
+    response = client.get(url, {"saved": saved.id})
+    assert response.status_code == 200
+    assert "Fix crash" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_saved_filters(board, client, member_client, user):
+    bug = Tag.objects.get(name="bug")
+    response = client.post(
+        f"/api/boards/{board.id}/filters",
+        {"tags": [bug.id]},
+        headers={"HX-Prompt": "Bugs"},
+    )
+    assert response.status_code == 200
+    # Saving under the same name replaces the filter
+    client.post(
+        f"/api/boards/{board.id}/filters",
+        {"tags": [bug.id], "q": "crash"},
+        headers={"HX-Prompt": "Bugs"},
+    )
+    saved = SavedFilter.objects.get(user=user, board=board)
+    assert saved.params == {"tags": [bug.id], "q": "crash"}
+
+    assert "Bugs" in client.get(f"/api/boards/{board.id}/filters").content.decode()
+    content = client.get(
+        f"/api/boards/{board.id}/columns", {"saved": saved.id}
+    ).content.decode()
+    assert "Fix crash" in content
+    assert "Add export" not in content
+
+    other = member_client(ProjectMembership.Role.VIEWER)
+    response = other.get(f"/api/boards/{board.id}/columns", {"saved": saved.id})
+    assert response.status_code == 404
+
+    client.delete(f"/api/filters/{saved.id}")
+    assert not SavedFilter.objects.exists()
@@ -0,0 +1,216 @@
+import io
+import json
+import click
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+from django.utils import timezone
+from rich.console import Console
+from rich.prompt import IntPrompt, Prompt
+from kanban_app import interactive_cli
+from kanban_app.interactive_cli import BoardView
+from kanban_app.models import Project, Board, Column, Task, Tag, TaskStatusHistory
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+@pytest.fixture
+def board():
+    project = baker.make(Project)
+    board = baker.make(Board, project=project, name="CLI Board")
+    tag = baker.make(Tag, project=project, name="bug")
+    for order, name in enumerate(["To Do", "Doing", "Done"]):
+        column = baker.make(Column, board=board, name=name, order=order)
+        for task_order in range(5):
+            task = baker.make(
+                Task,
+                column=column,
+                order=task_order,
+                title=f"{name} task {task_order}",
+                project_task_id=order * 10 + task_order,
+            )
+            task.tags.add(tag)
+    return board
+
+
+def render_text(view):
+    console = Console(width=200, record=True)
+    console.print(view.render())
+    return console.export_text()
+
+
+@pytest.mark.django_db
+def test_board_view_loads_with_constant_queries(board, django_assert_num_queries):
+    # version, columns, tasks, tags
+    with django_assert_num_queries(4):
+        view = BoardView(board)
+    with django_assert_num_queries(0):
+        text = render_text(view)
+    assert "Done task 4" in text
+    assert "[bug]" in text
+
+
+@pytest.mark.django_db
+def test_board_view_filters_and_pages_columns(board):
+    view = BoardView(board, column_names=("done",), page_size=2)
+    assert view.page_count == 3
+
+    text = render_text(view)
+    assert "Done task 1" in text
+    assert "Done task 2" not in text
+    assert "To Do" not in text
+
+    view.turn_page(1)
+    assert "Done task 2" in render_text(view)
+    view.turn_page(5)
+    assert view.page == 2
+
+
+@pytest.mark.django_db
+def test_board_view_refreshes_only_changed_columns(board):
+    view = BoardView(board)
+    todo, doing, _ = view.columns
+    Task.objects.filter(column=todo).update(title="Changed")
+    Task.objects.filter(column=doing).update(title="Also changed")
+
+    view.refresh_columns(todo.id)
+
+    assert {t.title for t in view.tasks[todo.id]} == {"Changed"}
+    assert "Also changed" not in {t.title for t in view.tasks[doing.id]}
+
+
+@pytest.mark.django_db
+def test_board_version_changes_on_board_edits(board, admin_client):
+    view = BoardView(board)
+    task = Task.objects.filter(column__board=board).first()
+    admin_client.post(
+        f"/api/tasks/{task.id}/move", {"new_column_id": task.column_id, "new_order": 3}
+    )
+    board.refresh_from_db()
+    assert board.version == view.version + 1
+
+
+@pytest.mark.django_db
+def test_prompts_append_after_gaps(board, monkeypatch):
+    project = board.project
+    todo, doing = Column.objects.filter(board=board).order_by("order")[:2]
+    # Archiving leaves To Do at orders 0, 1, 3, 4
+    Task.objects.filter(column=todo, order=2).update(archived_at=timezone.now())
+    answers = iter(["Prompted", "", ""])
+    monkeypatch.setattr(Prompt, "ask", lambda *args, **kwargs: next(answers))
+    int_answers = iter([1, 10, 1])
+    monkeypatch.setattr(IntPrompt, "ask", lambda *args, **kwargs: next(int_answers))
+    view = BoardView(board)
+
+    interactive_cli.create_task(view, project)
+    interactive_cli.change_task_status(view)
+
+    assert list(todo.tasks.values_list("title", "order")) == [
+        ("To Do task 0", 0),
+        ("To Do task 1", 1),
+        ("To Do task 3", 3),
+        ("To Do task 4", 4),
+        ("Prompted", 5),
+        ("Doing task 0", 6),
+    ]
+    assert not doing.tasks.filter(title="Doing task 0").exists()
+
+
+def run_json(capsys, *args):
+    capsys.readouterr()
+    call_command("kanban", *args)
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+@pytest.mark.django_db
+def test_scripted_subcommands(board, capsys):
+    project = board.project
+    Project.objects.filter(id=project.id).update(next_task_id=100)
+    baker.make(User, username="alice")
+
+    (tasks,) = run_json(capsys, "list", "--project", project.id, "--column", "done")
+    assert [t["title"] for t in tasks] == [f"Done task {i}" for i in range(5)]
+
+    (created,) = run_json(
+        capsys,
+        "create",
+        "--project", project.id,
+        "--title", "Scripted",
+        "--column", "to do",
+        "--tag", "bug",
+    )  # fmt: skip
+    assert created["project_task_id"] == 100
+    assert created["order"] == 5
+    assert created["tags"] == ["bug"]
+
+    (assigned,) = run_json(
+        capsys, "assign", "--project", project.id, "--task", 100, "--user", "alice"
+    )
+    assert assigned["assigned_to"] == "alice"
+
+    (moved,) = run_json(
+        capsys, "move", "--project", project.id, "--task", 100, "--column", "Done"
+    )
+    assert moved["column"] == "Done"
+    assert TaskStatusHistory.objects.filter(task_id=moved["id"]).count() == 2
+
+    (untagged,) = run_json(
+        capsys, "tag", "--project", project.id, "--task", 100, "--remove", "bug"
+    )
+    assert untagged["tags"] == []
+
+    (exported,) = run_json(capsys, "export", "--project", project.id)
+    assert [c["name"] for c in exported["columns"]] == ["To Do", "Doing", "Done"]
+    assert len(exported["tasks"]) == 16
+
+
+@pytest.mark.django_db
+def test_hidden_columns_are_left_out_of_lists_and_exports(board, capsys):
+    project = board.project
+    Column.objects.filter(board=board, name="Doing").update(is_deleted=True)
+
+    (tasks,) = run_json(capsys, "list", "--project", project.id)
+    assert {t["column"] for t in tasks} == {"To Do", "Done"}
+
+    (exported,) = run_json(capsys, "export", "--project", project.id)
+    assert [c["name"] for c in exported["columns"]] == ["To Do", "Done"]
+    assert len(exported["tasks"]) == 10
+
+
+@pytest.mark.django_db
+def test_batch_applies_all_lines_in_one_transaction(board, capsys, monkeypatch):
+    project = board.project
+    Project.objects.filter(id=project.id).update(next_task_id=100)
+    lines = [
+        json.dumps({"op": "create", "title": f"Batch {i}", "column": "Doing"})
+        for i in range(20)
+    ]
+    lines.append(json.dumps({"op": "move", "project_task_id": 119, "column": "Done"}))
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(lines)))
+
+    results = run_json(capsys, "batch", "--project", project.id)
+
+    assert [t["project_task_id"] for t in results[:20]] == list(range(100, 120))
+    assert results[-1]["column"] == "Done"
+    project.refresh_from_db()
+    assert project.next_task_id == 120
+    board.refresh_from_db()
+    assert board.version == 1
+
+
+@pytest.mark.django_db
+def test_batch_rolls_back_on_error(board, monkeypatch):
+    project = board.project
+    lines = [
+        json.dumps({"op": "create", "title": "Kept?", "column": "Doing"}),
+        json.dumps({"op": "move", "project_task_id": 999, "column": "Done"}),
+    ]
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(lines)))
+
+    with pytest.raises(click.exceptions.Exit):
+        call_command("kanban", "batch", "--project", project.id)
+
+    assert not Task.objects.filter(title="Kept?").exists()
+    project.refresh_from_db()
+    assert project.next_task_id == 1
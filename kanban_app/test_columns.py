@@ -0,0 +1,128 @@
+import pytest
+from django.utils import timezone
+from model_bakery import baker
+from kanban_app.columns import move_column_tasks
+from kanban_app.consistency import check_orders
+from kanban_app.models import (
+    Board,
+    Column,
+    Job,
+    Project,
+    ProjectStats,
+    Task,
+    TaskStatusHistory,
+)
+from kanban_app.task_events import record_task_events
+
+
+@pytest.fixture
+def board():
+    return baker.make(Board, project=baker.make(Project))
+
+
+@pytest.mark.django_db
+def test_delete_column_moves_tasks_to_another_column(board, admin_client):
+    column = baker.make(Column, board=board, name="Old", order=0)
+    target = baker.make(Column, board=board, name="Target", order=1)
+    existing = baker.make(Task, column=target, order=0)
+    # Gaps in the orders are closed
+    baker.make(Task, column=target, order=1, archived_at=timezone.now())
+    moved = [baker.make(Task, column=column, order=order * 2) for order in range(3)]
+    archived = baker.make(Task, column=column, order=3, archived_at=timezone.now())
+    baker.make(TaskStatusHistory, task=moved[0], new_column=column)
+    baker.make(TaskStatusHistory, task=existing, old_column=column, new_column=target)
+
+    response = admin_client.delete(f"/api/columns/{column.id}?move_to={target.id}")
+
+    assert response.status_code == 200
+    assert response.json() == {"job_id": None}
+    assert not Job.objects.exists()
+    assert not Column.all_objects.filter(id=column.id).exists()
+    assert list(Task.objects.filter(column=target).values_list("id", "order")) == [
+        (existing.id, 0),
+        *((task.id, order) for order, task in enumerate(moved, 1)),
+    ]
+    assert Task.all_objects.get(id=archived.id).column_id == target.id
+    assert check_orders("default", "task") == []
+    # The moves are recorded with the deleted column as None
+    assert set(
+        TaskStatusHistory.objects.values_list(
+            "task_id", "old_column_id", "new_column_id"
+        )
+    ) == {
+        (moved[0].id, None, None),
+        (existing.id, None, target.id),
+        *((task.id, None, target.id) for task in moved),
+    }
+    board.refresh_from_db()
+    assert board.version == 1
+
+
+@pytest.mark.django_db
+def test_moving_a_columns_tasks_loads_none_of_them(board, monkeypatch):
+    column = baker.make(Column, board=board, order=0)
+    target = baker.make(Column, board=board, order=1, is_terminal=True)
+    baker.make(Task, column=column, _quantity=3)
+    baker.make(Task, column=column, archived_at=timezone.now())
+
+    def from_db(cls, *args, **kwargs):
+        raise AssertionError("A task was loaded")
+
+    monkeypatch.setattr(Task, "from_db", classmethod(from_db))
+    with record_task_events("tester") as events:
+        assert move_column_tasks(events, column, target) == 3
+    assert TaskStatusHistory.objects.filter(new_column=target).count() == 3
+    assert ProjectStats.objects.get(project=board.project).done_count == 3
+
+
+@pytest.mark.django_db
+def test_delete_column_only_moves_tasks_within_the_board(board, admin_client):
+    column = baker.make(Column, board=board)
+    elsewhere = baker.make(Column, board=baker.make(Board, project=baker.make(Project)))
+    baker.make(Task, column=column)
+
+    for move_to in (elsewhere.id, column.id):
+        response = admin_client.delete(f"/api/columns/{column.id}?move_to={move_to}")
+        assert response.status_code == 400
+    assert Column.objects.filter(id=column.id).exists()
+    assert column.tasks.count() == 1
+
+
+@pytest.mark.django_db
+def test_delete_column_archives_tasks_and_restores_to_the_first_column(
+    board, admin_client
+):
+    first = baker.make(Column, board=board, name="First", order=0)
+    column = baker.make(Column, board=board, name="Old", order=1)
+    tasks = baker.make(Task, column=column, _quantity=2)
+
+    response = admin_client.delete(f"/api/columns/{column.id}?archive=true")
+
+    assert response.json() == {"job_id": None}
+    assert not Column.objects.filter(id=column.id).exists()
+    assert not Task.objects.filter(column=column).exists()
+    assert (
+        Task.all_objects.filter(column=column, archived_at__isnull=False).count() == 2
+    )
+
+    response = admin_client.post(f"/api/tasks/{tasks[0].id}/restore")
+
+    assert response.status_code == 200
+    assert list(first.tasks.all()) == [tasks[0]]
+
+    first.delete()
+    response = admin_client.post(f"/api/tasks/{tasks[1].id}/restore")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_delete_column_form_offers_the_other_columns(board, admin_client):
+    column = baker.make(Column, board=board, name="Old", order=0)
+    baker.make(Column, board=board, name="Target", order=1)
+    baker.make(Column, board=board, name="Gone", order=2, is_deleted=True)
+
+    response = admin_client.get(f"/api/columns/{column.id}/delete/form")
+
+    content = response.content.decode()
+    assert "Target" in content
+    assert "Gone" not in content
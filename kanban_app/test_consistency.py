@@ -0,0 +1,100 @@
+import click
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from model_bakery import baker
+from kanban_app.consistency import check_boards, repair_boards
+from kanban_app.models import Board, Column, Project, Task
+
+
+def make_board(orders=(0, 1, 2), next_task_id=None):
+    """A board with one column holding tasks at these orders, numbered #1, #2, ..."""
+    project = baker.make(Project, next_task_id=next_task_id or len(orders) + 1)
+    board = baker.make(Board, project=project)
+    column = baker.make(Column, board=board, order=0)
+    baker.make(Column, board=board, order=1)
+    for number, order in enumerate(orders, 1):
+        baker.make(Task, column=column, order=order, project_task_id=number)
+    return board
+
+
+def checks(project_id=None):
+    return [violation["check"] for violation in check_boards("default", project_id)]
+
+
+@pytest.mark.django_db
+def test_consistent_boards_pass():
+    make_board()
+    # Archived tasks and deleted columns keep their old positions
+    board = make_board()
+    baker.make(Task, column=board.columns.first(), order=1, archived_at=timezone.now())
+    baker.make(Column, board=board, order=1, is_deleted=True)
+
+    assert checks() == []
+    call_command("check_boards")
+
+
+@pytest.mark.django_db
+def test_orders_are_renumbered_in_their_current_order(django_assert_max_num_queries):
+    board = make_board(orders=(0, 2, 2, 7))
+    Column.objects.filter(board=board, order=1).update(order=5)
+    column = board.columns.first()
+    before = list(column.tasks.order_by("order", "id").values_list("id", flat=True))
+    other = make_board()
+
+    with django_assert_max_num_queries(3):
+        assert checks() == ["column order", "task order"]
+    repair_boards("default")
+
+    assert checks() == []
+    assert list(column.tasks.values_list("id", "order")) == [
+        (task_id, order) for order, task_id in enumerate(before)
+    ]
+    assert list(board.columns.values_list("order", flat=True)) == [0, 1]
+    column.refresh_from_db()
+    assert column.version == 1
+    assert Board.objects.get(id=board.id).version == board.version + 1
+    assert Board.objects.get(id=other.id).version == other.version
+
+
+@pytest.mark.django_db
+def test_task_ids_are_made_unique_and_the_counter_moved_past_them():
+    board = make_board(next_task_id=2)
+    tasks = list(Task.objects.filter(column__board=board).order_by("id"))
+    Task.objects.filter(id=tasks[2].id).update(project_task_id=1)
+
+    violations = check_boards("default")
+    assert [violation["check"] for violation in violations] == [
+        "task ID counter",
+        "duplicate task IDs",
+    ]
+    assert violations[1]["detail"] == "#1 (2 tasks)"
+
+    repair_boards("default")
+
+    assert checks() == []
+    numbers = list(
+        Task.objects.order_by("id").values_list("project_task_id", flat=True)
+    )
+    assert numbers == [1, 2, 3]
+    assert Project.objects.get(id=board.project_id).next_task_id == 4
+
+
+@pytest.mark.django_db
+def test_command_reports_then_repairs(capsys):
+    # Gaps alone are not an error
+    make_board(orders=(3,))
+    call_command("check_boards")
+    output = capsys.readouterr().out
+    assert "Only gaps found" in output
+    assert "No problems found" not in output
+    broken = make_board(orders=(0, 0))
+
+    with pytest.raises(click.exceptions.Exit):
+        call_command("check_boards", "--project", broken.project_id)
+    output = capsys.readouterr()
+    assert f"Project {broken.project_id}" in output.out
+    assert "1 problem(s) found" in output.err
+
+    call_command("check_boards", "--repair")
+    assert checks() == []
@@ -0,0 +1,106 @@
+import datetime
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from model_bakery import baker
+from kanban_app.archive import archive_stale_tasks
+from kanban_app.models import Board, Column, Project, Task
+
+User = get_user_model()
+
+
+def make_board(name):
+    board = baker.make(Board, project=baker.make(Project, name=name))
+    todo = baker.make(Column, board=board, name="To Do", order=0)
+    done = baker.make(Column, board=board, name="Done", order=1, is_terminal=True)
+    return todo, done
+
+
+@pytest.mark.django_db
+def test_my_work_lists_assigned_tasks_by_project_and_column(client, user):
+    todo, done = make_board("Alpha")
+    other_todo, _ = make_board("Beta")
+    baker.make(Task, column=todo, title="Alpha task", assigned_to=user)
+    baker.make(Task, column=done, title="Alpha done", assigned_to=user)
+    baker.make(Task, column=other_todo, title="Beta task", assigned_to=user)
+    baker.make(Task, column=todo, title="Not mine", assigned_to=baker.make(User))
+    baker.make(
+        Task,
+        column=todo,
+        title="Archived",
+        assigned_to=user,
+        archived_at=timezone.now(),
+    )
+    deleted, _ = make_board("Deleted")
+    baker.make(Task, column=deleted, title="Deleted project", assigned_to=user)
+    deleted.board.project.delete()
+
+    content = client.get("/api/my-work").content.decode()
+
+    assert (
+        content.index("Alpha task")
+        < content.index("Alpha done")
+        < content.index("Beta task")
+    )
+    for title in ("Not mine", "Archived", "Deleted project"):
+        assert title not in content
+
+
+@pytest.mark.django_db
+def test_my_work_is_cached_until_the_users_tasks_change(
+    board, client, user, django_capture_on_commit_callbacks
+):
+    todo, _, done = board.columns.all()
+    task = baker.make(Task, column=todo, title="First", assigned_to=user)
+    other = baker.make(Task, column=todo, title="Second")
+    client.get("/api/my-work")
+
+    with CaptureQueriesContext(connection) as queries:
+        client.get("/api/my-work")
+    # The session, the user and the tasks all come from caches
+    assert len(queries) == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(f"/api/tasks/{other.id}/assign", {"user_id": user.id})
+    assert "Second" in client.get("/api/my-work").content.decode()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(
+            f"/api/tasks/{task.id}/move", {"new_column_id": done.id, "new_order": 0}
+        )
+    content = client.get("/api/my-work").content.decode()
+    assert content.index("Second") < content.index("First")
+
+
+@pytest.mark.django_db
+def test_my_work_is_dropped_by_reorders_and_bulk_archives(
+    board, client, user, django_capture_on_commit_callbacks
+):
+    todo, _, done = board.columns.all()
+    first = baker.make(Task, column=todo, title="First", assigned_to=user, order=0)
+    baker.make(Task, column=todo, title="Second", assigned_to=user, order=1)
+    finished = baker.make(Task, column=done, title="Finished", assigned_to=user)
+    content = client.get("/api/my-work").content.decode()
+    assert content.index("First") < content.index("Second")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(
+            f"/api/tasks/{first.id}/move", {"new_column_id": todo.id, "new_order": 1}
+        )
+    content = client.get("/api/my-work").content.decode()
+    assert content.index("Second") < content.index("First")
+
+    Task.objects.filter(id=finished.id).update(
+        updated_at=timezone.now() - datetime.timedelta(days=30)
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        assert archive_stale_tasks(days=7) == 1
+    assert "Finished" not in client.get("/api/my-work").content.decode()
+
+
+@pytest.mark.django_db
+def test_my_work_needs_a_login():
+    assert Client().get("/api/my-work").status_code == 401
@@ -0,0 +1,153 @@
+import random
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import Client
+from model_bakery import baker
+from kanban_app.boards import board_columns
+from kanban_app.dependencies import (
+    DependencyCycleError,
+    DependencyError,
+    add_dependency,
+    remove_dependency,
+)
+from kanban_app.models import Board, Column, Project, Task, TaskDependency
+
+User = get_user_model()
+
+
+@pytest.fixture
+def board():
+    project = baker.make(Project)
+    board = baker.make(Board, project=project)
+    baker.make(Column, board=board, name="To Do", order=0)
+    baker.make(Column, board=board, name="Done", order=1, is_terminal=True)
+    return board
+
+
+def make_tasks(board, count):
+    todo = board.columns.get(name="To Do")
+    return [
+        baker.make(Task, column=todo, order=i, project_task_id=i + 1)
+        for i in range(count)
+    ]
+
+
+def assert_topological(board):
+    edges = TaskDependency.objects.filter(project=board.project).values_list(
+        "upstream__dependency_rank", "downstream__dependency_rank"
+    )
+    assert all(upstream < downstream for upstream, downstream in edges)
+    ranks = list(
+        Task.all_objects.filter(
+            column__board=board, dependency_rank__isnull=False
+        ).values_list("dependency_rank", flat=True)
+    )
+    assert len(ranks) == len(set(ranks))
+
+
+@pytest.mark.django_db
+def test_backward_edge_reorders_and_cycles_are_rejected(board):
+    a, b, c, d = make_tasks(board, 4)
+    add_dependency(a, b)
+    add_dependency(c, d)
+    # d was ranked after b, so this edge points backwards and forces a reorder
+    add_dependency(d, a)
+    assert_topological(board)
+
+    with pytest.raises(DependencyCycleError):
+        add_dependency(b, c)
+    with pytest.raises(DependencyCycleError):
+        add_dependency(a, a)
+    assert TaskDependency.objects.count() == 3
+
+    # Adding an edge twice is a no-op
+    add_dependency(a, b)
+    assert TaskDependency.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_random_edges_match_a_full_reachability_check(board):
+    tasks = make_tasks(board, 40)
+    rng = random.Random(1234)
+    successors: dict[int, set[int]] = {task.id: set() for task in tasks}
+
+    def reaches(start, goal):
+        seen, stack = {start}, [start]
+        while stack:
+            node = stack.pop()
+            if node == goal:
+                return True
+            for nxt in successors[node] - seen:
+                seen.add(nxt)
+                stack.append(nxt)
+        return False
+
+    for _ in range(150):
+        upstream, downstream = rng.sample(tasks, 2)
+        if reaches(downstream.id, upstream.id):
+            with pytest.raises(DependencyCycleError):
+                add_dependency(upstream, downstream)
+        else:
+            add_dependency(upstream, downstream)
+            successors[upstream.id].add(downstream.id)
+
+    assert_topological(board)
+    assert TaskDependency.objects.count() == sum(map(len, successors.values()))
+
+
+@pytest.mark.django_db
+def test_tasks_in_other_projects_cannot_block(board):
+    (task,) = make_tasks(board, 1)
+    other = baker.make(Task, column__board__project=baker.make(Project))
+    with pytest.raises(DependencyError):
+        add_dependency(other, task)
+
+
+@pytest.mark.django_db
+def test_blocked_status_follows_upstream_state(board, django_assert_num_queries):
+    a, b, c = make_tasks(board, 3)
+    add_dependency(a, b)
+    add_dependency(b, c)
+
+    def blocked():
+        # columns, tasks with their blocked status, tags
+        with django_assert_num_queries(3):
+            columns = list(board_columns(board))
+            return {t.title for col in columns for t in col.tasks.all() if t.is_blocked}
+
+    assert blocked() == {b.title, c.title}
+
+    Task.objects.filter(id=a.id).update(column=board.columns.get(name="Done"))
+    assert blocked() == {c.title}
+
+    remove_dependency(b.id, c.id)
+    assert blocked() == set()
+
+
+@pytest.mark.django_db
+def test_dependency_endpoints():
+    user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+    client = Client()
+    client.force_login(user)
+    project = baker.make(Project)
+    column = baker.make(Column, board__project=project)
+    a = baker.make(Task, column=column, project_task_id=1)
+    b = baker.make(Task, column=column, project_task_id=2)
+
+    response = client.post(
+        f"/api/tasks/{b.id}/dependencies", {"upstream_project_task_id": 1}
+    )
+    assert response.status_code == 200
+    assert TaskDependency.objects.filter(upstream=a, downstream=b).exists()
+
+    response = client.post(
+        f"/api/tasks/{a.id}/dependencies", {"upstream_project_task_id": 2}
+    )
+    assert response.status_code == 400
+
+    response = client.get(f"/api/tasks/{b.id}/details")
+    assert "Blocked by" in response.content.decode()
+
+    response = client.delete(f"/api/tasks/{b.id}/dependencies/{a.id}")
+    assert response.status_code == 200
+    assert not TaskDependency.objects.exists()
@@ -0,0 +1,151 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import Client
+from model_bakery import baker
+from kanban_app.fragment_cache import FRAGMENT_CACHE, fragment_cache_stats
+from kanban_app.models import Board, Column, Project, ProjectMembership, Tag, Task
+
+
+@pytest.fixture
+def board():
+    project = baker.make(Project)
+    board = baker.make(Board, project=project)
+    user = baker.make(User, username="ann")
+    baker.make(ProjectMembership, project=project, user=user)
+    for order in range(2):
+        column = baker.make(Column, board=board, order=order, name=f"Column {order}")
+        for task_order in range(3):
+            baker.make(
+                Task,
+                column=column,
+                order=task_order,
+                title=f"Task {order}.{task_order}",
+                assigned_to=user,
+            )
+    return board
+
+
+def render_board(client, board):
+    response = client.get(f"/api/boards/{board.id}/columns")
+    assert response.status_code == 200
+    return response.content.decode()
+
+
+@pytest.mark.django_db
+def test_unchanged_board_is_served_without_loading_columns(
+    board, django_assert_num_queries, admin_client
+):
+    client = admin_client
+    html = render_board(client, board)
+    caches[FRAGMENT_CACHE].reset_stats()
+
+    # Only the board lookup
+    with django_assert_num_queries(1):
+        assert render_board(client, board) == html
+    assert fragment_cache_stats()["hits"] == 1
+
+
+@pytest.mark.django_db
+def test_moving_a_task_renders_only_its_card_again(board, admin_client):
+    client = admin_client
+    render_board(client, board)
+    source, target = board.columns.all()
+    task = source.tasks.first()
+    caches[FRAGMENT_CACHE].reset_stats()
+
+    response = client.post(
+        f"/api/tasks/{task.id}/move", {"new_column_id": target.id, "new_order": 0}
+    )
+    assert response.status_code == 204
+    html = render_board(client, board)
+
+    stats = fragment_cache_stats()
+    # The board, both columns and the moved card, the other five cards are reused
+    assert stats["misses"] == 4
+    assert stats["hits"] == 5
+    assert stats["hit_rate"] == pytest.approx(5 / 9)
+    assert html.index(task.title) > html.index("Column 1")
+
+
+@pytest.mark.django_db
+def test_tag_changes_refresh_the_card(board, admin_client):
+    client = admin_client
+    task = Task.objects.filter(column__board=board).first()
+    render_board(client, board)
+    tag = baker.make(Tag, project=board.project, name="Urgent")
+
+    client.post(f"/api/tasks/{task.id}/tags", {"tags": [tag.id]})
+    assert "Urgent" in render_board(client, board)
+
+    # Renaming outside the app leaves the task and board untouched
+    tag.name = "Later"
+    tag.save()
+    html = client.get(
+        f"/api/boards/{board.id}/columns", {"q": task.title}
+    ).content.decode()
+    assert "Later" in html
+
+
+@pytest.mark.django_db
+def test_cards_are_shared_between_users(board):
+    task = Task.objects.filter(column__board=board).first()
+    ann = task.assigned_to
+    bob = baker.make(User)
+    baker.make(ProjectMembership, project=board.project, user=bob)
+    client = Client()
+    client.force_login(ann)
+    html = render_board(client, board)
+    client.force_login(bob)
+    caches[FRAGMENT_CACHE].reset_stats()
+
+    assert render_board(client, board) == html
+    assert 'hx-vals=\'{"user_id": "me"}\'' in html
+    assert f'data-assignee="{ann.id}"' in html
+
+    response = client.post(f"/api/tasks/{task.id}/assign", {"user_id": "me"})
+    assert response.status_code == 200
+    task.refresh_from_db()
+    assert task.assigned_to == bob
+
+
+@pytest.mark.django_db
+def test_fragment_cache_stats_are_for_staff(board):
+    client = Client()
+    client.force_login(User.objects.get(username="ann"))
+    render_board(client, board)
+    assert client.get("/api/fragments/stats").status_code == 403
+
+    client.force_login(User.objects.create_superuser("admin", "a@example.com", "pw"))
+    stats = client.get("/api/fragments/stats").json()
+
+    assert stats["misses"] == 9
+    assert stats["entries"] == 9
+
+
+@pytest.mark.django_db
+def test_admin_edits_refresh_the_board(board, admin_client):
+    client = admin_client
+    task = Task.objects.filter(column__board=board).first()
+    tag = baker.make(Tag, project=board.project, name="Urgent", color="#ff0000")
+    task.tags.add(tag)
+    column = task.column
+    assert "Urgent" in render_board(client, board)
+
+    response = client.post(
+        f"/admin/kanban_app/tag/{tag.id}/change/",
+        {"name": "Later", "color": "#ff0000", "project": board.project_id},
+    )
+    assert response.status_code == 302
+    response = client.post(
+        f"/admin/kanban_app/column/{column.id}/change/",
+        {"name": "Renamed", "board": board.id, "order": column.order},
+    )
+    assert response.status_code == 302
+    html = render_board(client, board)
+    assert "Later" in html
+    assert "Renamed" in html
+
+    task.assigned_to.username = "annie"
+    task.assigned_to.save()
+    assert "annie" in render_board(client, board)
@@ -0,0 +1,105 @@
+import datetime
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from model_bakery import baker
+from kanban_app import jobs
+from kanban_app.models import (
+    Board,
+    Column,
+    Job,
+    Project,
+    Task,
+    TaskStatusHistory,
+)
+
+
+@pytest.fixture
+def flaky_handler():
+    calls = []
+
+    @jobs.register("flaky")
+    def flaky(job, fail_times):
+        calls.append(job.attempts)
+        if len(calls) <= fail_times:
+            raise RuntimeError("boom")
+
+    yield calls
+    del jobs.handlers["flaky"]
+
+
+@pytest.mark.django_db
+def test_delete_column_runs_in_the_background(admin_client):
+    board = baker.make(Board, project=baker.make(Project))
+    column = baker.make(Column, board=board, name="Old")
+    other = baker.make(Column, board=board, name="Kept")
+    tasks = baker.make(Task, column=column, _quantity=7)
+    moved_in = baker.make(Task, column=other)
+    baker.make(TaskStatusHistory, task=moved_in, old_column=column, new_column=other)
+    baker.make(TaskStatusHistory, task=moved_in, old_column=other, new_column=column)
+
+    response = admin_client.delete(f"/api/columns/{column.id}")
+    job = Job.objects.get(id=response.json()["job_id"])
+
+    # Hidden right away, deleted by the worker
+    assert not Column.objects.filter(id=column.id).exists()
+    assert Task.objects.filter(id=tasks[0].id).exists()
+    assert job.status == Job.Status.QUEUED
+
+    assert jobs.run_pending_jobs() == 1
+    job.refresh_from_db()
+    assert job.status == Job.Status.SUCCEEDED
+    assert (job.progress, job.total) == (7, 7)
+    assert not Column.all_objects.filter(id=column.id).exists()
+    assert not Task.all_objects.filter(column_id=column.id).exists()
+    assert Task.objects.filter(id=moved_in.id).exists()
+    # The history of the task that passed through the column is kept
+    assert set(
+        TaskStatusHistory.objects.values_list("old_column_id", "new_column_id")
+    ) == {(None, other.id), (other.id, None)}
+
+    status = admin_client.get(f"/api/jobs/{job.id}").json()
+    assert status["status"] == "succeeded"
+
+
+@pytest.mark.django_db
+def test_failed_jobs_are_retried_with_backoff(flaky_handler):
+    job = jobs.enqueue("flaky", max_attempts=2, fail_times=1)
+
+    assert jobs.run_pending_jobs() == 1
+    job.refresh_from_db()
+    assert job.status == Job.Status.QUEUED
+    assert "boom" in job.error
+    # Not due yet
+    assert jobs.run_pending_jobs() == 0
+
+    Job.objects.filter(id=job.id).update(run_at=timezone.now())
+    assert jobs.run_pending_jobs() == 1
+    job.refresh_from_db()
+    assert job.status == Job.Status.SUCCEEDED
+    assert flaky_handler == [1, 2]
+
+
+@pytest.mark.django_db
+def test_jobs_out_of_attempts_fail(flaky_handler):
+    job = jobs.enqueue("flaky", max_attempts=1, fail_times=5)
+    jobs.run_pending_jobs()
+    job.refresh_from_db()
+    assert job.status == Job.Status.FAILED
+    assert job.finished_at is not None
+
+
+@pytest.mark.django_db
+def test_claims_are_exclusive_and_stale_jobs_are_requeued(flaky_handler):
+    job = jobs.enqueue("flaky", fail_times=0)
+    assert jobs.claim_job("worker-1").id == job.id
+    assert jobs.claim_job("worker-2") is None
+
+    Job.objects.filter(id=job.id).update(
+        locked_at=timezone.now() - datetime.timedelta(hours=1)
+    )
+    assert jobs.requeue_stale_jobs() == 1
+    call_command("run_jobs", "--once")
+    job.refresh_from_db()
+    assert job.status == Job.Status.SUCCEEDED
+    assert job.attempts == 2
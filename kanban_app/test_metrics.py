@@ -0,0 +1,108 @@
+import json
+import pytest
+from django.db import OperationalError
+from django.test import Client
+from kanban_app import metrics
+from kanban_app.models import Task
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+
+
+@pytest.mark.django_db
+def test_task_changes_and_board_renders_are_measured(
+    admin_client, board, client, django_capture_on_commit_callbacks
+):
+    todo, _, done = board.columns.order_by("order")
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(f"/api/columns/{todo.id}/tasks", {"title": "Measure"})
+        task = Task.objects.get()
+        client.post(f"/api/tasks/{task.id}/assign", {"user_id": "me"})
+        client.post(
+            f"/api/tasks/{task.id}/move", {"new_column_id": done.id, "new_order": 0}
+        )
+        client.delete(f"/api/tasks/{task.id}")
+    client.get(f"/api/boards/{board.id}/columns")
+
+    content = admin_client.get("/metrics").content.decode()
+    for event in ("created", "moved", "assigned", "deleted"):
+        assert f'kanban_task_events_total{{event="{event}"}} 1\n' in content
+    route = 'route="api/boards/<board_id>/columns"'
+    assert (
+        f'kanban_request_duration_seconds_count{{method="GET",{route}}} 1\n' in content
+    )
+    assert f"kanban_request_queries_count{{{route}}} 1\n" in content
+    assert "kanban_history_write_seconds_count 4\n" in content
+    assert f'kanban_history_file_bytes{{project="{board.project_id}"}} ' in content
+    assert 'kanban_cache_requests_total{cache="fragments",result="miss"} ' in content
+
+
+@pytest.mark.django_db
+def test_metrics_are_for_staff_and_scrapers(client, settings):
+    assert Client().get("/metrics").status_code == 403
+    assert client.get("/metrics").status_code == 403
+
+    settings.KANBAN_METRICS_TOKEN = "s3cret"
+    assert (
+        Client().get("/metrics", headers={"Authorization": "Bearer nope"}).status_code
+        == 403
+    )
+    response = Client().get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert (
+        "# TYPE kanban_request_duration_seconds histogram" in response.content.decode()
+    )
+
+
+def test_histograms_are_cumulative():
+    histogram = metrics.REQUEST_QUERIES
+    for count in (0, 2, 2, 500):
+        histogram.observe(count, route="r")
+
+    lines = metrics.render_metrics().splitlines()
+    assert 'kanban_request_queries_bucket{route="r",le="0"} 1' in lines
+    assert 'kanban_request_queries_bucket{route="r",le="1"} 1' in lines
+    assert 'kanban_request_queries_bucket{route="r",le="2"} 3' in lines
+    assert 'kanban_request_queries_bucket{route="r",le="100"} 3' in lines
+    assert 'kanban_request_queries_bucket{route="r",le="+Inf"} 4' in lines
+    assert 'kanban_request_queries_sum{route="r"} 504' in lines
+
+
+def test_processes_are_added_up_through_the_metrics_dir(settings, tmp_path):
+    settings.KANBAN_METRICS_DIR = str(tmp_path)
+    metrics.TASK_EVENTS.inc(event="created")
+    metrics.REQUEST_QUERIES.observe(3, route="r")
+    # What another worker wrote
+    other = [
+        ["kanban_task_events_total", [["event", "created"]], 2],
+        [
+            "kanban_request_queries",
+            [["route", "r"]],
+            [0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1],
+        ],
+    ]
+    (tmp_path / "1-1.json").write_text(json.dumps(other))
+
+    lines = metrics.render_metrics().splitlines()
+    assert 'kanban_task_events_total{event="created"} 3' in lines
+    assert 'kanban_request_queries_bucket{route="r",le="3"} 2' in lines
+    assert 'kanban_request_queries_count{route="r"} 2' in lines
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_locked_databases_are_counted():
+    def locked(sql, params, many, context):
+        raise OperationalError("database is locked")
+
+    connection = type("Connection", (), {"alias": "shard_1"})
+    with pytest.raises(OperationalError):
+        metrics.QueryCounter()._count(
+            locked, "BEGIN IMMEDIATE", None, False, {"connection": connection}
+        )
+
+    lines = metrics.render_metrics().splitlines()
+    assert 'kanban_db_locked_total{db="shard_1"} 1' in lines
+    assert 'kanban_db_lock_wait_seconds_count{db="shard_1"} 1' in lines
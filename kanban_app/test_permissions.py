@@ -0,0 +1,150 @@
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+from model_bakery import baker
+from kanban_app.models import (
+    Board,
+    Column,
+    Job,
+    Project,
+    ProjectMembership,
+    Tag,
+    Task,
+)
+
+Role = ProjectMembership.Role
+
+
+@pytest.fixture
+def board(board):
+    """The shared board with a "Launch" task to do"""
+    baker.make(Task, column=board.columns.first(), title="Launch")
+    return board
+
+
+@pytest.mark.django_db
+def test_endpoints_need_a_login_and_a_role_in_the_project(board, member_client):
+    column = board.columns.first()
+    task = column.tasks.get()
+    columns_url = f"/api/boards/{board.id}/columns"
+    tasks_url = f"/api/columns/{column.id}/tasks"
+
+    assert Client().get(columns_url).status_code == 401
+    outsider = member_client(None)
+    assert outsider.get(columns_url).status_code == 403
+    assert outsider.get(f"/api/tasks/{task.id}/details").status_code == 403
+    assert outsider.get(f"/project/{board.project_id}/").status_code == 403
+
+    viewer = member_client(Role.VIEWER)
+    assert viewer.get(columns_url).status_code == 200
+    assert viewer.post(tasks_url, {"title": "Land"}).status_code == 403
+
+    member = member_client(Role.MEMBER)
+    assert member.post(tasks_url, {"title": "Land"}).status_code == 200
+    project_url = f"/api/projects/{board.project_id}"
+    assert member.delete(project_url).status_code == 403
+    assert member_client(Role.OWNER).delete(project_url).status_code == 200
+
+
+@pytest.mark.django_db
+def test_roles_are_cached_until_the_membership_changes(
+    board, member_client, django_assert_num_queries
+):
+    user = baker.make(User)
+    client = member_client(None, user=user)
+    url = f"/api/tasks/{board.columns.first().tasks.get().id}/tags/form"
+    assert client.get(url).status_code == 403
+
+    membership = baker.make(
+        ProjectMembership, project=board.project, user=user, role=Role.VIEWER
+    )
+    assert client.get(url).status_code == 200
+    # The task's project, the user and the role come from caches
+    with django_assert_num_queries(3):
+        assert client.get(url).status_code == 200
+
+    membership.delete()
+    assert client.get(url).status_code == 403
+
+
+@pytest.mark.django_db
+def test_only_members_are_offered_and_assigned(board, member_client):
+    task = board.columns.first().tasks.get()
+    client = member_client(Role.MEMBER)
+    colleague = baker.make(User, username="colleague")
+    baker.make(ProjectMembership, project=board.project, user=colleague)
+    baker.make(User, username="stranger")
+
+    for url in (f"/api/tasks/{task.id}/details", f"/api/tasks/{task.id}/assign/form"):
+        content = client.get(url).content.decode()
+        assert "colleague" in content
+        assert "stranger" not in content
+
+    stranger = User.objects.get(username="stranger")
+    response = client.post(f"/api/tasks/{task.id}/assign", {"user_id": stranger.id})
+    assert response.status_code == 400
+    response = client.post(f"/api/tasks/{task.id}/assign", {"user_id": colleague.id})
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_project_list_shows_the_users_projects(board, member_client):
+    client = member_client(Role.VIEWER)
+    baker.make(Project, name="Gemini")
+
+    response = client.post("/api/projects", {"name": "Mercury"})
+    assert response.status_code == 200
+    mercury = Project.objects.get(name="Mercury")
+    assert mercury.memberships.get().role == Role.OWNER
+
+    content = client.get("/api/projects/list").content.decode()
+    assert "Apollo" in content
+    assert "Mercury" in content
+    assert "Gemini" not in content
+
+
+@pytest.mark.django_db
+def test_tasks_cannot_be_moved_to_another_project(board, member_client):
+    task = board.columns.first().tasks.get()
+    task.assigned_to = baker.make(User)
+    task.save()
+    other = baker.make(Column, board=baker.make(Board, project=baker.make(Project)))
+
+    response = member_client(Role.MEMBER).post(
+        f"/api/tasks/{task.id}/move", {"new_column_id": other.id, "new_order": 0}
+    )
+
+    assert response.status_code == 404
+    task.refresh_from_db()
+    assert task.column_id == board.columns.first().id
+
+
+@pytest.mark.django_db
+def test_tasks_only_take_tags_of_their_project(board, member_client):
+    column = board.columns.first()
+    task = column.tasks.get()
+    own = baker.make(Tag, project=board.project, name="bug")
+    foreign = baker.make(Tag, project=baker.make(Project), name="secret")
+    member = member_client(Role.MEMBER)
+
+    response = member.post(f"/api/tasks/{task.id}/tags", {"tags": [own.id, foreign.id]})
+    assert response.status_code == 422
+    response = member.post(
+        f"/api/columns/{column.id}/tasks", {"title": "Land", "tags": [foreign.id]}
+    )
+    assert response.status_code == 422
+    assert not Task.objects.filter(title="Land").exists()
+
+    assert (
+        member.post(f"/api/tasks/{task.id}/tags", {"tags": [own.id]}).status_code == 200
+    )
+    assert list(task.tags.all()) == [own]
+
+
+@pytest.mark.django_db
+def test_jobs_without_a_project_are_for_staff(board, member_client):
+    job = baker.make(Job, name="archive_tasks", params={"days": 30})
+    url = f"/api/jobs/{job.id}"
+
+    assert member_client(Role.OWNER).get(url).status_code == 403
+    assert member_client(None, is_staff=True).get(url).status_code == 200
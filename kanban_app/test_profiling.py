@@ -0,0 +1,94 @@
+import json
+import pytest
+from model_bakery import baker
+from kanban_app.models import RequestProfile, Task
+from kanban_app.profiling import RequestProfiler, flame_graph, folded_stacks
+
+
+@pytest.fixture
+def board(board):
+    """The shared board with three tasks to do"""
+    baker.make(Task, column=board.columns.first(), title="Profile me", _quantity=3)
+    return board
+
+
+def slow_profile() -> RequestProfile:
+    """A saved profile of a request spending 30 ms in `slow`, 10 of them in `query`"""
+    profiler = RequestProfiler(interval=0.001)
+    frames = [("view", "kanban_app/views.py", 1), ("slow", "kanban_app/views.py", 9)]
+    profiler.sampler.stacks[tuple(frames)] = 0.02
+    profiler.sampler.stacks[(*frames, ("query", "django/db.py", 5))] = 0.01
+    return baker.make(RequestProfile, duration_ms=30, samples=profiler.samples())
+
+
+@pytest.mark.django_db
+def test_staff_users_profile_their_requests(board, client, member_client):
+    url = f"/api/boards/{board.id}/columns"
+    assert client.get(url, headers={"X-Profile": "1"}).status_code == 200
+    assert not RequestProfile.objects.exists()
+
+    staff = member_client(is_staff=True)
+    assert staff.get(url, headers={"X-Profile": "1"}).status_code == 200
+    profile = RequestProfile.objects.get()
+    assert profile.trigger == RequestProfile.Trigger.HEADER
+    assert profile.path == url
+    assert profile.view.endswith("get_columns")
+    assert profile.user.is_staff
+    assert profile.sql_count == sum(query["count"] for query in profile.queries)
+    assert any('"kanban_app_board"' in query["sql"] for query in profile.queries)
+
+    # Admin pages are not profiled
+    staff.get("/admin/?profile")
+    assert RequestProfile.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_page_profiles_time_the_templates(board, member_client):
+    staff = member_client(is_staff=True)
+    assert staff.get(f"/project/{board.project_id}/?profile").status_code == 200
+
+    profile = RequestProfile.objects.get(trigger=RequestProfile.Trigger.QUERY)
+    names = [template["name"] for template in profile.templates]
+    assert "kanban_app/board.html" in names
+    assert profile.templates[0]["ms"] <= profile.template_ms <= profile.duration_ms
+
+
+@pytest.mark.django_db
+def test_one_in_n_requests_is_sampled(board, client, settings):
+    settings.KANBAN_PROFILE_SAMPLE_RATE = 3
+    for _ in range(6):
+        client.get(f"/api/boards/{board.id}/columns?q=private")
+
+    profiles = RequestProfile.objects.filter(trigger="sample")
+    assert profiles.count() == 2
+    # Query strings are not kept
+    assert {profile.path for profile in profiles} == {f"/api/boards/{board.id}/columns"}
+
+
+@pytest.mark.django_db
+def test_flame_graph_and_exports():
+    profile = slow_profile()
+
+    boxes = {box["name"]: box for box in flame_graph(profile)}
+    assert boxes["view"]["width"] == pytest.approx(100)
+    assert boxes["slow"]["depth"] == 1
+    assert boxes["query"]["width"] == pytest.approx(100 / 3)
+    assert folded_stacks(profile).splitlines() == [
+        "view (kanban_app/views.py:1);slow (kanban_app/views.py:9) 20000",
+        "view (kanban_app/views.py:1);slow (kanban_app/views.py:9);query (django/db.py:5) 10000",
+    ]
+
+
+@pytest.mark.django_db
+def test_admin_shows_and_exports_profiles(admin_client):
+    profile = slow_profile()
+    url = f"/admin/kanban_app/requestprofile/{profile.pk}/"
+
+    content = admin_client.get(f"{url}change/").content.decode()
+    assert "Flame graph" in content
+    assert 'title="slow (kanban_app/views.py:9), 30.0 ms"' in content
+
+    exported = json.loads(admin_client.get(f"{url}speedscope/").content)
+    assert exported["profiles"][0]["weights"] == pytest.approx([20, 10])
+    assert exported["shared"]["frames"][2]["name"] == "query"
+    assert admin_client.get(f"{url}folded/").content.decode() == folded_stacks(profile)
@@ -0,0 +1,77 @@
+import logging
+import pytest
+from django.test import Client
+from model_bakery import baker
+from kanban_app.models import Project, ProjectMembership, Board, Column, Task, Tag
+from kanban_app.query_budget import QueryBudgetExceeded, query_budget
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+def test_query_budget_raises_in_strict_mode():
+    with (
+        pytest.raises(QueryBudgetExceeded, match="over its budget of 1"),
+        query_budget(1, name="two queries"),
+    ):
+        list(Project.objects.all())
+        list(Board.objects.all())
+
+
+@pytest.mark.django_db
+def test_query_budget_logs_warning_outside_strict_mode(settings, caplog):
+    settings.QUERY_BUDGET_STRICT = False
+
+    @query_budget(0)
+    def list_projects():
+        return list(Project.objects.all())
+
+    with caplog.at_level(logging.WARNING, logger="kanban_app.query_budget"):
+        list_projects()
+
+    assert "list_projects ran 1 queries" in caplog.text
+    assert "kanban_app_project" in caplog.text
+    assert "test_query_budget.py" in caplog.text
+
+
+@pytest.mark.django_db
+def test_board_endpoints_stay_within_budget_on_large_boards():
+    user = baker.make(User)
+    project = baker.make(Project)
+    baker.make(ProjectMembership, project=project, user=user)
+    board = baker.make(Board, project=project)
+    tags = baker.make(Tag, project=project, _quantity=3)
+    for order in range(3):
+        column = baker.make(Column, board=board, order=order)
+        for task_order in range(10):
+            task = baker.make(Task, column=column, order=task_order, assigned_to=user)
+            task.tags.set(tags)
+    task = Task.objects.first()
+    client = Client()
+    client.force_login(user)
+
+    # Each of these raises QueryBudgetExceeded on an N+1 regression
+    assert client.get(f"/api/boards/{board.id}/columns").status_code == 200
+    assert client.get(f"/api/tasks/{task.id}/details").status_code == 200
+    response = client.post(
+        f"/api/tasks/{task.id}/move",
+        {"new_column_id": task.column_id, "new_order": 5},
+    )
+    assert response.status_code == 204
+
+
+@pytest.mark.django_db
+def test_project_board_creates_default_columns_within_budget():
+    user = baker.make(User)
+    project = baker.make(Project)
+    baker.make(ProjectMembership, project=project, user=user)
+    client = Client()
+    client.force_login(user)
+
+    assert client.get(f"/project/{project.id}/").status_code == 200
+    assert list(project.board.columns.values_list("name", flat=True)) == [
+        "To Do",
+        "In Progress",
+        "Done",
+    ]
@@ -0,0 +1,163 @@
+import json
+import pytest
+from django.contrib.auth.models import User
+from model_bakery import baker
+from kanban_app.models import (
+    Board,
+    Column,
+    ProjectStats,
+    Task,
+    TaskStatusHistory,
+)
+
+
+@pytest.fixture
+def board(board, user):
+    """The shared board with three tasks of the user in each column"""
+    for column in board.columns.all():
+        for task_order in range(3):
+            baker.make(
+                Task,
+                column=column,
+                order=task_order,
+                title=f"{column.name} {task_order}",
+                assigned_to=user,
+            )
+    return board
+
+
+def column_tasks(column):
+    return list(column.tasks.order_by("order").values_list("id", flat=True))
+
+
+def reorder(client, board, payload):
+    return client.post(
+        f"/api/boards/{board.id}/reorder",
+        json.dumps(payload),
+        content_type="application/json",
+    )
+
+
+@pytest.mark.django_db
+def test_burst_of_drags_is_applied_in_one_request(
+    board, client, django_capture_on_commit_callbacks
+):
+    todo, doing, done = board.columns.all()
+    first, second, third = column_tasks(todo)
+    finished = column_tasks(done)
+
+    # Dragged: first to the top of Done, third above second
+    with django_capture_on_commit_callbacks(execute=True):
+        response = reorder(
+            client,
+            board,
+            {
+                "columns": [
+                    {"id": todo.id, "tasks": [third, second], "version": 0},
+                    {"id": done.id, "tasks": [first, *finished], "version": 0},
+                ]
+            },
+        )
+
+    assert response.status_code == 204
+    assert column_tasks(todo) == [third, second]
+    assert column_tasks(done) == [first, *finished]
+    assert list(
+        TaskStatusHistory.objects.values_list("task_id", "old_column", "new_column")
+    ) == [(first, todo.id, done.id)]
+    assert ProjectStats.objects.get(project=board.project).done_count == 4
+    versions = json.loads(response["HX-Trigger"])["versionsChanged"]
+    assert versions == {
+        "tasks": {str(first): 1},
+        "columns": {str(todo.id): 1, str(done.id): 1},
+    }
+    # Only rows that changed are written
+    assert Task.objects.get(id=finished[0]).version == 0
+    assert Column.objects.get(id=doing.id).version == 0
+
+
+@pytest.mark.django_db
+def test_unchanged_order_writes_nothing(board, client, django_assert_num_queries):
+    todo = board.columns.first()
+    payload = {"columns": [{"id": todo.id, "tasks": column_tasks(todo)}]}
+
+    # The permission checks are cached from the first request
+    reorder(client, board, payload)
+    # Board, columns and tasks, in a savepoint with nothing to flush
+    with django_assert_num_queries(5):
+        response = reorder(client, board, payload)
+
+    assert response.status_code == 204
+    assert Board.objects.get(id=board.id).version == board.version
+
+
+@pytest.mark.django_db
+def test_tasks_added_meanwhile_keep_their_place_at_the_end(board, client):
+    todo = board.columns.first()
+    first, second, third = column_tasks(todo)
+
+    response = reorder(
+        client, board, {"columns": [{"id": todo.id, "tasks": [second, first]}]}
+    )
+
+    assert response.status_code == 204
+    assert column_tasks(todo) == [second, first, third]
+
+
+@pytest.mark.django_db
+def test_stale_reorder_is_refused_as_a_whole(board, client):
+    todo, _, done = board.columns.all()
+    first, second, third = column_tasks(todo)
+
+    response = reorder(
+        client,
+        board,
+        {
+            "columns": [
+                {"id": todo.id, "tasks": [third, second], "version": 0},
+                {"id": done.id, "tasks": [first], "version": 7},
+            ]
+        },
+    )
+
+    assert response.status_code == 409
+    assert column_tasks(todo) == [first, second, third]
+    assert Column.objects.get(id=todo.id).version == 0
+
+
+@pytest.mark.django_db
+def test_reorder_rejects_what_is_not_on_the_board(board, client):
+    todo = board.columns.first()
+    other = baker.make(Task, column=baker.make(Column), assigned_to=baker.make(User))
+    unassigned = baker.make(Task, column=board.columns.last())
+
+    assert (
+        reorder(client, board, {"columns": [{"id": 0, "tasks": []}]}).status_code == 400
+    )
+    assert (
+        reorder(
+            client, board, {"columns": [{"id": todo.id, "tasks": [other.id]}]}
+        ).status_code
+        == 400
+    )
+    assert (
+        reorder(
+            client, board, {"columns": [{"id": todo.id, "tasks": [unassigned.id]}]}
+        ).content
+        == b"Unassigned tasks cannot change status."
+    )
+
+
+@pytest.mark.django_db
+def test_reorder_moves_columns(board, client):
+    todo, doing, done = board.columns.all()
+
+    response = reorder(client, board, {"column_order": [done.id, todo.id, doing.id]})
+
+    assert response.status_code == 204
+    assert list(board.columns.values_list("id", flat=True)) == [
+        done.id,
+        todo.id,
+        doing.id,
+    ]
+    assert reorder(client, board, {"column_order": [todo.id]}).status_code == 400
@@ -0,0 +1,82 @@
+import datetime
+import os
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from model_bakery import baker
+from kanban_app.history_logger import get_history_file_path, log_task_change
+from kanban_app.models import (
+    Project,
+    Board,
+    Column,
+    Task,
+    Tag,
+    TaskStatusHistory,
+    TaskAssignmentHistory,
+)
+from kanban_app.retention import purge_deleted_projects
+
+
+def make_project_with_tasks(task_count=3):
+    project = baker.make(Project)
+    board = baker.make(Board, project=project)
+    column = baker.make(Column, board=board)
+    tag = baker.make(Tag, project=project)
+    for order in range(task_count):
+        task = baker.make(Task, column=column, order=order)
+        task.tags.add(tag)
+        TaskStatusHistory.objects.create(task=task, new_column=column)
+        TaskAssignmentHistory.objects.create(task=task)
+    log_task_change(project.id, "System", "A task", "Created")
+    return project
+
+
+def soft_delete(project, days_ago):
+    project.delete()
+    Project.all_objects.filter(id=project.id).update(
+        deleted_at=timezone.now() - datetime.timedelta(days=days_ago)
+    )
+
+
+@pytest.mark.django_db
+def test_purge_deleted_projects_respects_grace_period():
+    expired = make_project_with_tasks()
+    recent = make_project_with_tasks()
+    active = make_project_with_tasks()
+    soft_delete(expired, days_ago=40)
+    soft_delete(recent, days_ago=1)
+
+    assert purge_deleted_projects(grace_days=30, batch_size=2) == [expired.id]
+
+    assert not Project.all_objects.filter(id=expired.id).exists()
+    assert not Board.objects.filter(project_id=expired.id).exists()
+    assert not Tag.objects.filter(project_id=expired.id).exists()
+    assert Task.all_objects.count() == 6
+    assert TaskStatusHistory.objects.count() == 6
+    assert TaskAssignmentHistory.objects.count() == 6
+    assert not os.path.exists(get_history_file_path(expired.id))
+    assert os.path.exists(get_history_file_path(recent.id))
+    assert Project.objects.filter(id=active.id).exists()
+
+
+@pytest.mark.django_db
+def test_purge_projects_command():
+    project = make_project_with_tasks()
+    soft_delete(project, days_ago=40)
+    call_command("purge_projects", "--grace-days", "30", "--dry-run")
+    assert Project.all_objects.filter(id=project.id).exists()
+
+    call_command("purge_projects", "--grace-days", "30")
+    assert not Project.all_objects.filter(id=project.id).exists()
+
+
+@pytest.mark.django_db
+def test_deleted_project_rows_are_not_served(admin_client):
+    project = make_project_with_tasks(task_count=1)
+    board = project.board
+    task = Task.objects.get(column__board=board)
+    project.delete()
+
+    client = admin_client
+    assert client.get(f"/api/boards/{board.id}/columns").status_code == 404
+    assert client.get(f"/api/tasks/{task.id}/details").status_code == 404
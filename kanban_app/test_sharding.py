@@ -0,0 +1,175 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client
+from model_bakery import baker
+from kanban_app.models import (
+    Board,
+    Column,
+    Project,
+    ProjectMembership,
+    Tag,
+    Task,
+    TaskStatusHistory,
+)
+from kanban_app.query_budget import QueryBudgetExceeded, query_budget
+from kanban_app.sharding import (
+    SHARD_ID_SPAN,
+    NoShardSelected,
+    select_shards,
+    shard_for_project,
+    use_project,
+)
+
+pytestmark = pytest.mark.django_db(databases=["default", "shard_0", "shard_1"])
+
+
+@pytest.fixture
+def sharded(settings):
+    settings.KANBAN_SHARDS = 2
+    settings.DATABASE_ROUTERS = ["kanban_app.sharding.ProjectShardRouter"]
+
+
+@pytest.fixture
+def user(sharded):
+    return User.objects.create(username="alice")
+
+
+@pytest.fixture
+def projects(user):
+    """A project with a board in each shard"""
+    client = Client()
+    client.force_login(user)
+    projects = [Project.objects.create(name=name) for name in ("First", "Second")]
+    for project in projects:
+        # Memberships stay in the catalog
+        ProjectMembership.objects.create(project=project, user=user)
+        # The board page creates the board and its columns
+        assert client.get(f"/project/{project.id}/").status_code == 200
+    return projects
+
+
+def test_project_rows_live_in_the_shard_of_their_project(projects):
+    first, second = projects
+    assert shard_for_project(first.id) != shard_for_project(second.id)
+
+    for project in projects:
+        database = shard_for_project(project.id)
+        board = Board.objects.using(database).get(project_id=project.id)
+        assert board.id >= (int(database[-1]) + 1) * SHARD_ID_SPAN
+        assert Column.objects.using(database).filter(board=board).count() == 3
+    assert not Board.objects.using("default").exists()
+    with pytest.raises(NoShardSelected):
+        Task.objects.count()
+
+
+def test_requests_write_to_the_shard_named_by_the_header(projects, user):
+    project = projects[0]
+    database = shard_for_project(project.id)
+    column = Column.objects.using(database).get(name="To Do")
+    client = Client()
+    client.force_login(user)
+
+    response = client.post(
+        f"/api/columns/{column.id}/tasks",
+        {"title": "Sharded"},
+        HTTP_X_PROJECT_ID=str(project.id),
+    )
+
+    assert response.status_code == 200
+    with use_project(project.id):
+        task = Task.objects.get(title="Sharded")
+        assert task.project_task_id == 1
+        assert task.column.board.project.next_task_id == 2
+        assert TaskStatusHistory.objects.filter(task=task).exists()
+    assert not Task.objects.using("default").exists()
+    with pytest.raises(NoShardSelected):
+        client.post(f"/api/columns/{column.id}/tasks", {"title": "Lost"})
+
+
+def test_projects_and_users_are_mirrored_into_the_shards(projects, user):
+    project = projects[0]
+    database = shard_for_project(project.id)
+    Project.all_objects.using(database).filter(id=project.id).update(next_task_id=9)
+
+    project.name = "Renamed"
+    project.delete()
+    user.first_name = "Alice"
+    user.save()
+
+    mirror = Project.all_objects.using(database).get(id=project.id)
+    assert (mirror.name, mirror.is_deleted, mirror.next_task_id) == ("Renamed", True, 9)
+    for alias in ("shard_0", "shard_1"):
+        assert User.objects.using(alias).get(id=user.id).first_name == "Alice"
+
+    user.delete()
+    assert not User.objects.using("shard_0").exists()
+
+
+def test_project_list_and_my_work_gather_every_shard(projects, user):
+    for project in projects:
+        with use_project(project.id):
+            column = Column.objects.get(name="To Do")
+            Task.objects.create(column=column, title=project.name, assigned_to=user)
+    call_command("refresh_project_stats")
+    client = Client()
+    client.force_login(user)
+
+    listing = client.get("/api/projects/list").content.decode()
+    my_work = client.get("/api/my-work").content.decode()
+
+    for project in projects:
+        assert project.name in listing
+        assert project.name in my_work
+    assert listing.count("1 open") == 2
+
+
+def test_split_copies_each_project_into_its_shard(settings, capsys):
+    user = baker.make(User)
+    tasks = {}
+    for name in ("First", "Second"):
+        project = baker.make(Project, name=name, next_task_id=4)
+        column = baker.make(Column, board=baker.make(Board, project=project))
+        task = baker.make(Task, column=column, assigned_to=user)
+        task.tags.add(baker.make(Tag, project=project))
+        baker.make(TaskStatusHistory, task=task, new_column=column)
+        tasks[project.id] = task
+
+    settings.KANBAN_SHARDS = 2
+    settings.DATABASE_ROUTERS = ["kanban_app.sharding.ProjectShardRouter"]
+    call_command("split_shards")
+    # The summaries wrap at the console's width
+    assert "shard_0: 1 users, 1 projects" in " ".join(capsys.readouterr().out.split())
+    # Running it again copies nothing twice
+    call_command("split_shards")
+    output = " ".join(capsys.readouterr().out.split())
+    assert "shard_0: 0 users, 0 projects" in output
+    assert "0 tasks" in output
+    assert "1 tasks" not in output
+
+    for project_id, task in tasks.items():
+        database = shard_for_project(project_id)
+        with use_project(project_id):
+            copy = Task.objects.get(column__board__project_id=project_id)
+            assert (copy.id, copy.updated_at) == (task.id, task.updated_at)
+            assert copy.assigned_to == user
+            assert copy.tags.count() == 1
+            assert copy.status_history.count() == 1
+            assert copy.column.board.project.next_task_id == 4
+        assert User.objects.using(database).filter(id=user.id).exists()
+        assert not Task.objects.using(database).exclude(id=task.id).exists()
+
+
+def test_query_budgets_count_the_queries_on_shards(projects):
+    with (
+        use_project(projects[0].id),
+        pytest.raises(QueryBudgetExceeded, match="over its budget of 1"),
+        query_budget(1, name="shard queries"),
+    ):
+        list(Board.objects.all())
+        list(Column.objects.all())
+    # Once per shard
+    with query_budget(0, per_shard=1) as budget:
+        for _ in select_shards():
+            list(Board.objects.all())
+    assert len(budget.queries) == 2
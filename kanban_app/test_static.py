@@ -0,0 +1,56 @@
+import gzip
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+from kanban_app.models import Board, Column, Tag, Task
+
+
+@pytest.fixture
+def compressed_static(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    # Only the project's own files, the admin's take seconds to hash
+    settings.STATICFILES_FINDERS = [
+        "django.contrib.staticfiles.finders.FileSystemFinder"
+    ]
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "staticfiles": {
+            "BACKEND": "kanban_app.storage.CompressedManifestStaticFilesStorage"
+        },
+    }
+    call_command("collectstatic", interactive=False, verbosity=0)
+    return tmp_path
+
+
+def test_collectstatic_writes_hashed_and_compressed_files(compressed_static):
+    hashed = [
+        path
+        for path in (compressed_static / "css").glob("style.*.css")
+        if path.name != "style.css"
+    ]
+
+    assert len(hashed) == 1
+    compressed = hashed[0].with_name(hashed[0].name + ".gz")
+    assert gzip.decompress(compressed.read_bytes()) == hashed[0].read_bytes()
+    assert list((compressed_static / "img").glob("icons.*.svg.gz"))
+    assert not list((compressed_static / "css").glob("style.css.gz"))
+
+
+@pytest.mark.django_db
+def test_board_is_gzipped_and_cards_carry_no_inline_styles(admin_client):
+    board = baker.make(Board)
+    column = baker.make(Column, board=board)
+    tag = baker.make(Tag, color="#ff0000")
+    task = baker.make(Task, column=column, description="Details")
+    task.tags.add(tag)
+
+    response = admin_client.get(
+        f"/api/boards/{board.id}/columns", HTTP_ACCEPT_ENCODING="gzip"
+    )
+
+    assert response["Content-Encoding"] == "gzip"
+    html = gzip.decompress(response.content).decode()
+    # Only the tag colour is set per card
+    assert html.count('style="') == 1
+    assert "img/icons.svg#user" in html
+    assert "<svg" in html and "<path" not in html
@@ -0,0 +1,71 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from kanban_app.models import Board, Column, Project, ProjectStats, Task
+from kanban_app.stats import refresh_project_stats
+
+User = get_user_model()
+
+
+def stats(project):
+    row = ProjectStats.objects.get(project=project)
+    return row.task_count, row.done_count
+
+
+@pytest.mark.django_db
+def test_stats_follow_task_changes(admin_client):
+    project = baker.make(Project)
+    board = baker.make(Board, project=project)
+    todo = baker.make(Column, board=board, name="To Do", order=0)
+    done = baker.make(Column, board=board, name="Done", order=1, is_terminal=True)
+    baker.make(Task, column=done)
+    client = admin_client
+
+    # The first change creates the row with a full count
+    client.post(f"/api/columns/{todo.id}/tasks", {"title": "One"})
+    client.post(f"/api/columns/{todo.id}/tasks", {"title": "Two"})
+    assert stats(project) == (3, 1)
+
+    task = Task.objects.get(title="One")
+    task.assigned_to = baker.make(User)
+    task.save()
+    client.post(
+        f"/api/tasks/{task.id}/move", {"new_column_id": done.id, "new_order": 0}
+    )
+    assert stats(project) == (3, 2)
+
+    client.post(f"/api/tasks/{task.id}/archive")
+    assert stats(project) == (2, 1)
+    client.post(f"/api/tasks/{task.id}/restore")
+    assert stats(project) == (3, 2)
+
+    client.delete(f"/api/tasks/{Task.objects.get(title='Two').id}")
+    assert stats(project) == (2, 2)
+
+    client.delete(f"/api/columns/{done.id}?move_to={todo.id}")
+    assert stats(project) == (2, 0)
+
+    # Matches a recount from scratch
+    refresh_project_stats([project.id])
+    assert stats(project) == (2, 0)
+
+
+@pytest.mark.django_db
+def test_project_list_shows_stats_in_one_query(admin_client):
+    for _ in range(3):
+        project = baker.make(Project)
+        column = baker.make(Column, board=baker.make(Board, project=project))
+        baker.make(Task, column=column, _quantity=2)
+    baker.make(Project)
+    call_command("refresh_project_stats")
+    # Caches the logged-in user
+    admin_client.get("/api/projects/list")
+
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get("/api/projects/list")
+
+    assert len(queries) == 1
+    assert response.content.decode().count("2 open") == 3
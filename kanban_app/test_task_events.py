@@ -0,0 +1,114 @@
+import os
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from kanban_app.history_logger import get_history_file_path
+from kanban_app import interactive_cli
+from kanban_app.models import (
+    Project,
+    Board,
+    Column,
+    Task,
+    TaskStatusHistory,
+    TaskAssignmentHistory,
+)
+from kanban_app.task_events import record_task_events
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+@pytest.fixture
+def columns():
+    project = baker.make(Project)
+    board = baker.make(Board, project=project)
+    return (
+        baker.make(Column, board=board, name="To Do", order=0),
+        baker.make(Column, board=board, name="Done", order=1),
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_recorder_writes_history_in_one_insert_per_table(columns):
+    todo, done = columns
+    project_id = todo.board.project_id
+    tasks = baker.make(Task, column=todo, _quantity=3)
+    user = baker.make(User)
+
+    with (
+        CaptureQueriesContext(connection) as queries,
+        record_task_events("alice") as events,
+    ):
+        for task in tasks:
+            events.moved(project_id, task, todo, done)
+            events.assigned(project_id, task, None, user)
+
+    inserts = [q["sql"] for q in queries if q["sql"].startswith("INSERT")]
+    assert len(inserts) == 2
+    assert TaskStatusHistory.objects.count() == 3
+    assert TaskAssignmentHistory.objects.count() == 3
+    with open(get_history_file_path(project_id)) as f:
+        assert len(f.readlines()) == 6
+
+
+@pytest.mark.django_db(transaction=True)
+def test_recorder_discards_history_on_rollback(columns):
+    todo, done = columns
+    project_id = todo.board.project_id
+    task = baker.make(Task, column=todo)
+
+    with pytest.raises(RuntimeError), record_task_events("alice") as events:
+        events.moved(project_id, task, todo, done)
+        raise RuntimeError("move failed")
+
+    assert not TaskStatusHistory.objects.exists()
+    assert not os.path.exists(get_history_file_path(project_id))
+
+
+@pytest.mark.django_db
+def test_cli_change_task_status_records_history(columns, monkeypatch):
+    todo, done = columns
+    task = baker.make(Task, column=todo, project_task_id=7)
+    answers = iter([7, 2])
+    monkeypatch.setattr(
+        interactive_cli.IntPrompt, "ask", lambda *args, **kwargs: next(answers)
+    )
+
+    interactive_cli.change_task_status(interactive_cli.BoardView(todo.board))
+
+    task.refresh_from_db()
+    assert task.column == done
+    assert TaskStatusHistory.objects.filter(
+        task=task, old_column=todo, new_column=done
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_admin_task_change_records_history(columns):
+    todo, done = columns
+    task = baker.make(Task, column=todo, title="Admin task", order=0)
+    admin_user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+    assignee = baker.make(User)
+    client = Client()
+    client.force_login(admin_user)
+
+    response = client.post(
+        f"/admin/kanban_app/task/{task.id}/change/",
+        {
+            "column": done.id,
+            "title": task.title,
+            "description": "",
+            "assigned_to": assignee.id,
+            "order": 0,
+        },
+    )
+
+    assert response.status_code == 302
+    assert TaskStatusHistory.objects.filter(
+        task=task, old_column=todo, new_column=done
+    ).exists()
+    assert TaskAssignmentHistory.objects.filter(
+        task=task, old_assignee=None, new_assignee=assignee
+    ).exists()
@@ -0,0 +1,68 @@
+import threading
+import pytest
+from django.db import DatabaseError, connection, transaction
+from model_bakery import baker
+from kanban_app.models import Project, Board, Column, Task
+from kanban_app.task_ids import allocate_task_ids
+
+
+@pytest.mark.django_db
+def test_allocate_task_ids_reserves_blocks():
+    project = baker.make(Project, next_task_id=5)
+    assert allocate_task_ids(project.id) == range(5, 6)
+    assert allocate_task_ids(project.id, count=3) == range(6, 9)
+    project.refresh_from_db()
+    assert project.next_task_id == 9
+
+
+@pytest.mark.django_db
+def test_allocate_task_ids_rolls_back_with_transaction():
+    project = baker.make(Project)
+    with pytest.raises(RuntimeError), transaction.atomic():
+        allocate_task_ids(project.id)
+        raise RuntimeError("task creation failed")
+    assert allocate_task_ids(project.id) == range(1, 2)
+
+
+@pytest.mark.django_db
+def test_allocate_task_ids_unknown_project():
+    with pytest.raises(Project.DoesNotExist):
+        allocate_task_ids(12345)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_task_creation_ids_are_unique_and_gap_free():
+    project = baker.make(Project)
+    board = baker.make(Board, project=project)
+    column = baker.make(Column, board=board)
+    threads_count, tasks_per_thread = 8, 10
+
+    errors = []
+
+    def create_tasks():
+        try:
+            for _ in range(tasks_per_thread):
+                # Read then write, as `create_task` does
+                with transaction.atomic():
+                    column.tasks.last()
+                    (task_id,) = allocate_task_ids(project.id)
+                    Task.objects.create(
+                        column=column, title="t", project_task_id=task_id
+                    )
+        except DatabaseError as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=create_tasks) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    ids = sorted(Task.objects.values_list("project_task_id", flat=True))
+    total = threads_count * tasks_per_thread
+    assert ids == list(range(1, total + 1))
+    project.refresh_from_db()
+    assert project.next_task_id == total + 1
@@ -0,0 +1,69 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import RequestFactory
+from kanban_app.user_cache import USER_CACHE, load_user, user_cache_key
+
+
+@pytest.fixture
+def user(user):
+    """The shared user, with a password for the session hash to change"""
+    user.set_password("first password")
+    user.save()
+    return user
+
+
+def session_request(client):
+    """A request carrying the client's session"""
+    request = RequestFactory().get("/")
+    request.session = client.session
+    return request
+
+
+@pytest.mark.django_db
+def test_board_refresh_reads_session_and_user_from_caches(
+    board, client, django_assert_num_queries
+):
+    assert client.get(f"/api/boards/{board.id}/columns").status_code == 200
+
+    # Only the board lookup, the permission check is cached too
+    with django_assert_num_queries(1):
+        response = client.get(f"/api/boards/{board.id}/columns")
+    assert response.wsgi_request.user.username == "alice"
+
+
+@pytest.mark.django_db
+def test_cached_user_is_used_while_the_session_hash_matches(
+    client, user, django_assert_num_queries
+):
+    assert load_user(session_request(client)) == user
+
+    with django_assert_num_queries(0):
+        assert load_user(session_request(client)) == user
+
+
+@pytest.mark.django_db
+def test_password_change_and_logout_drop_the_cached_user(client, user):
+    load_user(session_request(client))
+    user.set_password("second password")
+    user.save()
+
+    assert caches[USER_CACHE].get(user_cache_key(user.pk)) is None
+    # The session was made with the old password
+    assert not load_user(session_request(client)).is_authenticated
+
+    client.force_login(user)
+    load_user(session_request(client))
+    client.logout()
+    assert caches[USER_CACHE].get(user_cache_key(user.pk)) is None
+
+
+@pytest.mark.django_db
+def test_stale_cached_user_is_read_again(client, user):
+    # Another process changed the password since this copy was cached
+    stale = User.objects.get(pk=user.pk)
+    stale.set_password("changed elsewhere")
+    caches[USER_CACHE].set(user_cache_key(user.pk), stale)
+
+    assert load_user(session_request(client)).password == user.password
+    assert caches[USER_CACHE].get(user_cache_key(user.pk)).password == user.password
@@ -0,0 +1,111 @@
+import json
+import pytest
+from django.contrib.auth import get_user_model
+from model_bakery import baker
+from kanban_app.archive import archive_task, restore_task
+from kanban_app.models import Board, Column, Project, Task
+from kanban_app.operations import Operations
+from kanban_app.task_events import record_task_events
+
+User = get_user_model()
+
+
+@pytest.fixture
+def columns():
+    board = baker.make(Board, project=baker.make(Project))
+    todo = baker.make(Column, board=board, name="To Do", order=0)
+    done = baker.make(Column, board=board, name="Done", order=1)
+    return todo, done
+
+
+@pytest.mark.django_db
+def test_stale_detail_edits_are_refused(columns, admin_client):
+    todo, _ = columns
+    task = baker.make(Task, column=todo, title="Original")
+    client = admin_client
+
+    first = client.post(
+        f"/api/tasks/{task.id}/update_details", {"title": "Mine", "version": 0}
+    )
+    second = client.post(
+        f"/api/tasks/{task.id}/update_details", {"title": "Theirs", "version": 0}
+    )
+
+    assert first.status_code == 200
+    # The new version is swapped into the open details form
+    assert (
+        'id="task-details-version" name="version" value="1"' in first.content.decode()
+    )
+    assert second.status_code == 409
+    task.refresh_from_db()
+    assert (task.title, task.version) == ("Mine", 1)
+
+
+@pytest.mark.django_db
+def test_stale_moves_are_refused(columns, admin_client):
+    todo, done = columns
+    user = baker.make(User)
+    task = baker.make(Task, column=todo, assigned_to=user, order=0)
+    other = baker.make(Task, column=done, assigned_to=user, order=0)
+    client = admin_client
+
+    response = client.post(
+        f"/api/tasks/{task.id}/move",
+        {"new_column_id": done.id, "new_order": 1, "version": 0, "column_version": 0},
+    )
+
+    assert response.status_code == 204
+    assert json.loads(response.headers["HX-Trigger"]) == {
+        "versionsChanged": {
+            "tasks": {str(task.id): 1},
+            "columns": {str(done.id): 1, str(todo.id): 1},
+        }
+    }
+
+    # Dropped into "Done" as it was before the first move
+    response = client.post(
+        f"/api/tasks/{other.id}/move",
+        {"new_column_id": done.id, "new_order": 1, "version": 0, "column_version": 0},
+    )
+    assert response.status_code == 409
+    # A stale task is refused even when the column is current
+    response = client.post(
+        f"/api/tasks/{task.id}/move",
+        {"new_column_id": todo.id, "new_order": 0, "version": 0, "column_version": 1},
+    )
+    assert response.status_code == 409
+
+    task.refresh_from_db()
+    other.refresh_from_db()
+    assert (task.column_id, task.order, task.version) == (done.id, 1, 1)
+    assert (other.column_id, other.order) == (done.id, 0)
+
+
+@pytest.mark.django_db
+def test_moves_outside_the_board_refuse_stale_drops(columns, admin_client):
+    todo, done = columns
+    project_id = todo.board.project_id
+    user = baker.make(User)
+    task = baker.make(Task, column=todo, assigned_to=user, project_task_id=1)
+    other = baker.make(Task, column=todo, assigned_to=user, order=1)
+
+    with record_task_events("cli") as events:
+        Operations(events).move(project_id, 1, "Done")
+    todo.refresh_from_db()
+    done.refresh_from_db()
+    assert (todo.version, done.version) == (1, 1)
+
+    # Dropped into "Done" as it was before the CLI move
+    response = admin_client.post(
+        f"/api/tasks/{other.id}/move",
+        {"new_column_id": done.id, "new_order": 0, "version": 0, "column_version": 0},
+    )
+    assert response.status_code == 409
+
+    task.refresh_from_db()
+    archive_task(task)
+    done.refresh_from_db()
+    assert done.version == 2
+    restore_task(Task.all_objects.get(id=task.id))
+    done.refresh_from_db()
+    assert done.version == 3
@@ -0,0 +1,77 @@
+"""
+Per-process cache of the users behind sessions.
+
+Django's `AuthenticationMiddleware` looks the user up in the database on
+every request that touches `request.user`, which is every HTMX partial.
+`CachedAuthenticationMiddleware` keeps the user in the `users` cache for a
+few seconds instead. A cached user is only used while the session's auth
+hash still matches it, like Django checks it for a user from the database.
+
+Saving, deleting or logging out a user drops it from the cache of the
+process that did it. The cache is local memory, so other processes keep
+serving their copy until its short timeout runs out.
+"""
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import caches
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+USER_CACHE = "users"
+
+
+def user_cache_key(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def load_user(request):
+    """The user of the request's session, from the cache when it still matches"""
+    session = request.session
+    user_id = session.get(auth.SESSION_KEY)
+    session_hash = session.get(auth.HASH_SESSION_KEY)
+    backend_path = session.get(auth.BACKEND_SESSION_KEY)
+    if (
+        user_id is None
+        or not session_hash
+        or backend_path not in settings.AUTHENTICATION_BACKENDS
+    ):
+        # Anonymous or not verifiable here, Django sorts it out
+        return auth.get_user(request)
+
+    cache = caches[USER_CACHE]
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is not None and constant_time_compare(
+        session_hash, user.get_session_auth_hash()
+    ):
+        return user
+
+    # Django also accepts hashes made with SECRET_KEY_FALLBACKS, and logs
+    # out sessions whose hash matches no key
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(key, user)
+    return user
+
+
+def get_cached_user(request):
+    if not hasattr(request, "_cached_user"):
+        request._cached_user = load_user(request)
+    return request._cached_user
+
+
+def forget_cached_user(sender, instance=None, user=None, **kwargs) -> None:
+    """Drops a saved, deleted or logged out user from this process' cache"""
+    user = instance if instance is not None else user
+    if user is not None:
+        caches[USER_CACHE].delete(user_cache_key(user.pk))
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """`AuthenticationMiddleware` reading the user through the `users` cache"""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
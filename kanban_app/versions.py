@@ -0,0 +1,46 @@
+from django.db.models import F, Q
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+
+class VersionConflict(Exception):
+    """Raised when a row changed since the client loaded it"""
+
+
+def bump_version(rows: QuerySet, expected: int, **changes) -> int:
+    """Applies `changes` to a row if it still has the `expected` version.
+
+    This is optimistic concurrency control: one conditional `UPDATE ... WHERE
+    version = expected` both checks and writes, so no lock is held while the
+    user edits. Returns the new version, raises `VersionConflict` if someone
+    else changed the row first.
+    """
+    changes.setdefault("updated_at", timezone.now())
+    if not rows.filter(version=expected).update(version=F("version") + 1, **changes):
+        raise VersionConflict(
+            f"{rows.model._meta.verbose_name} changed since it was loaded"
+        )
+    return expected + 1
+
+
+def bump_versions(
+    rows: QuerySet, expected: dict[int, int], **changes
+) -> dict[int, int]:
+    """`bump_version` for several rows in one UPDATE, `expected` maps IDs to versions.
+
+    All or nothing: raises `VersionConflict` if any row changed, the caller's
+    transaction rolls back the rows that were updated. Returns the new
+    versions by ID.
+    """
+    if not expected:
+        return {}
+    unchanged = Q()
+    for pk, version in expected.items():
+        unchanged |= Q(pk=pk, version=version)
+    changes.setdefault("updated_at", timezone.now())
+    updated = rows.filter(unchanged).update(version=F("version") + 1, **changes)
+    if updated != len(expected):
+        raise VersionConflict(
+            f"{rows.model._meta.verbose_name_plural} changed since they were loaded"
+        )
+    return {pk: version + 1 for pk, version in expected.items()}
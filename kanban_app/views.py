@@ -1,28 +1,47 @@
 import os
+from django.conf import settings
+from django.http import HttpResponse
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from .models import Board, Project
+from django.core.exceptions import PermissionDenied
+from django.utils.crypto import constant_time_compare
+from .models import Board, Column, Project
 from .history_logger import get_history_file_path
+from .metrics import render_metrics
+from .permissions import Role, has_role, project_members
+from .query_budget import query_budget
 
 
 @login_required
+@query_budget(0)
 def index(request):
     projects = Project.objects.all()
     return render(request, "kanban_app/project_list.html", {"projects": projects})
 
 
 @login_required
+@query_budget(0)
+def my_work(request):
+    return render(request, "kanban_app/my_work.html")
+
+
+@login_required
+@query_budget(7)
 def project_board(request, project_id):
     project = get_object_or_404(Project, id=project_id)
+    if not has_role(request, project.id, Role.VIEWER):
+        raise PermissionDenied
 
     # Ensure a board exists for this project
     if not hasattr(project, "board"):
         board = Board.objects.create(project=project, name=f"{project.name} Board")
-        from .models import Column
-
-        Column.objects.create(board=board, name="To Do", order=0)
-        Column.objects.create(board=board, name="In Progress", order=1)
-        Column.objects.create(board=board, name="Done", order=2)
+        Column.objects.bulk_create(
+            [
+                Column(board=board, name="To Do", order=0),
+                Column(board=board, name="In Progress", order=1),
+                Column(board=board, name="Done", order=2, is_terminal=True),
+            ]
+        )
     else:
         board = project.board
 
@@ -39,5 +58,22 @@ def project_board(request, project_id):
             "board": board,
             "project": project,
             "history_content": history_content,
+            # Choices for the filter bar
+            "tags": project.tags.all(),
+            "users": project_members(project.id),
         },
     )
+
+
+# The session and the user of a staff user, scrapers send a token instead
+@query_budget(2)
+def metrics(request):
+    """Prometheus metrics, for staff users and scrapers sending the token"""
+    token = settings.KANBAN_METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    scraper = bool(token) and constant_time_compare(authorization, f"Bearer {token}")
+    if not scraper and not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
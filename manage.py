@@ -7,7 +7,11 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # The kanban CLI only needs the ORM, so it starts with the lean settings
+    settings_module = (
+        "config.settings_cli" if sys.argv[1:2] == ["kanban"] else "config.settings"
+    )
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
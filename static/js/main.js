@@ -28,16 +28,8 @@ function initDragAndDrop() {
             ghostClass: 'sortable-ghost',
             dragClass: 'sortable-drag',
             onEnd: function (evt) {
-                const itemEl = evt.item;
-                const columnId = itemEl.dataset.columnId;
-                const newIndex = evt.newIndex;
-
                 if (evt.oldIndex !== evt.newIndex) {
-                    // Make API call to reorder column using HTMX ajax or fetch
-                    htmx.ajax('POST', `/api/columns/${columnId}/move`, {
-                        values: { new_order: newIndex },
-                        swap: 'none'
-                    });
+                    queueReorder([], true);
                 }
             },
         });
@@ -47,6 +39,8 @@ function initDragAndDrop() {
     const columnBodies = document.querySelectorAll('.column-body');
     columnBodies.forEach(col => {
         new Sortable(col, {
+            // Positions in a filtered column are not positions in the real column
+            disabled: col.dataset.filtered === 'true',
             group: 'tasks',
             animation: 150,
             filter: '.btn, button, input, textarea, a',
@@ -54,30 +48,119 @@ function initDragAndDrop() {
             ghostClass: 'sortable-ghost',
             dragClass: 'sortable-drag',
             onEnd: function (evt) {
-                const itemEl = evt.item;
-                const taskId = itemEl.dataset.taskId;
-                const toList = evt.to;
-
-                const newColumnId = toList.closest('.column').dataset.columnId;
-                const newIndex = evt.newIndex;
-                const oldIndex = evt.oldIndex;
                 const oldColumnId = evt.from.closest('.column').dataset.columnId;
-
-                if (oldIndex !== newIndex || oldColumnId !== newColumnId) {
-                    // Make API call to move task
-                    htmx.ajax('POST', `/api/tasks/${taskId}/move`, {
-                        values: {
-                            new_column_id: newColumnId,
-                            new_order: newIndex
-                        },
-                        swap: 'none'
-                    });
+                const newColumnId = evt.to.closest('.column').dataset.columnId;
+                if (evt.oldIndex !== evt.newIndex || oldColumnId !== newColumnId) {
+                    queueReorder([oldColumnId, newColumnId], false);
                 }
             },
         });
     });
 }
 
+// Drags are sent together once the board has been still for REORDER_DELAY:
+// the final order of every column touched, in one request
+const REORDER_DELAY = 400;
+const pendingReorder = { columns: new Set(), columnOrder: false };
+let reorderTimer = null;
+let reorderInFlight = false;
+
+function queueReorder(columnIds, columnOrder) {
+    columnIds.forEach(id => pendingReorder.columns.add(id));
+    pendingReorder.columnOrder = pendingReorder.columnOrder || columnOrder;
+    clearTimeout(reorderTimer);
+    reorderTimer = setTimeout(flushReorder, REORDER_DELAY);
+}
+
+function flushReorder() {
+    if (reorderInFlight) {
+        // Send with the versions the running request brings back
+        reorderTimer = setTimeout(flushReorder, REORDER_DELAY);
+        return;
+    }
+    const canvas = document.getElementById('board-canvas');
+    const payload = { columns: [], task_versions: {} };
+    pendingReorder.columns.forEach(id => {
+        const column = canvas.querySelector(`.column[data-column-id="${id}"]`);
+        if (!column) {
+            return;
+        }
+        const cards = Array.from(column.querySelectorAll('.task-card'));
+        cards.forEach(card => { payload.task_versions[card.dataset.taskId] = Number(card.dataset.version); });
+        payload.columns.push({
+            id: Number(id),
+            version: Number(column.dataset.version),
+            tasks: cards.map(card => Number(card.dataset.taskId))
+        });
+    });
+    if (pendingReorder.columnOrder) {
+        payload.column_order = Array.from(canvas.querySelectorAll('.column'), column => Number(column.dataset.columnId));
+    }
+    pendingReorder.columns.clear();
+    pendingReorder.columnOrder = false;
+
+    reorderInFlight = true;
+    fetch(`/api/boards/${canvas.dataset.boardId}/reorder`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', ...JSON.parse(document.body.getAttribute('hx-headers')) },
+        body: JSON.stringify(payload)
+    }).then(response => {
+        if (response.ok) {
+            const trigger = response.headers.get('HX-Trigger');
+            if (trigger) {
+                htmx.trigger(document.body, 'versionsChanged', JSON.parse(trigger).versionsChanged);
+            }
+            return;
+        }
+        return response.text().then(message => {
+            showErrorMessage(message || 'Failed to move task');
+            // Revert the moves in the UI by reloading the board
+            htmx.trigger(document.body, 'columnUpdated');
+        });
+    }).finally(() => {
+        reorderInFlight = false;
+    });
+}
+
+// Optimistic concurrency: keep the versions of what we changed ourselves
+// current, so our next edit is not refused as stale
+document.body.addEventListener('versionsChanged', function (evt) {
+    for (const [taskId, version] of Object.entries(evt.detail.tasks || {})) {
+        const card = document.getElementById(`task-card-${taskId}`);
+        if (card) {
+            card.dataset.version = version;
+        }
+    }
+    for (const [columnId, version] of Object.entries(evt.detail.columns || {})) {
+        const column = document.querySelector(`.column[data-column-id="${columnId}"]`);
+        if (column) {
+            column.dataset.version = version;
+        }
+    }
+});
+
+// Board filters: a saved filter replaces the fields until one of them is edited
+function applySavedFilter(filterId) {
+    const form = document.getElementById('board-filters');
+    form.reset();
+    form.elements.saved.value = filterId;
+    htmx.trigger(form, 'change');
+}
+
+function clearBoardFilters() {
+    const form = document.getElementById('board-filters');
+    form.reset();
+    form.elements.saved.value = '';
+    htmx.trigger(form, 'change');
+}
+
+document.body.addEventListener('input', function (evt) {
+    const form = evt.target.form;
+    if (form && form.id === 'board-filters' && evt.target.name !== 'saved') {
+        form.elements.saved.value = '';
+    }
+});
+
 // Function to close modal explicitly if needed
 function closeModal() {
     const modalContainer = document.getElementById('modal-container');
@@ -98,6 +181,11 @@ document.body.addEventListener('htmx:responseError', function(evt) {
         showErrorMessage(evt.detail.xhr.responseText || 'Failed to move task');
         // Revert the move in the UI by triggering a board refresh
         htmx.trigger(document.body, 'columnUpdated');
+    } else if (evt.detail.xhr.status === 409) {
+        // Someone else saved first
+        showErrorMessage(evt.detail.xhr.responseText);
+    } else if (evt.detail.requestConfig && evt.detail.requestConfig.path && evt.detail.requestConfig.path.includes('/dependencies')) {
+        showErrorMessage(evt.detail.xhr.responseText || 'Failed to update blockers');
     }
 });
 